@@ -0,0 +1,181 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from googleapiclient.errors import HttpError
+
+from metrics import metrics
+
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+def is_rate_limit_error(exc) -> bool:
+    """True for 429s and the 403 `rateLimitExceeded` / `userRateLimitExceeded` quota errors."""
+    if not isinstance(exc, HttpError):
+        return False
+    status = getattr(exc.resp, 'status', None)
+    return status == 429 or (status == 403 and 'ratelimit' in str(exc).lower().replace(' ', ''))
+
+
+def is_retryable(exc) -> bool:
+    """True for errors the same request can simply be sent again for: rate limits and 5xx."""
+    if is_rate_limit_error(exc):
+        return True
+    return isinstance(exc, HttpError) and getattr(exc.resp, 'status', None) in RETRY_STATUSES
+
+
+def retry_after_seconds(exc, now: datetime = None):
+    """Seconds the server asked us to wait (`Retry-After`, in seconds or as an HTTP date), or None."""
+    headers = getattr(exc, 'resp', None)
+    value = headers.get('retry-after') if isinstance(headers, dict) else None
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average, in bursts of up to `burst`.
+
+    `acquire()` takes its tokens straight away, even if that leaves the bucket
+    in debt, and returns how long the caller must wait before sending, so
+    concurrent callers queue up in order instead of all waking at once.
+    """
+
+    def __init__(self, rate: float, burst: int, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: int = 1) -> float:
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A batch bigger than the bucket would never fit, so it just drains it
+            self._tokens -= min(cost, self.burst)
+            return max(0.0, -self._tokens / self.rate)
+
+
+class RetryPolicy:
+    """Up to `max_retries` retries, waiting `Retry-After` or a jittered exponential backoff."""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 32.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, error):
+        """Seconds to wait before retry number `attempt` (0-based), or None to give up."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        wait = retry_after_seconds(error)
+        if wait is not None:
+            # Longer waits are left to the caller's own backoff (op log, poll scheduler)
+            return wait if wait <= self.max_delay else None
+        wait = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return random.uniform(wait / 2, wait)
+
+
+# Requests per second and burst size for each kind of call. Google counts
+# every request inside a batch against the quota, so batches are charged per
+# request and their bucket is big enough to hold a few full batches.
+OPERATION_LIMITS = {
+    "list": (5.0, 10),
+    "insert": (10.0, 20),
+    "delete": (10.0, 20),
+    "batch": (10.0, 200),
+    "other": (5.0, 10)
+}
+
+
+class ApiLimiter:
+    """
+    Runs `.execute()` calls through a token bucket and a retry policy per
+    operation type (`OPERATION_LIMITS`), and counts what that cost.
+
+    `stats[op]` has `calls`, `throttled` (calls that had to wait for the
+    bucket), `throttle_seconds`, `retries` and `failures` (errors passed on
+    to the caller after any retries).
+    """
+
+    def __init__(self, limits: dict = None, policies: dict = None, sleep=time.sleep, clock=time.monotonic):
+        self.sleep = sleep
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.buckets = {}
+        self.policies = {}
+        self.stats = {}
+        limits, policies = {**OPERATION_LIMITS, **(limits or {})}, policies or {}
+        for op in set(limits) | set(policies):
+            rate, burst = limits.get(op, OPERATION_LIMITS["other"])
+            self.configure(op, rate, burst, policies.get(op))
+
+    def configure(self, op: str, rate: float = None, burst: int = None, policy: RetryPolicy = None):
+        """Set the rate, burst and/or retry policy for one operation type; the rest keep their values."""
+        old = self.buckets.get(op)
+        default_rate, default_burst = (old.rate, old.burst) if old else OPERATION_LIMITS.get(op, OPERATION_LIMITS["other"])
+        with self._lock:
+            if old is None or rate is not None or burst is not None:
+                self.buckets[op] = TokenBucket(rate or default_rate, burst or default_burst, clock=self.clock)
+            if policy is not None or op not in self.policies:
+                self.policies[op] = policy or RetryPolicy()
+            self.stats.setdefault(op, _empty_stats())
+
+    def execute(self, request, op: str = "other", cost: int = 1):
+        """`request.execute()`, throttled and retried as configured for `op`."""
+        if op not in self.buckets:
+            self.configure(op)
+        bucket, policy, stats = self.buckets[op], self.policies[op], self.stats[op]
+        attempt = 0
+        while True:
+            wait = bucket.acquire(cost)
+            with self._lock:
+                stats["calls"] += 1
+                if wait > 0:
+                    stats["throttled"] += 1
+                    stats["throttle_seconds"] += wait
+            if wait > 0:
+                self.sleep(wait)
+            try:
+                with metrics.span("api_request", op=op):
+                    return request.execute()
+            except Exception as e:
+                delay = policy.delay(attempt, e)
+                if delay is None:
+                    with self._lock:
+                        stats["failures"] += 1
+                    raise
+                with self._lock:
+                    stats["retries"] += 1
+                print(f"⏳ Calendar {op} failed ({e}), retrying in {delay:.1f}s")
+                self.sleep(delay)
+                attempt += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {op: dict(stats) for op, stats in self.stats.items()}
+
+    def reset(self):
+        """Refill every bucket and zero the counters (used by tests)."""
+        with self._lock:
+            for op, bucket in self.buckets.items():
+                self.buckets[op] = TokenBucket(bucket.rate, bucket.burst, clock=self.clock)
+                self.stats[op] = _empty_stats()
+
+
+def _empty_stats():
+    return {"calls": 0, "throttled": 0, "throttle_seconds": 0.0, "retries": 0, "failures": 0}
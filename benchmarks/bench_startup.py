@@ -0,0 +1,87 @@
+"""
+Cold-start cost: import time of the headless core and of the GUI, and the
+time from process start to the first painted window.
+
+Every measurement runs in a fresh interpreter, so nothing is already
+imported. Import times come from `python -X importtime` (cumulative, in ms);
+"google modules" counts the google/googleapiclient modules loaded by the
+import. First paint starts the app the way `__main__` does, against an empty
+event store and op log in a temp dir, and stops at the first `update()`. That
+part needs a display, like the app itself:
+
+    python benchmarks/bench_startup.py
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MODULES = ["scheduler_core", "calendar_utils", "task_scheduler_gui"]
+REPEATS = 5
+
+FIRST_PAINT = """
+import os, sys, time
+started = float(os.environ["BENCH_STARTED"])
+import task_scheduler_gui as gui
+gui.sort_tasks()
+gui.load_pending_ops(os.path.join(sys.argv[1], "ops.jsonl"))
+gui.load_local_store(os.path.join(sys.argv[1], "events.db"))
+gui.app.update()
+painted = time.time() - started
+google = sum(1 for m in sys.modules if m.startswith(("google", "googleapiclient")))
+print(painted, google)
+gui.app.destroy()
+"""
+
+
+def import_time(module):
+    """(cumulative import ms, google modules loaded) for `import module` in a fresh interpreter."""
+    code = f"import sys, {module}; print(sum(1 for m in sys.modules if m.startswith(('google', 'googleapiclient'))))"
+    run = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if run.returncode:
+        return None, None
+    for line in run.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000, int(run.stdout.strip())
+    return None, None
+
+
+def first_paint(work_dir):
+    """Seconds from process start to the first painted frame, or None without a display."""
+    env = dict(os.environ, BENCH_STARTED=repr(time.time()))
+    run = subprocess.run([sys.executable, "-c", FIRST_PAINT, work_dir], cwd=ROOT, env=env, capture_output=True, text=True)
+    if run.returncode:
+        return None, None
+    painted, google = run.stdout.split()[-2:]
+    return float(painted), int(google)
+
+
+def main():
+    print(f"{'import':<22}{'median ms':>10}{'google modules':>16}")
+    for module in MODULES:
+        samples = [import_time(module) for _ in range(REPEATS)]
+        times = [ms for ms, _ in samples if ms is not None]
+        if not times:
+            print(f"{module:<22}{'n/a':>10}")
+            continue
+        print(f"{module:<22}{statistics.median(times):>10.1f}{samples[0][1]:>16}")
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        samples = [first_paint(work_dir) for _ in range(REPEATS)]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    times = [s for s, _ in samples if s is not None]
+    if not times:
+        print("first paint: n/a (no display)")
+        return
+    print(f"{'first paint':<22}{statistics.median(times) * 1000:>10.1f}{samples[0][1]:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Task list render cost vs. row count, before and after list virtualization.
+
+"before" is the old destroy-and-rebuild sort_tasks() into a CTkScrollableFrame;
+"after" is the current sort_tasks() over the virtualized list. Each is timed for
+a cold render and for a refresh where only one task changed, and the number of
+live row widgets is reported. Needs a display, like the app itself:
+
+    python benchmarks/bench_task_list.py
+"""
+import dataclasses
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import customtkinter as ctk
+import task_scheduler_gui as gui
+from task_model import Task
+
+ROW_COUNTS = [100, 400, 1000, 10000]
+LEGACY_MAX_ROWS = 1000  # past this the old renderer takes too long to be worth waiting for
+REPEATS = 3
+
+
+def make_tasks(n):
+    base = datetime(2025, 4, 20, 8, 0)
+    return [Task(f"Task {i}", base + timedelta(hours=i * 3), duration_minutes=60, event_id=f"evt{i}") for i in range(n)]
+
+
+legacy_container = None
+
+
+def legacy_sort_tasks():
+    """The pre-virtualization sort_tasks(): destroy everything, then recreate every widget."""
+    for widget in legacy_container.winfo_children():
+        widget.destroy()
+    grouped = {}
+    for task in sorted(gui.all_tasks, key=lambda t: t.sort_key):
+        grouped.setdefault(gui.task_date_key(task), []).append(task)
+    for date_key, tasks in grouped.items():
+        ctk.CTkLabel(legacy_container, text=f"\U0001F4C5 {date_key}", font=gui.custom_font).pack(anchor='w', padx=10, pady=(10, 0))
+        for task in tasks:
+            task_frame = ctk.CTkFrame(legacy_container, fg_color="transparent")
+            task_frame.pack(fill='x', padx=30, pady=2, anchor='w')
+            var = ctk.IntVar()
+            ctk.CTkCheckBox(task_frame, text="", variable=var).pack(side='left', padx=5)
+            ctk.CTkLabel(task_frame, text=gui.task_info_text(task)).pack(side='left', padx=5)
+            ctk.CTkLabel(task_frame, text=task.title, wraplength=400, anchor="w", justify="left").pack(side='left', padx=5, fill="x", expand=True)
+
+
+def legacy_widget_count():
+    return len(legacy_container.winfo_children())
+
+
+def reset():
+    for widget in legacy_container.winfo_children():
+        widget.destroy()
+    gui.all_tasks.clear()
+    gui.sort_tasks()
+    gui.app.update()
+
+
+def timed(render):
+    start = time.perf_counter()
+    render()
+    gui.app.update_idletasks()  # include geometry/layout, not just widget creation
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(render, n):
+    cold, refresh = [], []
+    for _ in range(REPEATS):
+        reset()
+        gui.all_tasks.extend(make_tasks(n))
+        cold.append(timed(render))
+        edited = dataclasses.replace(gui.all_tasks[n // 2], title="Edited")
+        gui.all_tasks[n // 2] = edited
+        refresh.append(timed(render))
+    return min(cold), min(refresh)
+
+
+def main():
+    global legacy_container
+    legacy_container = ctk.CTkScrollableFrame(gui.app, height=300)
+    legacy_container.pack(fill='both', expand=True)
+    gui.app.update()
+
+    print(f"{'rows':>6} | {'before cold':>12} | {'after cold':>11} | {'before 1-edit':>14} | {'after 1-edit':>13} | {'widgets before/after':>20}")
+    print("-" * 95)
+    for n in ROW_COUNTS:
+        if n <= LEGACY_MAX_ROWS:
+            old_cold, old_refresh = measure(legacy_sort_tasks, n)
+            old_cold, old_refresh, old_widgets = f"{old_cold:9.1f} ms", f"{old_refresh:11.1f} ms", legacy_widget_count()
+        else:
+            old_cold, old_refresh, old_widgets = "-", "-", "-"
+        new_cold, new_refresh = measure(gui.sort_tasks, n)
+        new_widgets = gui.task_list_container.widget_count
+        print(f"{n:>6} | {old_cold:>12} | {new_cold:>8.1f} ms | {old_refresh:>14} | {new_refresh:>10.1f} ms | {old_widgets!s:>9} / {new_widgets}")
+    reset()
+    gui.app.destroy()
+
+
+if __name__ == "__main__":
+    main()
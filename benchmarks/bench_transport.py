@@ -0,0 +1,144 @@
+"""
+Per-request latency against a local stub HTTPS server, with and without
+connection pooling.
+
+"fresh" opens a new httplib2.Http (and so a new TCP connection and TLS
+handshake) for every request, as building a client per call did; "pooled"
+sends everything through one ThreadLocalHttp, from one thread and then from
+several at once. The server counts the connections it accepted. Uses a
+throwaway self-signed certificate when `openssl` is available, plain HTTP
+otherwise:
+
+    python benchmarks/bench_transport.py
+"""
+import os
+import shutil
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httplib2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from http_pool import ThreadLocalHttp
+
+REQUESTS = 200
+THREADS = 4
+BODY = b'{"kind": "calendar#events", "items": []}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like Google's front ends
+    wbufsize = -1  # headers and body in one write, so delayed ACKs don't add 40ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(cert_dir):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.connections = 0
+    server.lock = threading.Lock()
+    scheme = "http"
+    if cert_dir:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(os.path.join(cert_dir, "cert.pem"), os.path.join(cert_dir, "key.pem"))
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/calendar/v3/events"
+
+
+def make_cert():
+    """Self-signed cert for 127.0.0.1 in a temp dir, or None without openssl."""
+    if not shutil.which("openssl"):
+        return None
+    cert_dir = tempfile.mkdtemp()
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+         "-keyout", os.path.join(cert_dir, "key.pem"), "-out", os.path.join(cert_dir, "cert.pem")],
+        check=True, capture_output=True
+    )
+    return cert_dir
+
+
+def new_http():
+    return httplib2.Http(timeout=10, disable_ssl_certificate_validation=True)
+
+
+def timed(send, url):
+    start = time.perf_counter()
+    response, _ = send(url)
+    assert response.status == 200
+    return time.perf_counter() - start
+
+
+def run_fresh(url, n):
+    def send(url):
+        http = new_http()
+        try:
+            return http.request(url)
+        finally:
+            http.close()
+    return [timed(send, url) for _ in range(n)]
+
+
+def run_pooled(url, n, threads=1):
+    pool = ThreadLocalHttp(http_factory=new_http)
+    try:
+        if threads == 1:
+            return [timed(pool.request, url) for _ in range(n)]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(lambda _: timed(pool.request, url), range(n)))
+    finally:
+        pool.close()
+
+
+def report(label, server, run):
+    before = server.connections
+    wall = time.perf_counter()
+    latencies = run()
+    wall = time.perf_counter() - wall
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<22}{statistics.mean(latencies) * 1000:>9.2f}{p95 * 1000:>9.2f}"
+          f"{len(latencies) / wall:>10.0f}{server.connections - before:>8}")
+
+
+def main():
+    cert_dir = make_cert()
+    server, url = start_server(cert_dir)
+    try:
+        print(f"{REQUESTS} GETs to a local {'HTTPS' if cert_dir else 'HTTP'} stub")
+        print(f"{'transport':<22}{'mean ms':>9}{'p95 ms':>9}{'req/s':>10}{'conns':>8}")
+        report("fresh per request", server, lambda: run_fresh(url, REQUESTS))
+        report("pooled", server, lambda: run_pooled(url, REQUESTS))
+        report(f"pooled, {THREADS} threads", server, lambda: run_pooled(url, REQUESTS, THREADS))
+    finally:
+        server.shutdown()
+        server.server_close()
+        if cert_dir:
+            shutil.rmtree(cert_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Shared setup for the pytest-benchmark suite (`pytest benchmarks/`).
+
+Calendars of each size in `BENCH_SIZES` (default 1k, 10k and 100k events)
+are built once per session on the in-memory fake service from tests/.
+`measure` runs a hot path under the `benchmark` fixture and adds what
+pytest-benchmark doesn't report itself: p50/p95/p99 latency, items per
+second and the peak memory of one run.
+"""
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'tests'))
+pytest.importorskip("pytest_benchmark")
+from calendar_utils import CALENDAR_ID, api_limiter
+from fake_calendar import FakeCalendarService
+
+SIZES = [int(n) for n in os.environ.get("BENCH_SIZES", "1000,10000,100000").split(",")]
+SPACING = timedelta(minutes=15)
+
+
+def pytest_configure(config):
+    # Baselines live next to the suite, so `--benchmark-autosave` / `--benchmark-compare` share them
+    if getattr(config.option, "benchmark_storage", None) == "file://./.benchmarks":
+        config.option.benchmark_storage = "file://" + os.path.join(os.path.dirname(__file__), ".benchmarks")
+
+
+def event_body(i, first_start):
+    start = first_start + SPACING * i
+    return {"summary": f"Task {i}", "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": (start + timedelta(minutes=30)).isoformat()}}
+
+
+def first_start():
+    """Tomorrow 00:00 local time, so every generated event is upcoming."""
+    today = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today + timedelta(days=1)
+
+
+def build_calendar(size):
+    service = FakeCalendarService()
+    start = first_start()
+    for i in range(size):
+        service.add_event(event_body(i, start), CALENDAR_ID)
+    return service
+
+
+_calendars = {}
+
+
+@pytest.fixture
+def calendar():
+    """`calendar(size)`: a fake service holding `size` upcoming events, shared by the whole session."""
+    def get(size):
+        if size not in _calendars:
+            _calendars[size] = build_calendar(size)
+        return _calendars[size]
+    return get
+
+
+@pytest.fixture(autouse=True)
+def unthrottled():
+    """The benchmarks measure our code, not the API quota, so the limiter never makes them wait."""
+    saved = {op: (bucket.rate, bucket.burst) for op, bucket in api_limiter.buckets.items()}
+    for op in saved:
+        api_limiter.configure(op, rate=1e9, burst=10 ** 9)
+    api_limiter.reset()
+    yield
+    for op, (rate, burst) in saved.items():
+        api_limiter.configure(op, rate=rate, burst=burst)
+    api_limiter.reset()
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    `measure(fn, items, setup=None, rounds=None)` benchmarks `fn()` and records
+    percentiles, `items_per_second` (`items` handled per call) and
+    `peak_memory_kib` in the benchmark's extra_info. Returns `fn`'s last result.
+    With `--benchmark-disable` (a smoke run) `fn` just runs once.
+    """
+    def run(fn, items, setup=None, rounds=None):
+        if benchmark.disabled:
+            return benchmark.pedantic(fn, setup=setup) if setup is not None else benchmark(fn)
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        if setup is None and rounds is None:
+            result = benchmark(fn)
+        else:
+            result = benchmark.pedantic(fn, setup=setup, rounds=rounds or 5)
+        if benchmark.stats is None:
+            return result
+        data = sorted(benchmark.stats.stats.data)
+        benchmark.extra_info.update(
+            items=items,
+            p50_ms=percentile(data, 50) * 1000,
+            p95_ms=percentile(data, 95) * 1000,
+            p99_ms=percentile(data, 99) * 1000,
+            items_per_second=items / benchmark.stats.stats.mean if benchmark.stats.stats.mean else 0.0,
+            peak_memory_kib=peak / 1024
+        )
+        return result
+    return run
+
+
+def percentile(sorted_data, pct):
+    if not sorted_data:
+        return 0.0
+    rank = min(len(sorted_data) - 1, max(0, round(pct / 100 * len(sorted_data)) - 1))
+    return sorted_data[rank]
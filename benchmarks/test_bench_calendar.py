@@ -0,0 +1,140 @@
+"""
+Hot paths of calendar_utils and the headless core at 1k/10k/100k events,
+against the in-memory fake service:
+
+    pytest benchmarks/ --benchmark-autosave                 # record a baseline
+    pytest benchmarks/ --benchmark-compare --benchmark-compare-fail=mean:20%
+    BENCH_SIZES=1000 pytest benchmarks/                     # quick run
+
+The refresh tick is what the GUI's once-a-second poll does when a sync is
+due: sync every calendar, fold the changes into the tasks and pick the
+visible ones.
+"""
+import pytest
+
+from conftest import SIZES, build_calendar
+from calendar_utils import (
+    CALENDAR_ID, EventIndex, api_limiter, backup_calendar_to_json, delete_task, iter_events, list_all_events
+)
+from scheduler_core import SchedulerCore
+from task_model import Task
+
+TICK_MODES = ["tokens", "windowed"]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_list_all_events(measure, calendar, size):
+    service = calendar(size)
+    events = measure(lambda: list_all_events(service), size)
+    assert len(events) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_events_to_tasks(measure, calendar, size):
+    """Stream every event and parse it: the listing and parse cost of a first full sync."""
+    service = calendar(size)
+    tasks = measure(lambda: [Task.from_event(e) for e in iter_events(service)], size)
+    assert len(tasks) == size
+
+
+def _last_event(service):
+    """The latest event of a generated calendar (they are created in start order)."""
+    events = service.events_by_calendar[CALENDAR_ID]
+    return dict(events[f"evt{len(events)}"])
+
+
+def _restorer(service, event, index=None):
+    """Setup for a delete benchmark: put the deleted event back and warm the fake's listing cache."""
+    def setup():
+        events = service.events_by_calendar[CALENDAR_ID]
+        if event["id"] not in events:
+            service.add_event(dict(event), CALENDAR_ID)
+            service._in_start_order(CALENDAR_ID, events)
+        if index is not None:
+            index.add(event)
+    return setup
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_delete_task_by_listing(measure, calendar, size, capsys):
+    """delete_task() without an index lists the calendar to find the event (worst case: the last one)."""
+    service = calendar(size)
+    event = _last_event(service)
+    title, start = event["summary"], event["start"]["dateTime"]
+    measure(lambda: delete_task(service, title, start), size, setup=_restorer(service, event), rounds=5)
+    _restorer(service, event)()
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_delete_task_with_index(measure, calendar, size, capsys):
+    service = calendar(size)
+    event = _last_event(service)
+    index = EventIndex(service.events_by_calendar[CALENDAR_ID].values())
+    title, start = event["summary"], event["start"]["dateTime"]
+    measure(lambda: delete_task(service, title, start, index=index), 1,
+            setup=_restorer(service, event, index), rounds=20)
+    _restorer(service, event)()
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_backup_calendar_to_json(measure, calendar, size, tmp_path, capsys):
+    service = calendar(size)
+    path = str(tmp_path / "task_data.json")
+    measure(lambda: backup_calendar_to_json(service, out_path=path), size)
+
+
+def _synced_core(service, mode, tmp_path):
+    core = SchedulerCore([CALENDAR_ID], window_days=14 if mode == "windowed" else None,
+                         service_factory=lambda: service, backup_path=str(tmp_path / "task_data.json"))
+    core.apply_changes(core.sync())
+    return core
+
+
+@pytest.mark.parametrize("mode", TICK_MODES)
+@pytest.mark.parametrize("size", SIZES)
+def test_refresh_tick_unchanged(measure, size, mode, tmp_path):
+    # A calendar of its own: the tick's sync state must not see other benchmarks' edits
+    service = build_calendar(size)
+    core = _synced_core(service, mode, tmp_path)
+    shown = len(core.tasks_by_id)
+
+    def tick():
+        changed = core.apply_changes(core.sync())
+        return changed, core.visible_tasks()
+
+    changed, visible = measure(tick, shown)
+    assert changed is False and len(visible) == shown
+    core.shutdown()
+
+
+@pytest.mark.parametrize("mode", TICK_MODES)
+@pytest.mark.parametrize("size", SIZES)
+def test_refresh_tick_one_edit(measure, size, mode, tmp_path):
+    """One event renamed elsewhere since the last tick: fetch, parse and apply just that."""
+    service = build_calendar(size)
+    core = _synced_core(service, mode, tmp_path)
+    shown = len(core.tasks_by_id)
+    edits = iter(range(10 ** 9))
+
+    def edit():
+        service.update_event(CALENDAR_ID, "evt1", summary=f"Edited {next(edits)}")
+
+    def tick():
+        changed = core.apply_changes(core.sync())
+        return changed, core.visible_tasks()
+
+    changed, visible = measure(tick, shown, setup=edit, rounds=20)
+    assert changed is True and len(visible) == shown
+    core.shutdown()
+
+
+@pytest.mark.parametrize("error_rate", [0.0, 0.05])
+def test_list_all_events_slow_and_unreliable_server(measure, error_rate, monkeypatch):
+    """10k events over a server with 2ms per request and some 503s, retried (without the backoff sleeps)."""
+    monkeypatch.setattr(api_limiter, "sleep", lambda seconds: None)
+    service = build_calendar(10000)
+    service.latency = 0.002
+    service.error_rate = error_rate
+    events = measure(lambda: list_all_events(service), 10000, rounds=5)
+    assert len(events) == 10000
+    assert api_limiter.stats["list"]["retries"] > 0 or not error_rate
@@ -0,0 +1,73 @@
+"""
+GUI-side hot paths at 1k/10k/100k events: the first refresh (a full sync on
+the worker, then on_sync_done() rendering everything), sort_tasks() into the
+virtualized list, and a refresh that picked up one edit. Needs a display,
+like the app; skipped without one.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from conftest import SIZES, first_start, build_calendar
+from calendar_utils import CALENDAR_ID
+from multi_calendar import MultiCalendarSync
+from task_model import Task
+
+try:
+    import task_scheduler_gui as gui
+except Exception as e:  # TclError without a display
+    pytest.skip(f"needs a display: {e}", allow_module_level=True)
+
+
+@pytest.fixture(autouse=True)
+def empty_gui():
+    gui.all_tasks.clear()
+    gui.tasks_by_id.clear()
+    yield
+    gui.all_tasks.clear()
+    gui.tasks_by_id.clear()
+    gui.sort_tasks()
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_first_refresh(measure, calendar, size, monkeypatch):
+    """Start-up without a local store: sync every event, parse it and render the list."""
+    service = calendar(size)
+    monkeypatch.setattr(gui.core, "calendar_sync", MultiCalendarSync([CALENDAR_ID]))
+
+    def start_empty():
+        gui.core.calendar_sync.reset()
+        gui.tasks_by_id.clear()
+        gui.all_tasks.clear()
+
+    with patch("task_scheduler_gui.get_calendar_service", return_value=service):
+        measure(lambda: gui.on_sync_done(gui.sync_calendar_tasks()), size, setup=start_empty, rounds=3)
+    gui.core.calendar_sync.shutdown()
+    assert len(gui.all_tasks) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_sort_tasks(measure, size):
+    start = first_start()
+    gui.all_tasks.extend(Task(f"Task {i}", start + timedelta(minutes=15 * i), duration_minutes=30, event_id=f"e{i}")
+                         for i in range(size))
+    measure(gui.sort_tasks, size)
+    assert len(gui.checkbox_refs) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_refresh_tick_one_edit(measure, size, monkeypatch):
+    """A sync that picked up one edit, applied and rendered the way the Tk thread does it."""
+    service = build_calendar(size)
+    monkeypatch.setattr(gui.core, "calendar_sync", MultiCalendarSync([CALENDAR_ID]))
+    edits = iter(range(10 ** 9))
+    with patch("task_scheduler_gui.get_calendar_service", return_value=service):
+        gui.on_sync_done(gui.sync_calendar_tasks())
+
+        def edit():
+            service.update_event(CALENDAR_ID, "evt1", summary=f"Edited {next(edits)}")
+
+        measure(lambda: gui.on_sync_done(gui.sync_calendar_tasks()), size, setup=edit, rounds=10)
+    gui.core.calendar_sync.shutdown()
+    assert len(gui.all_tasks) == size
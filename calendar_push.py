@@ -0,0 +1,98 @@
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from calendar_utils import CALENDAR_ID, api_limiter
+
+PUSH_HOST = '127.0.0.1'
+PUSH_PORT = 8765
+CHANNEL_TTL_SECONDS = 7 * 24 * 3600  # Google caps event channels at about a week
+
+
+def watch_calendar(service, address: str, token: str = None, channel_id: str = None,
+                   ttl_seconds: int = CHANNEL_TTL_SECONDS, calendar_id: str = CALENDAR_ID) -> dict:
+    """
+    Ask Google to POST to `address` whenever the calendar changes (events().watch).
+    `address` must be a public HTTPS URL that reaches a `PushReceiver`. Returns
+    the channel (`id`, `resourceId`, `expiration`, ...) needed to stop it.
+    """
+    body = {
+        "id": channel_id or str(uuid.uuid4()),
+        "type": "web_hook",
+        "address": address,
+        "params": {"ttl": str(ttl_seconds)}
+    }
+    if token:
+        body["token"] = token
+    return api_limiter.execute(service.events().watch(calendarId=calendar_id, body=body))
+
+
+def stop_channel(service, channel: dict):
+    api_limiter.execute(service.channels().stop(body={"id": channel["id"], "resourceId": channel["resourceId"]}))
+
+
+class PushReceiver:
+    """
+    Minimal HTTP endpoint for Calendar push notifications.
+
+    Each notification carries no event data, only "something changed", so
+    `on_notify(info)` should just trigger a sync. It is called on the
+    server's thread with `{"channel_id", "resource_id", "state",
+    "message_number"}`. The initial `sync` message Google sends when a
+    channel is created is acknowledged but not passed on, and requests whose
+    `X-Goog-Channel-Token` doesn't match `token` are rejected.
+
+    Port 0 picks a free port; see `port` after `start()`.
+    """
+
+    def __init__(self, on_notify, host: str = PUSH_HOST, port: int = PUSH_PORT, token: str = None):
+        self.on_notify = on_notify
+        self.token = token
+        self.notifications = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="calendar-push", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)  # notifications have no useful body
+                if receiver.token and self.headers.get('X-Goog-Channel-Token') != receiver.token:
+                    self.send_response(403)
+                    self.end_headers()
+                    return
+                state = self.headers.get('X-Goog-Resource-State')
+                if state and state != 'sync':
+                    receiver.notifications += 1
+                    try:
+                        receiver.on_notify({
+                            "channel_id": self.headers.get('X-Goog-Channel-ID'),
+                            "resource_id": self.headers.get('X-Goog-Resource-ID'),
+                            "state": state,
+                            "message_number": self.headers.get('X-Goog-Message-Number')
+                        })
+                    except Exception as e:
+                        print("⚠️ Push notification handler failed:", e)
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass  # keep the console for the app's own messages
+
+        return Handler
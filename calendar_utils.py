@@ -1,10 +1,19 @@
 import os
 import pickle  # for token storage
 import json
-from datetime import datetime, timezone
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
+import sys
+import threading
+import time
+from importlib import import_module
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
+from google.auth.exceptions import RefreshError
+
+from api_limits import ApiLimiter, is_rate_limit_error, is_retryable
+from metrics import metrics
 
 SCOPES = [
     'https://www.googleapis.com/auth/calendar.events',
@@ -12,12 +21,72 @@ SCOPES = [
 ]
 
 CALENDAR_ID = 'c_cd145b86092760e679df8ba1915278a36b426ac2db11dff5e16e54c4bb5013ab@group.calendar.google.com'
+# Every calendar the scheduler shows (team, personal, on-call, ...). New tasks go to the first.
+CALENDAR_IDS = [CALENDAR_ID]
+
+TOKEN_PATH = 'token.pickle'
+CREDENTIALS_PATH = 'credentials.json'
+
+# Partial-response mask for event resources. The GUI, the backup and the sync
+# engine only ever read these, so attendees, descriptions, conference data etc.
+# are never downloaded. Pass fields='*' to a call to get full resources.
+EVENT_FIELDS = 'id,summary,start,end,updated,etag,status'
+
+# Zone the GUI creates events in; naive start times are read in this zone
+DEFAULT_TIMEZONE = 'America/New_York'
+
+# The Calendar API accepts up to 50 calls in one batch request
+BATCH_SIZE = 50
+
+# Refresh the access token this long before it actually expires, so a call
+# never goes out with a token that dies mid-flight.
+CREDS_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Process-wide service cache. Building the client parses the discovery
+# document and reads token.pickle, so we only do it once and then reuse it.
+_service_lock = threading.RLock()
+_cached_service = None
+_cached_creds = None
+service_cache_stats = {"hits": 0, "misses": 0, "rebuilds": 0, "refreshes": 0}
+
+# The discovery client, the OAuth flow and google-auth's requests transport
+# take a few hundred ms to import and are only needed to talk to Google, so
+# they are imported on first use (from the I/O worker, not at app start).
+# `calendar_utils.build` etc. still work, including with `mock.patch`.
+_LAZY_IMPORTS = {
+    "build": ("googleapiclient.discovery", "build"),
+    "InstalledAppFlow": ("google_auth_oauthlib.flow", "InstalledAppFlow"),
+    "Request": ("google.auth.transport.requests", "Request"),
+    "ThreadLocalHttp": ("http_pool", "ThreadLocalHttp")
+}
+
 
-def get_calendar_service():
-    """Authenticate via OAuth2 and return a Google Calendar service object."""
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _LAZY_IMPORTS[name]
+    value = getattr(import_module(module), attr)
+    globals()[name] = value  # later lookups are plain module attributes
+    return value
+
+
+def _lazy(name):
+    """A lazily imported name, as currently bound on this module (so patches apply)."""
+    return getattr(sys.modules[__name__], name)
+
+# Every request below goes through this: rate limited per operation type,
+# with 429/5xx retried. Tune with `api_limiter.configure(...)`.
+api_limiter = ApiLimiter()
+
+
+def _save_credentials(creds, token_path: str = TOKEN_PATH):
+    with open(token_path, 'wb') as token_file:
+        pickle.dump(creds, token_file)
+
+
+def _load_credentials(token_path: str = TOKEN_PATH, creds_path: str = CREDENTIALS_PATH):
+    """Load stored credentials, refreshing them or running the OAuth2 flow if needed."""
     creds = None
-    token_path = 'token.pickle'
-    creds_path = 'credentials.json'
 
     # Load existing credentials
     if os.path.exists(token_path):
@@ -27,45 +96,294 @@ def get_calendar_service():
     # If no valid credentials, perform the OAuth2 flow
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+            creds.refresh(_lazy("Request")())
         else:
-            flow = InstalledAppFlow.from_client_secrets_file(creds_path, SCOPES)
+            flow = _lazy("InstalledAppFlow").from_client_secrets_file(creds_path, SCOPES)
             creds = flow.run_local_server(port=0)
         # Save the credentials for the next run
-        with open(token_path, 'wb') as token_file:
-            pickle.dump(creds, token_file)
-
-    # Build the Calendar API service
-    service = build('calendar', 'v3', credentials=creds)
-    return service
-
-def list_all_events(service, max_results: int = 250, calendar_id: str = CALENDAR_ID):
-    now = datetime.now(timezone.utc).isoformat() + 'Z'
-    events_result = (
-        service.events()
-               .list(
-                   calendarId=calendar_id,
-                   timeMin=now,
-                   maxResults=max_results,
-                   singleEvents=True,
-                   orderBy='startTime'
-               )
-               .execute()
+        _save_credentials(creds, token_path)
+
+    return creds
+
+
+def _creds_expiring_soon(creds, margin: timedelta = CREDS_REFRESH_MARGIN) -> bool:
+    expiry = getattr(creds, 'expiry', None)
+    if not isinstance(expiry, datetime):
+        return False
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return expiry - now <= margin
+
+
+class PayloadStats:
+    """Running totals of API response bytes and JSON decode time."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.responses = 0
+        self.bytes = 0
+        self.decode_seconds = 0.0
+
+    def record(self, num_bytes: int, decode_seconds: float):
+        self.responses += 1
+        self.bytes += num_bytes
+        self.decode_seconds += decode_seconds
+
+    def snapshot(self) -> dict:
+        return {"responses": self.responses, "bytes": self.bytes, "decode_seconds": self.decode_seconds}
+
+
+# Hooks called as hook(num_bytes, decode_seconds) for every decoded API response
+_response_hooks = []
+payload_stats = PayloadStats()
+
+
+def _collect_metrics():
+    """Report the API counters this module already keeps when metrics are exported."""
+    for op, stats in api_limiter.snapshot().items():
+        yield "api_requests", "counter", {"op": op}, stats["calls"]
+        yield "api_throttled", "counter", {"op": op}, stats["throttled"]
+        yield "api_throttle_seconds", "counter", {"op": op}, stats["throttle_seconds"]
+        yield "api_retries", "counter", {"op": op}, stats["retries"]
+        yield "api_failures", "counter", {"op": op}, stats["failures"]
+    payload = payload_stats.snapshot()
+    yield "api_responses", "counter", {}, payload["responses"]
+    yield "api_response_bytes", "counter", {}, payload["bytes"]
+    yield "api_decode_seconds", "counter", {}, payload["decode_seconds"]
+    for key, value in service_cache_stats.items():
+        yield f"service_cache_{key}", "counter", {}, value
+
+
+metrics.add_collector(_collect_metrics)
+
+
+def add_response_hook(hook):
+    _response_hooks.append(hook)
+
+
+def remove_response_hook(hook):
+    if hook in _response_hooks:
+        _response_hooks.remove(hook)
+
+
+class MeteredJsonModel(JsonModel):
+    """
+    The default JSON model, plus a byte count and decode timing for every response.
+    Like the default model it sends `Accept-Encoding: gzip` and a "(gzip)" user
+    agent, so the counted bytes are the payload after decompression.
+    """
+
+    def deserialize(self, content):
+        start = time.perf_counter()
+        data = super().deserialize(content)
+        elapsed = time.perf_counter() - start
+        num_bytes = len(content) if content else 0
+        payload_stats.record(num_bytes, elapsed)
+        for hook in list(_response_hooks):
+            hook(num_bytes, elapsed)
+        return data
+
+
+def get_calendar_service(force_rebuild: bool = False):
+    """
+    Return the shared Google Calendar service object.
+
+    The service is built once and reused, from any thread: its transport gives
+    each thread its own keep-alive connection (`ThreadLocalHttp`). Credentials
+    that are about to expire are refreshed in place (without a refresh token
+    they are used until they expire); the client is only rebuilt when they
+    can't be refreshed, when `invalidate_calendar_service()` was called after
+    an auth error, or when `force_rebuild` is set.
+    """
+    global _cached_service, _cached_creds
+    with _service_lock:
+        if _cached_service is not None and not force_rebuild:
+            if not _creds_expiring_soon(_cached_creds):
+                service_cache_stats["hits"] += 1
+                return _cached_service
+            if getattr(_cached_creds, 'refresh_token', None):
+                try:
+                    _cached_creds.refresh(_lazy("Request")())
+                    _save_credentials(_cached_creds)
+                    service_cache_stats["refreshes"] += 1
+                    service_cache_stats["hits"] += 1
+                    return _cached_service
+                except RefreshError as e:
+                    print("⚠️ Token refresh failed, rebuilding calendar service:", e)
+            elif not _creds_expiring_soon(_cached_creds, margin=timedelta(0)):
+                # Nothing to refresh it with: keep using it until it has actually expired
+                service_cache_stats["hits"] += 1
+                return _cached_service
+
+        if _cached_creds is None:
+            service_cache_stats["misses"] += 1
+        else:
+            service_cache_stats["rebuilds"] += 1
+
+        creds = _load_credentials()
+
+        # Build the Calendar API service
+        _cached_service = _lazy("build")('calendar', 'v3', http=_lazy("ThreadLocalHttp")(creds), model=MeteredJsonModel())
+        _cached_creds = creds
+        return _cached_service
+
+
+def invalidate_calendar_service():
+    """Drop the cached service so the next `get_calendar_service()` rebuilds it."""
+    global _cached_service
+    with _service_lock:
+        # Keep the old creds around so the next build counts as a rebuild
+        _cached_service = None
+
+
+def is_auth_error(exc) -> bool:
+    """True if `exc` means our credentials were rejected and the service should be rebuilt."""
+    if isinstance(exc, RefreshError):
+        return True
+    if isinstance(exc, HttpError):
+        return getattr(exc.resp, 'status', None) == 401
+    return False
+
+
+def reset_calendar_service():
+    """Forget the cached service and zero the cache counters (used by tests)."""
+    global _cached_service, _cached_creds
+    with _service_lock:
+        _cached_service = None
+        _cached_creds = None
+        for key in service_cache_stats:
+            service_cache_stats[key] = 0
+
+def iter_events(service, page_size: int = 250, fields: str = EVENT_FIELDS, time_min=None, time_max=None,
+                calendar_id: str = CALENDAR_ID):
+    """
+    Yield upcoming events one at a time, fetching further pages only as they are needed.
+
+    `time_min` defaults to now; `time_max` is open-ended unless given. Either can
+    be a datetime or an RFC 3339 string. `fields` is the partial-response mask
+    for each item (default `EVENT_FIELDS`, '*' for full resources).
+    """
+    if time_min is None:
+        time_min = datetime.now(timezone.utc)
+    params = dict(
+        calendarId=calendar_id,
+        timeMin=_rfc3339(time_min),
+        timeMax=_rfc3339(time_max) if time_max is not None else None,
+        maxResults=page_size,
+        singleEvents=True,
+        orderBy='startTime'
     )
-    return events_result.get('items', [])
+    params['fields'] = _list_fields(fields, 'nextPageToken')
+
+    page_token = None
+    while True:
+        page = api_limiter.execute(service.events().list(pageToken=page_token, **params), "list")
+        yield from page.get('items', [])
+        page_token = page.get('nextPageToken')
+        if not page_token:
+            return
+
 
-def create_event(service, event_body: dict, calendar_id: str = CALENDAR_ID):
-    return service.events().insert(
+def list_all_events(service, max_results: int = None, calendar_id: str = CALENDAR_ID, page_size: int = 250):
+    """Every upcoming event (or the first `max_results`), following all pages."""
+    events = iter_events(service, page_size=page_size, calendar_id=calendar_id)
+    return list(islice(events, max_results))
+
+
+def _list_fields(fields, *page_fields):
+    """`fields=` value for a list call: the paging fields plus `items(<fields>)`."""
+    if not fields or fields == '*':
+        return None
+    return ",".join(page_fields + (f"items({fields})",))
+
+
+def _rfc3339(value):
+    if isinstance(value, str):
+        return value
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.isoformat()
+
+def create_event(service, event_body: dict, calendar_id: str = CALENDAR_ID, fields: str = EVENT_FIELDS):
+    return api_limiter.execute(service.events().insert(
         calendarId=calendar_id,
-        body=event_body
-    ).execute()
+        body=event_body,
+        fields=None if fields == '*' else fields
+    ), "insert")
+
+
+def create_events(service, bodies, batch_size: int = BATCH_SIZE, calendar_id: str = CALENDAR_ID,
+                  fields: str = 'id'):
+    """
+    Insert many events using batched requests of `batch_size`.
+
+    Inserts that fail with a rate limit or 5xx inside a batch are sent again
+    in a later batch, waiting as the "batch" retry policy says. A 409 means
+    an event with that client-side id already exists (an earlier attempt got
+    through) and counts as created.
+
+    Returns one result per body, in order:
+    `{"body": ..., "event": created resource or None, "ok": bool, "error": str or None,
+    "status": HTTP status of a failed insert or None, "retryable": True if it only
+    failed because the retries ran out}`.
+    """
+    results = [{"body": body, "event": None, "ok": False, "error": None, "status": None, "retryable": False}
+               for body in bodies]
+    policy = api_limiter.policies.get("batch") or api_limiter.policies["other"]
+    for start in range(0, len(results), batch_size):
+        pending = results[start:start + batch_size]
+        attempt = 0
+        while pending:
+            retry, retry_error = [], None
+
+            def on_response(request_id, response, exception, chunk=pending):
+                nonlocal retry_error
+                result = chunk[int(request_id)]
+                status = getattr(getattr(exception, 'resp', None), 'status', None)
+                if exception is None or status == 409:
+                    result.update(ok=True, event=response or result["body"], error=None, status=None, retryable=False)
+                    return
+                result.update(error=str(exception), status=status, retryable=is_retryable(exception))
+                if policy.delay(attempt, exception) is not None:
+                    retry.append(result)
+                    retry_error = exception
+
+            batch = service.new_batch_http_request(callback=on_response)
+            for i, result in enumerate(pending):
+                batch.add(service.events().insert(
+                    calendarId=calendar_id, body=result["body"], fields=None if fields == '*' else fields
+                ), request_id=str(i))
+            api_limiter.execute(batch, "batch", cost=len(pending))
+            if retry:
+                delay = policy.delay(attempt, retry_error)
+                print(f"⏳ {len(retry)} inserts were throttled, retrying in {delay:.1f}s")
+                api_limiter.sleep(delay)
+            pending = retry
+            attempt += 1
+
+    created = sum(1 for r in results if r["ok"])
+    print(f"➕ Created {created} of {len(results)} events")
+    return results
 
 
-def delete_task(service, title: str, start_time: str, max_results: int = 50, calendar_id: str = CALENDAR_ID):
+def delete_task(service, title: str, start_time: str, max_results: int = None, calendar_id: str = CALENDAR_ID, index=None):
     """
     Deletes an event from the specified calendar matching the given title and start time.
     `start_time` must be in ISO 8601 format (e.g., "2025-04-20T10:00").
+    With an `EventIndex` the event is found locally instead of listing the calendar.
     """
+    if index is not None:
+        event_id = index.find(title, start_time)
+        if event_id is None:
+            print(f"❌ No matching event found for deletion: {title} at {start_time}")
+            return
+        api_limiter.execute(service.events().delete(calendarId=calendar_id, eventId=event_id), "delete")
+        index.remove(event_id)
+        print(f"🗑️ Deleted: {title} at {start_time}")
+        return
+
     # Fetch current events from the correct calendar
     existing_events = list_all_events(service, max_results=max_results, calendar_id=calendar_id)
 
@@ -76,15 +394,94 @@ def delete_task(service, title: str, start_time: str, max_results: int = 50, cal
         # Compare both title and starting time (to the minute)
         if event_title == title and event_start[:16] == start_time[:16]:
             event_id = event['id']
-            service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+            api_limiter.execute(service.events().delete(calendarId=calendar_id, eventId=event_id), "delete")
             print(f"🗑️ Deleted: {title} at {start_time}")
             return
 
     print(f"❌ No matching event found for deletion: {title} at {start_time}")
 
 
+def delete_tasks(service, targets, index=None, batch_size: int = BATCH_SIZE, calendar_id: str = CALENDAR_ID,
+                 tz: str = DEFAULT_TIMEZONE):
+    """
+    Delete many events using batched requests.
+
+    Each target is either an event id or a `(title, start_time)` pair. Pairs are
+    looked up in `index` (an `EventIndex`) when given; otherwise one listing of
+    the calendar is indexed first. Naive start times are read in `tz`. Deletes
+    are sent through `new_batch_http_request()` in chunks of `batch_size`.
+
+    Returns one result per target, in order:
+    `{"target": ..., "event_id": ... or None, "ok": bool, "error": str or None,
+    "status": HTTP status of a failed delete or None}`.
+    """
+    results = [{"target": target, "event_id": None, "ok": False, "error": None, "status": None} for target in targets]
+
+    pairs = [r for r in results if not isinstance(r["target"], str)]
+    if pairs:
+        if index is None:
+            index = EventIndex(list_all_events(service, calendar_id=calendar_id))
+        for result in pairs:
+            title, start_time = result["target"]
+            result["event_id"] = index.find(title, start_time, tz)
+            if result["event_id"] is None:
+                result["error"] = "no matching event"
+    for result in results:
+        if isinstance(result["target"], str):
+            result["event_id"] = result["target"]
+
+    pending = [r for r in results if r["event_id"] is not None]
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+
+        def on_response(request_id, response, exception, chunk=chunk):
+            result = chunk[int(request_id)]
+            status = getattr(getattr(exception, 'resp', None), 'status', None)
+            # Already gone counts as deleted
+            if exception is None or status in (404, 410):
+                result["ok"] = True
+            else:
+                result["error"] = str(exception)
+                result["status"] = status
+
+        batch = service.new_batch_http_request(callback=on_response)
+        for i, result in enumerate(chunk):
+            batch.add(service.events().delete(calendarId=calendar_id, eventId=result["event_id"]), request_id=str(i))
+        api_limiter.execute(batch, "batch", cost=len(chunk))
+
+    if index is not None:
+        for result in results:
+            if result["ok"]:
+                index.remove(result["event_id"])
+
+    deleted = sum(1 for r in results if r["ok"])
+    print(f"🗑️ Deleted {deleted} of {len(results)} events")
+    return results
+
+
+def backup_entry(summary: str, start: str, end: str = None):
+    """
+    One task as it appears in task_data.json: `(date, {"task", "time", "duration"})`.
+    `start`/`end` are ISO 8601 strings.
+    """
+    date = start[:10]  # "YYYY-MM-DD"
+    time = start[11:16]  # "HH:MM"
+    duration = None
+
+    if start and end:
+        start_dt = datetime.fromisoformat(start)
+        end_dt = datetime.fromisoformat(end)
+        hours = (end_dt - start_dt).total_seconds() / 3600
+        duration = f"{hours:g} hours\t" if hours != 1 else "1 hour\t"
+
+    return date, {
+        "task": summary,
+        "time": time,
+        "duration": duration
+    }
+
 def backup_calendar_to_json(service, out_path="task_data.json", calendar_id: str = CALENDAR_ID):
-    events = list_all_events(service, calendar_id=calendar_id)
+    events = iter_events(service, calendar_id=calendar_id)
     by_date = {}
 
     for e in events:
@@ -94,26 +491,278 @@ def backup_calendar_to_json(service, out_path="task_data.json", calendar_id: str
         if not summary or not start:
             continue
 
-        date = start[:10]  # "YYYY-MM-DD"
-        time = start[11:16]  # "HH:MM"
-        duration = None
-
-        if start and end:
-            start_dt = datetime.fromisoformat(start)
-            end_dt = datetime.fromisoformat(end)
-            hours = (end_dt - start_dt).total_seconds() / 3600
-            duration = f"{hours:g} hours\t" if hours != 1 else "1 hour\t"
-
-        event_obj = {
-            "task": summary,
-            "time": time,
-            "duration": duration
-        }
-
+        date, event_obj = backup_entry(summary, start, end)
         if date not in by_date:
             by_date[date] = []
         by_date[date].append(event_obj)
 
     with open(out_path, "w") as f:
         json.dump(by_date, f, indent=2)
-    print(f"📝 Backup saved to {out_path}")
\ No newline at end of file
+    print(f"📝 Backup saved to {out_path}")
+
+def parse_event_time(when: dict):
+    """Turn an event's `start`/`end` dict into an aware datetime (None if missing)."""
+    if not when:
+        return None
+    if 'dateTime' in when:
+        dt = datetime.fromisoformat(when['dateTime'])
+    elif 'date' in when:
+        dt = datetime.fromisoformat(when['date'])
+    else:
+        return None
+    # Naive times are in the user's local zone, the same way the GUI creates them
+    return dt if dt.tzinfo else dt.astimezone()
+
+
+def _zone(name):
+    try:
+        return ZoneInfo(name) if name else None
+    except ZoneInfoNotFoundError:
+        return None
+
+
+def event_match_key(title: str, start, tz: str = DEFAULT_TIMEZONE):
+    """
+    Normalized lookup key for "the event called `title` starting at `start`".
+
+    `start` is an ISO string or datetime. It is truncated to the minute and
+    converted to UTC, so the same moment written with different offsets gives
+    the same key. Naive times are read in `tz`.
+    """
+    if isinstance(start, str):
+        start = datetime.fromisoformat(start)
+    if start.tzinfo is None:
+        zone = _zone(tz)
+        start = start.replace(tzinfo=zone) if zone else start.astimezone()
+    minute = start.astimezone(timezone.utc).replace(second=0, microsecond=0, tzinfo=None)
+    return ((title or '').strip(), minute.isoformat(timespec='minutes'))
+
+
+class EventIndex:
+    """
+    Local index of events by id and by `event_match_key(title, start)`.
+
+    Lets deletes and duplicate checks resolve an event in O(1) without listing
+    the calendar. `CalendarSync` keeps one current as it syncs. Updates and
+    lookups hold a lock: a calendar still syncing in the background and an
+    op log flush on the I/O worker can use the same index at once.
+    """
+
+    def __init__(self, events=()):
+        self.by_id = {}
+        self.by_key = {}  # match key -> ids of every event with that title and start
+        self._lock = threading.RLock()
+        for event in events:
+            self.add(event)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, event_id):
+        return event_id in self.by_id
+
+    def get(self, event_id):
+        return self.by_id.get(event_id)
+
+    def add(self, event):
+        event_id = event['id']
+        key = self._key_for(event)
+        with self._lock:
+            if event_id in self.by_id:
+                self.remove(event_id)
+            self.by_id[event_id] = event
+            if key is not None:
+                self.by_key.setdefault(key, []).append(event_id)
+
+    def remove(self, event_id):
+        with self._lock:
+            event = self.by_id.pop(event_id, None)
+            if event is None:
+                return None
+            key = self._key_for(event)
+            ids = self.by_key.get(key)
+            if ids and event_id in ids:
+                ids.remove(event_id)
+                if not ids:
+                    del self.by_key[key]
+            return event
+
+    def find(self, title: str, start, tz: str = DEFAULT_TIMEZONE):
+        """Id of an event with this title and start minute, or None."""
+        key = event_match_key(title, start, tz)
+        with self._lock:
+            ids = self.by_key.get(key)
+            return ids[0] if ids else None
+
+    def clear(self):
+        with self._lock:
+            self.by_id.clear()
+            self.by_key.clear()
+
+    @staticmethod
+    def _key_for(event):
+        start = event.get('start', {})
+        if not start.get('dateTime'):
+            return None
+        try:
+            return event_match_key(event.get('summary', ''), start['dateTime'], start.get('timeZone') or DEFAULT_TIMEZONE)
+        except ValueError:
+            return None
+
+
+class CalendarSync:
+    """
+    Keeps an in-memory copy of one calendar current using Calendar sync tokens.
+
+    The first `sync()` lists every event and stores the `nextSyncToken`. Later
+    calls only ask the API for events inserted, updated or cancelled since then
+    and apply them to `events`. If the token has expired (HTTP 410) the local
+    copy is thrown away and a full resync is done.
+
+    With a `store` (an `EventStore`), events and the sync token are loaded from
+    disk up front and every change is written back, so a restarted app picks
+    up where it left off instead of listing the whole calendar again.
+
+    Events are compared by `etag`/`updated`, never parsed, and a poll whose
+    collection etag and sync token are unchanged returns without touching
+    the index or the store.
+    """
+
+    def __init__(self, calendar_id: str = CALENDAR_ID, page_size: int = 250, fields: str = EVENT_FIELDS, store=None):
+        self.calendar_id = calendar_id
+        self.page_size = page_size
+        self.fields = fields
+        self.index = EventIndex()
+        self.sync_token = None
+        self.collection_etag = None  # etag of the last list response
+        self.store = None
+        if store is not None:
+            self.attach_store(store)
+
+    def attach_store(self, store):
+        """Load events and the sync token from `store` and persist to it from now on."""
+        self.store = store
+        self.index.clear()
+        for event in store.all_events(self.calendar_id):
+            self.index.add(event)
+        self.sync_token = store.sync_token(self.calendar_id)
+
+    @property
+    def events(self):
+        """Event id -> event resource for everything currently in the calendar."""
+        return self.index.by_id
+
+    def reset(self):
+        """Forget all local state; the next `sync()` is a full one."""
+        self.index.clear()
+        self.sync_token = None
+        self.collection_etag = None
+
+    def sync(self, service):
+        """
+        Bring `events` up to date and return the ids that changed as
+        `{"added": [...], "updated": [...], "removed": [...]}`.
+        """
+        if self.sync_token is None:
+            return self._full_sync(service)
+        try:
+            items, next_token, etag = self._fetch(service, syncToken=self.sync_token)
+        except HttpError as e:
+            if getattr(e.resp, 'status', None) != 410:
+                raise
+            print("♻️ Sync token expired, running a full resync")
+            self.sync_token = None
+            return self._full_sync(service)
+
+        changes = _empty_changes()
+        unchanged = not items and etag is not None and etag == self.collection_etag
+        self.collection_etag = etag
+        if unchanged:
+            # Nothing happened since the last poll: no index work and no store write.
+            # The stored token lags behind but stays usable.
+            self.sync_token = next_token
+            return changes
+        for event in items:
+            self._apply(event, changes)
+        self.sync_token = next_token
+        if self.store is not None:
+            self.store.apply(
+                upserts=[self.events[i] for i in changes["added"] + changes["updated"]],
+                deletes=changes["removed"],
+                sync_token=next_token,
+                calendar_id=self.calendar_id
+            )
+        return changes
+
+    def upcoming_events(self, since=None):
+        """Events ending at or after `since` (default: now), in start-time order."""
+        since = since or datetime.now(timezone.utc)
+        upcoming = []
+        for event in self.events.values():
+            start = parse_event_time(event.get('start'))
+            end = parse_event_time(event.get('end')) or start
+            if start is not None and end >= since:
+                upcoming.append((start, event))
+        upcoming.sort(key=lambda pair: pair[0])
+        return [event for _, event in upcoming]
+
+    def _fetch(self, service, **params):
+        """Follow every page of an events().list call; returns (items, nextSyncToken, collection etag)."""
+        items = []
+        page_token = None
+        while True:
+            response = api_limiter.execute(service.events().list(
+                calendarId=self.calendar_id,
+                maxResults=self.page_size,
+                singleEvents=True,
+                pageToken=page_token,
+                fields=_list_fields(self.fields, 'nextPageToken', 'nextSyncToken', 'etag'),
+                **params
+            ), "list")
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items, response.get('nextSyncToken'), response.get('etag')
+
+    def _full_sync(self, service):
+        items, next_token, self.collection_etag = self._fetch(service)
+        changes = _empty_changes()
+        live_ids = set()
+        for event in items:
+            if event.get('status') != 'cancelled':
+                live_ids.add(event['id'])
+            self._apply(event, changes)
+        for event_id in list(self.events):
+            if event_id not in live_ids:
+                self.index.remove(event_id)
+                changes["removed"].append(event_id)
+        self.sync_token = next_token
+        if self.store is not None:
+            if has_changes(changes):
+                self.store.replace_all(self.events.values(), sync_token=next_token, calendar_id=self.calendar_id)
+            else:
+                self.store.apply(sync_token=next_token, calendar_id=self.calendar_id)
+        return changes
+
+    def _apply(self, event, changes):
+        event_id = event['id']
+        if event.get('status') == 'cancelled':
+            if self.index.remove(event_id) is not None:
+                changes["removed"].append(event_id)
+            return
+        old = self.events.get(event_id)
+        if old is None:
+            changes["added"].append(event_id)
+        elif old.get('updated') != event.get('updated') or old.get('etag') != event.get('etag'):
+            changes["updated"].append(event_id)
+        else:
+            return  # unchanged, leave the stored copy alone
+        self.index.add(event)
+
+
+def _empty_changes():
+    return {"added": [], "updated": [], "removed": []}
+
+
+def has_changes(changes: dict) -> bool:
+    return any(changes.values())
@@ -0,0 +1,141 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from calendar_utils import CALENDAR_ID, parse_event_time
+from metrics import metrics
+
+STORE_PATH = 'calendar_store.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id          TEXT NOT NULL,
+    calendar_id TEXT NOT NULL,
+    start_utc   TEXT,
+    end_utc     TEXT,
+    updated     TEXT,
+    body        TEXT NOT NULL,
+    PRIMARY KEY (calendar_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events (calendar_id, start_utc);
+CREATE INDEX IF NOT EXISTS idx_events_id ON events (id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    calendar_id TEXT PRIMARY KEY,
+    sync_token  TEXT
+);
+"""
+
+
+# Fixed-width UTC timestamps, so text comparison in SQLite orders them correctly
+UTC_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def _utc(when):
+    dt = parse_event_time(when)
+    return dt.astimezone(timezone.utc).strftime(UTC_FORMAT) if dt else None
+
+
+class EventStore:
+    """
+    On-disk copy of calendar events in SQLite.
+
+    `CalendarSync` writes every change it sees here together with its sync
+    token, so after a restart the app can render straight from disk and resume
+    incremental syncing without listing the calendar again. Events are kept as
+    their JSON body plus indexed UTC start/end columns for range queries.
+
+    The connection is shared between the Tk thread and the I/O worker, so all
+    access goes through one lock.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def apply(self, upserts=(), deletes=(), sync_token=None, calendar_id: str = CALENDAR_ID):
+        """Write changed events, removed ids and the new sync token in one transaction."""
+        self._write(upserts, deletes, sync_token, calendar_id, wipe=False)
+
+    def replace_all(self, events, sync_token=None, calendar_id: str = CALENDAR_ID):
+        """Make the store hold exactly `events` for this calendar (after a full resync)."""
+        self._write(events, (), sync_token, calendar_id, wipe=True)
+
+    def _write(self, upserts, deletes, sync_token, calendar_id, wipe):
+        with metrics.span("store_write"):
+            self._write_rows(upserts, deletes, sync_token, calendar_id, wipe)
+
+    def _write_rows(self, upserts, deletes, sync_token, calendar_id, wipe):
+        rows = [
+            (e['id'], calendar_id, _utc(e.get('start')), _utc(e.get('end')), e.get('updated'), json.dumps(e))
+            for e in upserts
+        ]
+        with self._lock, self._conn:
+            if wipe:
+                self._conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+                self._conn.execute("DELETE FROM sync_state WHERE calendar_id = ?", (calendar_id,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO events (id, calendar_id, start_utc, end_utc, updated, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany(
+                "DELETE FROM events WHERE calendar_id = ? AND id = ?",
+                [(calendar_id, event_id) for event_id in deletes])
+            if sync_token is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (calendar_id, sync_token) VALUES (?, ?)",
+                    (calendar_id, sync_token))
+
+    def get(self, event_id: str, calendar_id: str = CALENDAR_ID):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM events WHERE calendar_id = ? AND id = ?", (calendar_id, event_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all_events(self, calendar_id: str = CALENDAR_ID):
+        """Every stored event for the calendar, in start-time order."""
+        return self._select("WHERE calendar_id = ? ORDER BY start_utc", (calendar_id,))
+
+    def events_between(self, start=None, end=None, calendar_id: str = CALENDAR_ID):
+        """
+        Events overlapping `[start, end)` in start-time order, using the start index.
+        Either bound may be None for an open range.
+        """
+        clauses, params = ["calendar_id = ?"], [calendar_id]
+        if start is not None:
+            clauses.append("COALESCE(end_utc, start_utc) >= ?")
+            params.append(_as_utc(start))
+        if end is not None:
+            clauses.append("start_utc < ?")
+            params.append(_as_utc(end))
+        return self._select("WHERE " + " AND ".join(clauses) + " ORDER BY start_utc", params)
+
+    def count(self, calendar_id: str = CALENDAR_ID) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events WHERE calendar_id = ?", (calendar_id,)).fetchone()[0]
+
+    def sync_token(self, calendar_id: str = CALENDAR_ID):
+        with self._lock:
+            row = self._conn.execute("SELECT sync_token FROM sync_state WHERE calendar_id = ?", (calendar_id,)).fetchone()
+        return row[0] if row else None
+
+    def _select(self, where, params):
+        with self._lock:
+            rows = self._conn.execute("SELECT body FROM events " + where, params).fetchall()
+        return [json.loads(body) for (body,) in rows]
+
+
+def _as_utc(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).strftime(UTC_FORMAT)
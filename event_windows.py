@@ -0,0 +1,271 @@
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+
+from calendar_utils import (
+    CALENDAR_ID, EVENT_FIELDS, EventIndex, _empty_changes, _list_fields, _rfc3339, api_limiter, parse_event_time
+)
+
+WINDOW_DAYS = 14
+# A loaded window is listed again from scratch after this long, as a backstop for the delta polls
+WINDOW_TTL = 6 * 3600  # seconds
+
+
+def local_midnight() -> datetime:
+    """Start of today in the local zone, as an aware datetime."""
+    return datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class EventWindow:
+    """One `[start, end)` slice of the calendar and when it was last listed in full."""
+
+    def __init__(self, start: datetime, end: datetime):
+        self.start = start
+        self.end = end
+        self.loaded_at = None  # clock time of the last full listing; None = needs one
+
+    def holds(self, when: datetime) -> bool:
+        return self.start <= when < self.end
+
+    def invalidate(self):
+        self.loaded_at = None
+
+
+class WindowedSync:
+    """
+    Keeps a time-windowed copy of one calendar current, for the dates the user
+    can actually see.
+
+    Time from the start of today is cut into windows of `window_days`. Only
+    the first (the near window) is loaded up front; `request_more()` adds the
+    next window, typically when the task list is scrolled near its end, and
+    it is listed (with `timeMin`/`timeMax`) on the next `sync()`. Each window
+    is its own cache: it can be `invalidate()`d on its own and is re-listed
+    once it is older than `WINDOW_TTL`. When the local date changes, the
+    windows move forward to start at the new today (keeping as many of them),
+    so a long-running app keeps showing the same number of days ahead.
+
+    Between full listings, one `updatedMin` query per poll returns only the
+    events changed anywhere since the last one. Changes inside the loaded
+    windows are applied, events that moved out of them are dropped, and
+    everything else is ignored until its window is loaded. So payload and
+    parse cost follow the loaded range and the rate of change, not the size
+    of the calendar. Has the same interface as `CalendarSync`.
+
+    Changes the polls see past the loaded windows (and cancellations) are
+    also handed out by `take_later_changes()`, for whoever keeps a copy of
+    those dates without loading them, like the task backup.
+    """
+
+    def __init__(self, calendar_id: str = CALENDAR_ID, window_days: int = WINDOW_DAYS, page_size: int = 250,
+                 fields: str = EVENT_FIELDS, store=None, ttl: float = WINDOW_TTL, clock=time.monotonic,
+                 today=local_midnight):
+        self.calendar_id = calendar_id
+        self.window_days = window_days
+        self.page_size = page_size
+        self.fields = fields
+        self.ttl = ttl
+        self.clock = clock
+        self.today = today  # returns the aware start of the local day
+        self.index = EventIndex()
+        self.store = None
+        self.later_changes = deque()  # polled events the windows don't hold, until taken
+        self.reset()
+        if store is not None:
+            self.attach_store(store)
+
+    @property
+    def events(self):
+        """Event id -> event resource for everything in the loaded windows."""
+        return self.index.by_id
+
+    @property
+    def loaded_until(self) -> datetime:
+        """End of the range that is loaded, or being loaded on the next sync."""
+        return self.windows[-1].end
+
+    def reset(self):
+        """Forget everything and start again from just the near window of today."""
+        self.index.clear()
+        self.windows = self._windows_from(self.today(), 1)
+        self.updated_min = None  # watermark for the next delta query
+        self.collection_etag = None
+
+    def attach_store(self, store):
+        """Show the near window from `store` straight away and persist changes to it from now on."""
+        self.store = store
+        self.index.clear()
+        near = self.windows[0]
+        for event in store.events_between(near.start, near.end, calendar_id=self.calendar_id):
+            self.index.add(event)
+
+    def request_more(self) -> bool:
+        """Load the next window on the next sync. Does nothing while a requested window is still loading."""
+        if any(window.loaded_at is None for window in self.windows):
+            return False
+        last = self.windows[-1]
+        self.windows.append(EventWindow(last.end, last.end + timedelta(days=self.window_days)))
+        return True
+
+    def invalidate(self, when: datetime = None):
+        """Re-list the window holding `when` (every window if None) on the next sync."""
+        for window in self.windows:
+            if when is None or window.holds(when):
+                window.invalidate()
+
+    def take_later_changes(self) -> list:
+        """Events from the delta polls that are cancelled or past the loaded windows, oldest first."""
+        taken = []
+        while True:
+            try:
+                taken.append(self.later_changes.popleft())
+            except IndexError:
+                return taken
+
+    def sync(self, service):
+        """
+        List any window that needs it, then apply what changed elsewhere since
+        the last poll. Returns `{"added": [...], "updated": [...], "removed": [...]}`.
+        """
+        changes = _empty_changes()
+        self._follow_today(changes)
+        polled_before = self.updated_min is not None
+        now = self.clock()
+        for window in self.windows:
+            if window.loaded_at is None or now - window.loaded_at >= self.ttl:
+                self._load(service, window, changes)
+                window.loaded_at = now
+        if polled_before:
+            self._poll_changes(service, changes)
+        self._persist(changes)
+        return changes
+
+    def _windows_from(self, start, count):
+        days = timedelta(days=self.window_days)
+        return [EventWindow(start + i * days, start + (i + 1) * days) for i in range(count)]
+
+    def _follow_today(self, changes):
+        """After midnight, start the windows at the new today and drop the days that have passed."""
+        today = self.today()
+        if today.date() == self.windows[0].start.date():
+            return
+        # All of them are listed again on this sync; the delta watermark carries on
+        self.windows = self._windows_from(today, len(self.windows))
+        for event_id, event in list(self.events.items()):
+            if self._window_for(event) is None:
+                self.index.remove(event_id)
+                changes["removed"].append(event_id)
+
+    def upcoming_events(self, since=None):
+        """Loaded events ending at or after `since` (default: now), in start-time order."""
+        since = since or datetime.now().astimezone()
+        upcoming = []
+        for event in self.events.values():
+            start = parse_event_time(event.get('start'))
+            end = parse_event_time(event.get('end')) or start
+            if start is not None and end >= since:
+                upcoming.append((start, event))
+        upcoming.sort(key=lambda pair: pair[0])
+        return [event for _, event in upcoming]
+
+    def _load(self, service, window, changes):
+        # If the response has no `updated`, changes are asked for from a little before the listing
+        listed_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+        items, updated, etag = self._fetch(
+            service, timeMin=_rfc3339(window.start), timeMax=_rfc3339(window.end), orderBy='startTime'
+        )
+        if self.updated_min is None:
+            self.updated_min, self.collection_etag = updated or _rfc3339(listed_at), etag
+        listed = set()
+        for event in items:
+            if self._window_for(event) is window:
+                listed.add(event['id'])
+                self._apply(event, changes)
+        for event_id, event in list(self.events.items()):
+            if event_id not in listed and self._window_for(event) is window:
+                self.index.remove(event_id)
+                changes["removed"].append(event_id)
+
+    def _poll_changes(self, service, changes):
+        try:
+            items, updated, etag = self._fetch(service, updatedMin=self.updated_min, showDeleted=True)
+        except HttpError as e:
+            if getattr(e.resp, 'status', None) != 410:
+                raise
+            print("♻️ Change window expired, re-listing the loaded dates")
+            self.updated_min = None
+            self.invalidate()
+            return
+        unchanged = not items and etag is not None and etag == self.collection_etag
+        self.collection_etag = etag
+        self.updated_min = updated or self.updated_min
+        if unchanged:
+            return
+        for event in items:
+            if event.get('status') != 'cancelled' and self._window_for(event) is None:
+                # Moved (or always was) outside what we show
+                if self.index.remove(event['id']) is not None:
+                    changes["removed"].append(event['id'])
+                self.later_changes.append(event)
+            else:
+                if event.get('status') == 'cancelled':
+                    self.later_changes.append(event)
+                self._apply(event, changes)
+
+    def _fetch(self, service, **params):
+        """Follow every page of an events().list call; returns (items, calendar `updated`, collection etag)."""
+        items = []
+        page_token = None
+        while True:
+            response = api_limiter.execute(service.events().list(
+                calendarId=self.calendar_id,
+                maxResults=self.page_size,
+                singleEvents=True,
+                pageToken=page_token,
+                fields=_list_fields(self.fields, 'nextPageToken', 'updated', 'etag'),
+                **params
+            ), "list")
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items, response.get('updated'), response.get('etag')
+
+    def _window_for(self, event):
+        """The loaded window an event belongs to: the one holding its start (anything still running counts as today)."""
+        start = parse_event_time(event.get('start'))
+        if start is None:
+            return None
+        first = self.windows[0]
+        if start < first.start:
+            end = parse_event_time(event.get('end')) or start
+            return first if end > first.start else None
+        for window in self.windows:
+            if window.holds(start):
+                return window
+        return None
+
+    def _apply(self, event, changes):
+        event_id = event['id']
+        if event.get('status') == 'cancelled':
+            if self.index.remove(event_id) is not None:
+                changes["removed"].append(event_id)
+            return
+        old = self.events.get(event_id)
+        if old is None:
+            changes["added"].append(event_id)
+        elif old.get('updated') != event.get('updated') or old.get('etag') != event.get('etag'):
+            changes["updated"].append(event_id)
+        else:
+            return
+        self.index.add(event)
+
+    def _persist(self, changes):
+        if self.store is None or not any(changes.values()):
+            return
+        self.store.apply(
+            upserts=[self.events[i] for i in changes["added"] + changes["updated"]],
+            deletes=changes["removed"],
+            calendar_id=self.calendar_id
+        )
@@ -0,0 +1,56 @@
+import threading
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.http import build_http
+
+
+class ThreadLocalHttp:
+    """
+    httplib2-style transport for `build(..., http=...)` that is safe to share
+    between threads.
+
+    `httplib2.Http` keeps its connections open between requests (keep-alive),
+    so reusing one skips the TCP and TLS handshakes, but it must not be used
+    by two threads at once. This hands every thread its own `Http`, created
+    on first use and kept for the thread's lifetime: the IO worker, import
+    workers and the Tk thread each get one persistent connection per host.
+
+    With `credentials`, each connection is wrapped in `AuthorizedHttp` so
+    requests are signed and refreshed on 401. `http_factory` builds the
+    underlying `Http` (default: googleapiclient's `build_http()`).
+    """
+
+    def __init__(self, credentials=None, http_factory=build_http):
+        self.credentials = credentials
+        self.http_factory = http_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []  # every Http handed out, so close() can reach them
+        self.transports_created = 0
+
+    def http(self) -> httplib2.Http:
+        """This thread's transport."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self.http_factory()
+            if self.credentials is not None:
+                http = AuthorizedHttp(self.credentials, http=http)
+            self._local.http = http
+            with self._lock:
+                self._all.append(http)
+                self.transports_created += 1
+        return http
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=httplib2.DEFAULT_MAX_REDIRECTS,
+                connection_type=None):
+        return self.http().request(uri, method, body=body, headers=headers, redirections=redirections,
+                                   connection_type=connection_type)
+
+    def close(self):
+        """Close every thread's connections; threads reopen them on their next request."""
+        with self._lock:
+            transports, self._all = self._all, []
+        self._local = threading.local()
+        for http in transports:
+            http.close()
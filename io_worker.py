@@ -0,0 +1,97 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class IOWorker:
+    """
+    Runs blocking Calendar calls on a background thread and hands the results
+    back to the UI thread.
+
+    `submit()` returns immediately. When the job finishes, its `on_done` (or
+    `on_error`) callback is queued instead of being called directly, and only
+    runs when the UI thread calls `drain()` -- so every widget update still
+    happens on the Tk thread.
+
+    The default of one worker thread runs the app's jobs (syncs, op log
+    flushes, backups) one at a time. That does not make them the only
+    thread touching calendar state: a sync runs every calendar on its own
+    pool, each thread with its own HTTP connection, and a calendar that is
+    still syncing when the sync job returns keeps updating its `EventIndex`
+    while later jobs run (the index locks its updates and lookups).
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="calendar-io")
+        self._results = queue.Queue()
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Jobs submitted whose callbacks have not run yet."""
+        return len(self._outstanding()) + self._results.qsize()
+
+    def submit(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        """Run `fn(*args, **kwargs)` in the background."""
+        def run():
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._results.put((on_error, e, False))
+            else:
+                self._results.put((on_done, result, True))
+
+        future = self._executor.submit(run)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _outstanding(self):
+        with self._lock:
+            return list(self._futures)
+
+    def drain(self, budget: float = 0.008) -> int:
+        """
+        Run queued callbacks on the calling thread. Stops once `budget` seconds
+        have been spent so a burst of results can't stall the UI; whatever is
+        left is picked up by the next call. Returns how many callbacks ran.
+        """
+        deadline = time.perf_counter() + budget
+        handled = 0
+        while True:
+            try:
+                callback, value, ok = self._results.get_nowait()
+            except queue.Empty:
+                break
+            handled += 1
+            try:
+                if callback:
+                    callback(value)
+                elif not ok:
+                    print("⚠️ Background task failed:", value)
+            except Exception as e:
+                print("⚠️ Error in background task callback:", e)
+            if time.perf_counter() >= deadline:
+                break
+        return handled
+
+    def flush(self, timeout: float = None) -> int:
+        """Wait for every submitted job and run all of their callbacks."""
+        handled = 0
+        while self._outstanding() or not self._results.empty():
+            wait(self._outstanding(), timeout=timeout)
+            handled += self.drain(budget=float('inf'))
+            if timeout is not None and self._outstanding():
+                break
+        return handled
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work; queued jobs that haven't started are dropped."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PREFIX = 'task_scheduler_'
+# Histogram buckets for span durations, in seconds
+SPAN_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Spans kept for the trace file; older ones are dropped first
+MAX_TRACE_EVENTS = 100_000
+METRICS_HOST = '127.0.0.1'
+
+
+class _NoSpan:
+    """What `span()` returns while metrics are off: one shared object that does nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics._finish(self.name, self.labels, self.start, time.perf_counter(), exc_type is not None)
+        return False
+
+
+class Metrics:
+    """
+    Timing spans and counters for the hot paths, exported as Prometheus text
+    and as a Chrome/Perfetto JSON trace.
+
+    Off by default. While off, `span()` returns a shared no-op context manager
+    and `count()` returns straight away, so instrumented code pays one
+    attribute check. Once `enable()`d, every span adds to a
+    `span_seconds{span=...}` histogram (and `span_errors_total` if it raised)
+    and, with `trace=True`, is kept as a trace event.
+
+    Counters that other modules already keep (API calls, bytes, retries,
+    cache hits) are not duplicated: a collector registered with
+    `add_collector(fn)` reports them when metrics are exported. `fn()`
+    yields `(name, "counter" or "gauge", labels, value)`.
+    """
+
+    def __init__(self, buckets=SPAN_BUCKETS, max_trace_events: int = MAX_TRACE_EVENTS):
+        self.enabled = False
+        self.tracing = False
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (span name, labels) -> [count per bucket..., +Inf count, sum]
+        self._trace = deque(maxlen=max_trace_events)
+        self._collectors = []
+        self._origin = time.perf_counter()
+
+    def enable(self, trace: bool = False):
+        self.tracing = trace
+        self.enabled = True
+        return self
+
+    def disable(self):
+        self.enabled = False
+        self.tracing = False
+
+    def reset(self):
+        """Drop everything recorded so far (used by tests)."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._trace.clear()
+
+    def span(self, name: str, **labels):
+        """`with metrics.span("backup_write"): ...` times the block."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, labels)
+
+    def count(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def _finish(self, name, labels, start, end, failed):
+        seconds = end - start
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[len(self.buckets)] += 1
+            histogram[-1] += seconds
+            if failed:
+                error_key = ("span_errors", (("span", name),) + key[1])
+                self._counters[error_key] = self._counters.get(error_key, 0) + 1
+            if self.tracing:
+                self._trace.append({
+                    "name": name, "cat": "span", "ph": "X",
+                    "ts": (start - self._origin) * 1e6, "dur": seconds * 1e6,
+                    "pid": os.getpid(), "tid": threading.get_ident(), "args": labels
+                })
+
+    def snapshot(self) -> dict:
+        """`{"counters": {...}, "spans": {...}}` keyed by `name{labels}`; spans as count, total and mean seconds."""
+        with self._lock:
+            counters = {_series(name, labels): value for (name, labels), value in self._counters.items()}
+            histograms = {key: list(h) for key, h in self._histograms.items()}
+        for name, _, labels, value in self._collected():
+            counters[_series(name, _label_key(labels))] = value
+        spans = {}
+        for (name, labels), histogram in histograms.items():
+            count = sum(histogram[:-1])
+            spans[_series(name, labels)] = {"count": count, "seconds": histogram[-1],
+                                            "mean": histogram[-1] / count if count else 0.0}
+        return {"counters": counters, "spans": spans}
+
+    def _collected(self):
+        for collector in list(self._collectors):
+            try:
+                yield from collector()
+            except Exception as e:
+                print("⚠️ Metrics collector failed:", e)
+
+    # --- Export ---
+
+    def to_prometheus(self) -> str:
+        """Everything in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(h) for key, h in self._histograms.items()}
+        families = {}  # metric name -> (type, [(labels, value)])
+        for (name, labels), value in counters.items():
+            families.setdefault(f"{METRICS_PREFIX}{name}_total", ("counter", []))[1].append((labels, value))
+        for name, kind, labels, value in self._collected():
+            metric = f"{METRICS_PREFIX}{name}" + ("_total" if kind == "counter" else "")
+            families.setdefault(metric, (kind, []))[1].append((_label_key(labels), value))
+
+        lines = []
+        for metric in sorted(families):
+            kind, samples = families[metric]
+            lines.append(f"# TYPE {metric} {kind}")
+            lines += [f"{metric}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+        if histograms:
+            metric = f"{METRICS_PREFIX}span_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (name, labels), histogram in sorted(histograms.items()):
+                labels = (("span", name),) + labels
+                cumulative = 0
+                for bound, n in zip(self.buckets + ("+Inf",), histogram[:-1]):
+                    cumulative += n
+                    lines.append(f"{metric}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(histogram[-1])}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write `to_prometheus()` to `path` atomically, e.g. for node_exporter's textfile collector."""
+        _write_atomic(path, self.to_prometheus())
+
+    def trace_events(self) -> list:
+        with self._lock:
+            return list(self._trace)
+
+    def write_trace(self, path: str):
+        """Write the kept spans as a JSON trace (open in Perfetto or chrome://tracing)."""
+        _write_atomic(path, json.dumps({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}))
+
+    def serve(self, port: int, host: str = METRICS_HOST):
+        """Serve `GET /metrics` on a background thread. Returns the server; `shutdown()` it to stop."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _series(name, labels):
+    return name + _format_labels(labels)
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Process-wide instance the app's modules record to. Off until `metrics.enable()`.
+metrics = Metrics()
@@ -0,0 +1,166 @@
+import heapq
+import threading
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from calendar_utils import CALENDAR_IDS, CalendarSync, iter_events, parse_event_time
+
+MAX_CALENDAR_WORKERS = 4
+_NO_START = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def event_start(event: dict) -> datetime:
+    """Sort key for events: aware start time, events without one last."""
+    return parse_event_time(event.get('start')) or _NO_START
+
+
+def merge_by_start(streams):
+    """
+    K-way merge of `(calendar_id, event)` streams that are each already in
+    start-time order, without re-sorting everything.
+    """
+    return heapq.merge(*streams, key=lambda pair: event_start(pair[1]))
+
+
+def list_calendars_events(service, calendar_ids=CALENDAR_IDS, max_workers: int = MAX_CALENDAR_WORKERS, **list_options):
+    """
+    Upcoming events from several calendars, listed concurrently, as one list
+    of `(calendar_id, event)` in start-time order. `list_options` go to
+    `iter_events` (`time_min`, `time_max`, `fields`, `page_size`). A calendar
+    that fails is left out rather than failing the rest.
+    """
+    def fetch(calendar_id):
+        return [(calendar_id, event) for event in iter_events(service, calendar_id=calendar_id, **list_options)]
+
+    streams = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calendar_ids)))) as executor:
+        futures = {executor.submit(fetch, calendar_id): calendar_id for calendar_id in calendar_ids}
+        for future, calendar_id in futures.items():
+            try:
+                streams.append(future.result())
+            except Exception as e:
+                print(f"❌ Could not list calendar {calendar_id}:", e)
+    return list(merge_by_start(streams))
+
+
+class MultiCalendarSync:
+    """
+    A `CalendarSync` (or `sync_factory(calendar_id, **sync_options)`, e.g. a
+    `WindowedSync`) per calendar, synced concurrently on a bounded pool.
+
+    Each calendar keeps its own sync state, collection etag and index.
+    `sync(service, timeout)` starts a sync of every calendar that isn't
+    already syncing and returns what finished within `timeout`; a slow
+    calendar keeps running in the background and its changes are returned
+    by a later call, so it never holds the others back. The service must be
+    safe to share between threads (see `get_calendar_service`).
+
+    The first calendar is the primary one: new tasks are created there.
+    """
+
+    def __init__(self, calendar_ids=CALENDAR_IDS, max_workers: int = MAX_CALENDAR_WORKERS, store=None,
+                 sync_factory=CalendarSync, **sync_options):
+        self.syncs = {calendar_id: sync_factory(calendar_id, **sync_options) for calendar_id in calendar_ids}
+        self.max_workers = max_workers
+        self._executor = None
+        self._in_flight = {}  # calendar id -> future
+        self._lock = threading.Lock()
+        if store is not None:
+            self.attach_store(store)
+
+    @property
+    def calendar_id(self) -> str:
+        """The primary calendar."""
+        return next(iter(self.syncs))
+
+    @property
+    def events(self):
+        """Event id -> event across all calendars (the primary calendar's copy wins)."""
+        return ChainMap(*(sync.events for sync in self.syncs.values()))
+
+    @property
+    def indexes(self) -> dict:
+        """Calendar id -> that calendar's `EventIndex`."""
+        return {calendar_id: sync.index for calendar_id, sync in self.syncs.items()}
+
+    @property
+    def store(self):
+        return self.syncs[self.calendar_id].store
+
+    def calendar_of(self, event_id: str) -> str:
+        """Calendar an event id was synced from; the primary calendar if none (e.g. a local task)."""
+        for calendar_id, sync in self.syncs.items():
+            if event_id in sync.events:
+                return calendar_id
+        return self.calendar_id
+
+    @property
+    def loaded_until(self):
+        """For windowed syncs, the end of the range every calendar has loaded; None when syncing everything."""
+        ends = [sync.loaded_until for sync in self.syncs.values() if hasattr(sync, "loaded_until")]
+        return min(ends) if ends else None
+
+    def request_more(self) -> bool:
+        """Have windowed syncs load their next window on the next sync. True if any will."""
+        requested = False
+        for sync in self.syncs.values():
+            if hasattr(sync, "request_more"):
+                requested = sync.request_more() or requested
+        return requested
+
+    def take_later_changes(self) -> list:
+        """For windowed syncs, the polled events past their loaded windows since the last call."""
+        taken = []
+        for sync in self.syncs.values():
+            if hasattr(sync, "take_later_changes"):
+                taken.extend(sync.take_later_changes())
+        return taken
+
+    def attach_store(self, store):
+        for sync in self.syncs.values():
+            sync.attach_store(store)
+
+    def reset(self):
+        for sync in self.syncs.values():
+            sync.reset()
+
+    def sync(self, service, timeout: float = None) -> dict:
+        """
+        Sync all calendars, waiting up to `timeout` seconds (None: until all
+        are done). Returns `{"changes": {calendar_id: changes}, "errors":
+        {calendar_id: exception}}` for the calendars that finished.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="calendar-sync")
+            for calendar_id, sync in self.syncs.items():
+                if calendar_id not in self._in_flight:
+                    self._in_flight[calendar_id] = self._executor.submit(sync.sync, service)
+            futures = dict(self._in_flight)
+        wait(futures.values(), timeout=timeout)
+
+        result = {"changes": {}, "errors": {}}
+        with self._lock:
+            for calendar_id, future in futures.items():
+                if not future.done():
+                    continue
+                del self._in_flight[calendar_id]
+                try:
+                    result["changes"][calendar_id] = future.result()
+                except Exception as e:
+                    result["errors"][calendar_id] = e
+        return result
+
+    def upcoming_events(self, since=None):
+        """`(calendar_id, event)` for events ending at or after `since`, merged across calendars in start order."""
+        return list(merge_by_start(
+            [(calendar_id, event) for event in sync.upcoming_events(since)] for calendar_id, sync in self.syncs.items()
+        ))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._in_flight.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
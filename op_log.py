@@ -0,0 +1,303 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from googleapiclient.errors import HttpError
+
+from calendar_utils import (
+    CALENDAR_ID, create_event, delete_tasks, invalidate_calendar_service, is_auth_error, is_rate_limit_error
+)
+
+OPLOG_PATH = 'pending_ops.jsonl'
+BACKOFF_BASE = 2.0  # seconds before the first retry
+BACKOFF_MAX = 300.0
+
+
+def new_event_id() -> str:
+    """
+    Client-generated event id. Calendar ids are base32hex (0-9, a-v), which
+    uuid hex is a subset of, so a create can be retried without duplicating.
+    """
+    return uuid.uuid4().hex
+
+
+def is_transient(exc) -> bool:
+    """True for failures worth retrying: network errors, rate limits, 5xx and expired auth."""
+    if is_auth_error(exc):
+        return True
+    if is_rate_limit_error(exc):
+        return True
+    if isinstance(exc, HttpError):
+        status = getattr(exc.resp, 'status', None)
+        return status == 408 or (status or 0) >= 500
+    return True  # socket errors, timeouts, no connection...
+
+
+def _status_is_transient(status) -> bool:
+    return status is None or status in (401, 408, 429) or status >= 500
+
+
+def _empty_result():
+    return {"created": [], "deleted": [], "dropped": [], "error": None}
+
+
+class OpLog:
+    """
+    Write-ahead log of calendar writes that have not reached Google yet.
+
+    The UI records a create or delete here and updates its own state at once;
+    `replay()` (on the I/O worker) sends the queued operations in order. Each
+    operation is appended to a JSONL file and fsynced before it is acted on,
+    and acknowledged with a `done` record afterwards, so nothing is lost if the
+    app closes while offline. The file is truncated whenever the queue empties.
+
+    - Creates carry a client-generated event id, so a create that reached the
+      server but whose response was lost just gets a 409 on retry.
+    - Deleting an event whose create hasn't been sent yet drops both.
+    - Transient failures stop the replay and back off exponentially (with
+      jitter, capped at `BACKOFF_MAX`); permanent ones drop the operation.
+
+    Without a `path` the log is memory-only.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = None
+        self._lock = threading.Lock()
+        self._ops = []
+        self._next_seq = 1
+        self._in_flight = set()
+        self.attempts = 0
+        self.next_attempt = 0.0
+        if path:
+            self.attach(path)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ops)
+
+    def attach(self, path: str):
+        """Start persisting to `path`, picking up whatever an earlier run left there."""
+        with self._lock:
+            stored = _read_log(path)
+            known = {self._identity(op) for op in self._ops}
+            for op in stored:
+                if self._identity(op) not in known:
+                    self._ops.append(op)
+            for op in self._ops:
+                op["seq"] = self._next_seq
+                self._next_seq += 1
+            self.path = path
+            self._rewrite()
+
+    def clear(self):
+        with self._lock:
+            self._ops = []
+            self._in_flight.clear()
+            self.attempts = 0
+            self.next_attempt = 0.0
+            self._rewrite()
+
+    def pending(self):
+        with self._lock:
+            return [dict(op) for op in self._ops]
+
+    def pending_creates(self):
+        """Bodies of events created locally but not confirmed by the server yet."""
+        return [op["body"] for op in self.pending() if op["op"] == "create"]
+
+    def pending_delete_ids(self):
+        return {op["target"] for op in self.pending() if op["op"] == "delete" and isinstance(op["target"], str)}
+
+    def due(self, now: float = None) -> bool:
+        """True if there is something to send and we are not backing off."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return bool(self._ops) and now >= self.next_attempt
+
+    def record_create(self, body: dict, calendar_id: str = CALENDAR_ID) -> dict:
+        """Queue an insert. Gives `body` an id if it has none and returns it."""
+        body = dict(body)
+        body.setdefault("id", new_event_id())
+        self._append({"op": "create", "calendar_id": calendar_id, "body": body})
+        return body
+
+    def record_delete(self, target, calendar_id: str = CALENDAR_ID) -> bool:
+        """
+        Queue a delete of an event id or a `(title, start)` pair.
+        Returns False if nothing needs sending: the event's create was still
+        queued (both are dropped) or the same delete is already queued.
+        """
+        target = target if isinstance(target, str) else list(target)  # as it reads back from JSON
+        with self._lock:
+            for op in self._ops:
+                if op["calendar_id"] != calendar_id or op["seq"] in self._in_flight:
+                    continue
+                if op["op"] == "create" and op["body"]["id"] == target:
+                    self._ops.remove(op)
+                    self._write_lines([{"op": "done", "seq": op["seq"]}])
+                    self._compact_if_empty()
+                    return False
+                if op["op"] == "delete" and op["target"] == target:
+                    return False
+        self._append({"op": "delete", "calendar_id": calendar_id, "target": target})
+        return True
+
+    def backoff(self, error=None, now: float = None):
+        """Push the next replay back exponentially after a failed attempt."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.attempts += 1
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.attempts - 1))
+            self.next_attempt = now + delay * random.uniform(0.5, 1.0)
+        if is_auth_error(error):
+            invalidate_calendar_service()
+        print(f"📴 {len(self)} calendar change(s) queued, retrying in {self.next_attempt - now:.0f}s:", error)
+
+    def replay(self, service, index=None):
+        """
+        Send queued operations in order. Runs consecutive deletes as one batch.
+        `index` (an `EventIndex`, or a dict of them by calendar id) resolves
+        deletes queued by title and start time.
+        Returns `{"created": [bodies], "deleted": [targets],
+        "dropped": [(op, error)], "error": transient error or None}`.
+        """
+        result = _empty_result()
+        with self._lock:
+            ops = [dict(op) for op in self._ops]
+            self._in_flight = {op["seq"] for op in ops}
+        try:
+            i = 0
+            while i < len(ops):
+                op = ops[i]
+                if op["op"] == "create":
+                    done, error = self._replay_create(service, op, result)
+                    i += 1
+                else:
+                    group = [op]
+                    while i + len(group) < len(ops) and ops[i + len(group)]["op"] == "delete" \
+                            and ops[i + len(group)]["calendar_id"] == op["calendar_id"]:
+                        group.append(ops[i + len(group)])
+                    done, error = self._replay_deletes(service, group, index, result)
+                    i += len(group)
+                if not done:
+                    result["error"] = error
+                    break
+        finally:
+            with self._lock:
+                self._in_flight = set()
+
+        if result["error"] is not None:
+            self.backoff(result["error"])
+        else:
+            with self._lock:
+                self.attempts = 0
+                self.next_attempt = 0.0
+        return result
+
+    def _replay_create(self, service, op, result):
+        try:
+            created = create_event(service, op["body"], calendar_id=op["calendar_id"])
+        except HttpError as e:
+            if getattr(e.resp, 'status', None) == 409:  # an earlier attempt got through
+                created = op["body"]
+            elif is_transient(e):
+                return False, e
+            else:
+                result["dropped"].append((op, e))
+                self._ack([op])
+                return True, None
+        except Exception as e:
+            return False, e
+        result["created"].append(created or op["body"])
+        self._ack([op])
+        return True, None
+
+    def _replay_deletes(self, service, group, index, result):
+        targets = [op["target"] if isinstance(op["target"], str) else tuple(op["target"]) for op in group]
+        try:
+            calendar_id = group[0]["calendar_id"]
+            if isinstance(index, dict):
+                index = index.get(calendar_id)
+            outcomes = delete_tasks(service, targets, index=index, calendar_id=calendar_id)
+        except Exception as e:
+            return False, e
+        finished, error = [], None
+        for op, outcome in zip(group, outcomes):
+            if outcome["ok"]:
+                result["deleted"].append(outcome["target"])
+                finished.append(op)
+            elif _status_is_transient(outcome.get("status")) and outcome["error"] != "no matching event":
+                error = error or RuntimeError(outcome["error"])
+            else:
+                result["dropped"].append((op, outcome["error"]))
+                finished.append(op)
+        self._ack(finished)
+        return error is None, error
+
+    def _append(self, op):
+        with self._lock:
+            op = dict(op, seq=self._next_seq)
+            self._next_seq += 1
+            self._write_lines([op])
+            self._ops.append(op)
+
+    def _ack(self, ops):
+        if not ops:
+            return
+        seqs = {op["seq"] for op in ops}
+        with self._lock:
+            self._ops = [op for op in self._ops if op["seq"] not in seqs]
+            self._write_lines([{"op": "done", "seq": seq} for seq in sorted(seqs)])
+            self._compact_if_empty()
+
+    def _compact_if_empty(self):
+        if not self._ops:
+            self._rewrite()
+
+    def _rewrite(self):
+        """Replace the file with just the pending operations (atomically)."""
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for op in self._ops:
+                f.write(json.dumps(op) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _write_lines(self, records):
+        if not self.path:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _identity(op):
+        key = op["body"]["id"] if op["op"] == "create" else op["target"]
+        return op["op"], op["calendar_id"], json.dumps(key)
+
+
+def _read_log(path):
+    """Pending operations in a log file: every operation without a later `done`."""
+    ops = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash mid-write
+                if record.get("op") == "done":
+                    ops.pop(record.get("seq"), None)
+                elif record.get("op") in ("create", "delete"):
+                    ops[record["seq"]] = record
+    except FileNotFoundError:
+        pass
+    return [ops[seq] for seq in sorted(ops)]
@@ -0,0 +1,87 @@
+import time
+from collections import deque
+
+PERF_OVERLAY_CYCLES = 30  # refresh cycles the overlay summarizes
+LAG_PROBE_MS = 100  # how often the event-loop lag probe is scheduled while the overlay is shown
+LAG_SAMPLES = 50
+# A refresh cycle: pull changes from Google, turn them into Tasks, fold them into the task map, re-render the list
+REFRESH_PHASES = ("fetch", "parse", "diff", "render")
+
+
+class RefreshTimings:
+    """Seconds spent in each of `REFRESH_PHASES` for the last `size` refresh cycles."""
+
+    def __init__(self, size: int = PERF_OVERLAY_CYCLES):
+        self.cycles = deque(maxlen=size)
+
+    def record(self, **seconds):
+        """Add one cycle, e.g. `record(fetch=0.2, parse=0.01, diff=0.0, render=0.0)`; missing phases took 0."""
+        cycle = {phase: seconds.get(phase, 0.0) for phase in REFRESH_PHASES}
+        cycle["total"] = sum(cycle.values())
+        self.cycles.append(cycle)
+
+    def summary(self) -> dict:
+        """`{phase: (mean, p95, max)}` in seconds for every phase and the "total", or {} before the first cycle."""
+        if not self.cycles:
+            return {}
+        return {phase: _summarize([cycle[phase] for cycle in self.cycles]) for phase in REFRESH_PHASES + ("total",)}
+
+
+class LoopLagProbe:
+    """
+    How late Tk runs an `after` callback: call `scheduled(delay_ms)` when
+    scheduling it and `fired()` from the callback. A busy Tk thread (a long
+    render, a blocking call) shows up as lag.
+    """
+
+    def __init__(self, size: int = LAG_SAMPLES, clock=time.perf_counter):
+        self.clock = clock
+        self.samples = deque(maxlen=size)
+        self._due = None
+
+    def scheduled(self, delay_ms: int = LAG_PROBE_MS):
+        self._due = self.clock() + delay_ms / 1000
+
+    def fired(self):
+        if self._due is None:
+            return
+        self.samples.append(max(0.0, self.clock() - self._due))
+        self._due = None
+
+    def summary(self):
+        """`(mean, p95, max)` lag in seconds, or None before the first sample."""
+        return _summarize(list(self.samples)) if self.samples else None
+
+
+def count_widgets(root) -> int:
+    """`root` and every widget below it."""
+    count, stack = 0, [root]
+    while stack:
+        widget = stack.pop()
+        count += 1
+        stack.extend(widget.winfo_children())
+    return count
+
+
+def format_overlay(timings: RefreshTimings, lag: LoopLagProbe, widgets: int, row_widgets: int = None) -> str:
+    """The overlay text: per-phase refresh times in ms, then event-loop lag and live widget count."""
+    lines = [f"{'last ' + str(len(timings.cycles)) + ' refreshes':<16}{'mean':>7}{'p95':>7}{'max':>7}"]
+    summary = timings.summary()
+    for phase, stats in summary.items():
+        lines.append(f"{phase:<16}" + "".join(f"{seconds * 1000:7.1f}" for seconds in stats))
+    if not summary:
+        lines.append("(waiting for a sync)")
+    lag_stats = lag.summary()
+    if lag_stats:
+        lines.append(f"{'loop lag':<16}" + "".join(f"{seconds * 1000:7.1f}" for seconds in lag_stats))
+    widget_line = f"widgets: {widgets}"
+    if row_widgets is not None:
+        widget_line += f" ({row_widgets} list rows)"
+    lines.append(widget_line)
+    return "\n".join(lines)
+
+
+def _summarize(values):
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return sum(ordered) / len(ordered), p95, ordered[-1]
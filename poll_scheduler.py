@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+
+from calendar_utils import is_rate_limit_error
+
+POLL_MIN_INTERVAL = 5.0  # seconds
+POLL_MAX_INTERVAL = 300.0
+IDLE_BACKOFF = 1.5  # growth per poll that finds nothing new
+ERROR_BACKOFF = 2.0
+RATE_LIMIT_FLOOR = 60.0  # never retry sooner than this after a 403/429
+UNFOCUSED_FACTOR = 4  # poll this much less often while the window is in the background
+JITTER = 0.1  # +-10%, so several clients on one calendar drift apart
+
+
+class PollScheduler:
+    """
+    Decides when the next calendar sync should run.
+
+    The interval starts at `min_interval`, grows by `IDLE_BACKOFF` for every
+    poll that finds nothing new and by `ERROR_BACKOFF` on errors (at least
+    `RATE_LIMIT_FLOOR` on rate limits), up to `max_interval`. A change, a
+    local edit or a push notification (`wake()`) brings it straight back to
+    the minimum. While the window is unfocused the interval is stretched by
+    `UNFOCUSED_FACTOR`; while it is minimized, or when push notifications
+    are active, only the `max_interval` safety-net poll runs.
+
+    `wake()` may be called from any thread (e.g. a webhook receiver).
+    """
+
+    def __init__(self, min_interval: float = POLL_MIN_INTERVAL, max_interval: float = POLL_MAX_INTERVAL,
+                 clock=time.monotonic):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+        self.interval = min_interval
+        self.focused = True
+        self.visible = True
+        self.push_active = False
+        self._lock = threading.Lock()
+        self._next_poll = clock()  # poll straight away on start
+
+    def delay(self) -> float:
+        """Seconds to wait after a poll, given the current interval and window state."""
+        if not self.visible or self.push_active:
+            return self.max_interval
+        delay = self.interval if self.focused else self.interval * UNFOCUSED_FACTOR
+        return min(self.max_interval, delay)
+
+    def due(self) -> bool:
+        with self._lock:
+            return self.clock() >= self._next_poll
+
+    def seconds_until_due(self) -> float:
+        with self._lock:
+            return max(0.0, self._next_poll - self.clock())
+
+    def record_result(self, changed: bool):
+        """A sync finished; `changed` says whether it found anything."""
+        with self._lock:
+            if changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * IDLE_BACKOFF)
+            self._schedule()
+
+    def record_error(self, error=None):
+        with self._lock:
+            self.interval = min(self.max_interval, self.interval * ERROR_BACKOFF)
+            if is_rate_limit_error(error):
+                self.interval = max(self.interval, min(self.max_interval, RATE_LIMIT_FLOOR))
+            self._schedule()
+
+    def wake(self):
+        """Something probably changed (local edit, focus, push): poll now and poll often again."""
+        with self._lock:
+            self.interval = self.min_interval
+            self._next_poll = self.clock()
+
+    def set_focused(self, focused: bool):
+        with self._lock:
+            was_focused, self.focused = self.focused, focused
+        if focused and not was_focused:
+            self.wake()
+
+    def set_visible(self, visible: bool):
+        with self._lock:
+            was_visible, self.visible = self.visible, visible
+        if visible and not was_visible:
+            self.wake()
+
+    def _schedule(self):
+        delay = self.delay()
+        self._next_poll = self.clock() + delay * random.uniform(1 - JITTER, 1 + JITTER)
@@ -0,0 +1,264 @@
+import json
+import threading
+import time
+from datetime import datetime
+
+from calendar_utils import CALENDAR_IDS, DEFAULT_TIMEZONE, get_calendar_service, has_changes
+from event_store import EventStore, STORE_PATH
+from event_windows import WindowedSync
+from metrics import metrics
+from multi_calendar import MultiCalendarSync
+from op_log import OpLog, OPLOG_PATH
+from task_backup import TaskBackup, BACKUP_PATH, JOURNAL_PATH, load_journal
+from task_model import Task
+
+# Each calendar only keeps the next SYNC_WINDOW_DAYS current, plus further windows once asked for
+SYNC_WINDOW_DAYS = 14
+CALENDAR_SYNC_WAIT = 10  # seconds a poll waits for slow calendars before moving on
+# task_data.json is written from tasks_by_id. With USE_BACKUP_JOURNAL each change only appends to task_data.jsonl instead.
+USE_BACKUP_JOURNAL = False
+
+
+def event_to_task(e):
+    """Convert a Calendar event into a `Task`, or None if it has no title or start time."""
+    return Task.from_event(e)
+
+
+def task_backup_entry(task):
+    """A task as `(date, {"task", "time", "duration"})`, the shape task_data.json stores."""
+    return task.start.date().isoformat(), {
+        "task": task.title,
+        "time": task.start.strftime("%H:%M"),
+        "duration": task.duration_label
+    }
+
+
+class SchedulerCore:
+    """
+    The task scheduler without a window: the tasks, their calendar syncs, the
+    local event store, the op log of unsent changes and the backup.
+
+    Importing this needs neither Tk nor the Google discovery client, and
+    nothing here touches the network until `sync()` or `flush_pending_ops()`
+    is called, so scripts and tests can drive the scheduler directly. The
+    GUI is a view over one of these: it calls the network methods on its I/O
+    worker and renders `visible_tasks()`.
+
+    `service_factory` returns the Calendar service (default:
+    `get_calendar_service`). With `window_days=None` every calendar is synced
+    in full with sync tokens instead of in date windows.
+    """
+
+    def __init__(self, calendar_ids=CALENDAR_IDS, window_days: int = SYNC_WINDOW_DAYS, service_factory=None,
+                 backup_path: str = BACKUP_PATH, journal_path: str = JOURNAL_PATH if USE_BACKUP_JOURNAL else None):
+        self.service_factory = service_factory
+        self.tasks_by_id = {}  # event id -> Task, kept current by sync()/apply_changes()
+        # Creates/deletes go here first and reach Google from flush_pending_ops(), so they survive being offline
+        self.op_log = OpLog()
+        # One sync per calendar, run side by side; a slow calendar's changes arrive on a later sync
+        if window_days:
+            self.calendar_sync = MultiCalendarSync(calendar_ids, sync_factory=WindowedSync, window_days=window_days)
+        else:
+            self.calendar_sync = MultiCalendarSync(calendar_ids)
+        self.task_backup = TaskBackup(backup_path, journal_path=journal_path)
+        self.last_sync_timings = {}  # {"fetch": s, "parse": s} of the latest sync()
+        self._later_records = None  # backup entries for dates past the loaded windows; read from disk when first needed
+        self._later_lock = threading.Lock()
+
+    def service(self):
+        return (self.service_factory or get_calendar_service)()
+
+    # --- Local state ---
+
+    def load_pending_ops(self, path: str = OPLOG_PATH) -> bool:
+        """Persist the op log to disk, picking up changes a previous run couldn't send."""
+        try:
+            self.op_log.attach(path)
+        except OSError as e:
+            print("⚠️ Could not open pending changes log:", e)
+            return False
+        return True
+
+    def load_local_store(self, path: str = STORE_PATH) -> bool:
+        """
+        Open the on-disk event store and rebuild `tasks_by_id` from it, before
+        any network call. Later syncs then only reconcile what changed since
+        the last run. False if the store couldn't be opened.
+        """
+        try:
+            self.calendar_sync.attach_store(EventStore(path))
+        except Exception as e:
+            print("⚠️ Could not open local event store:", e)
+            return False
+        self.tasks_by_id.clear()
+        deleting = self.op_log.pending_delete_ids()
+        for event_id, event in self.calendar_sync.events.items():
+            task = event_to_task(event)
+            if task and event_id not in deleting:
+                self.tasks_by_id[event_id] = task
+        # Tasks added while offline last time are still waiting in the op log
+        for body in self.op_log.pending_creates():
+            task = event_to_task(body)
+            if task:
+                self.tasks_by_id[body["id"]] = task
+        return True
+
+    def visible_tasks(self, today=None):
+        """Tasks from today onward; today's earlier tasks stay so they can still be checked off."""
+        today = today or datetime.now().date()
+        return [t for t in self.tasks_by_id.values() if t.start.date() >= today]
+
+    def add_task(self, task: Task) -> Task:
+        """Queue `task` for the primary calendar and show it straight away. Returns it with its event id."""
+        # The id is generated here, so the task is final before Google has seen it
+        event_body = self.op_log.record_create(task.to_event_body(DEFAULT_TIMEZONE),
+                                               calendar_id=self.calendar_sync.calendar_id)
+        task = task.with_event_id(event_body["id"])
+        self.tasks_by_id[task.event_id] = task
+        return task
+
+    def delete_tasks(self, tasks):
+        """Stop showing `tasks` and queue their deletes."""
+        for task in tasks:
+            self.forget_task(task)
+            # Synced tasks already know their event id; only older local ones need a lookup
+            self.op_log.record_delete(task.event_id or (task.title, task.start.isoformat()[:16]),
+                                      calendar_id=self.calendar_sync.calendar_of(task.event_id))
+
+    def forget_task(self, task):
+        """Drop a task from the synced map so a re-render before the delete lands won't bring it back."""
+        if task.event_id and self.tasks_by_id.get(task.event_id) is task:
+            del self.tasks_by_id[task.event_id]
+
+    def backup_records(self) -> dict:
+        """Backup entries for the synced tasks (with windowed syncs, only the loaded dates)."""
+        return {event_id: task_backup_entry(task) for event_id, task in self.tasks_by_id.items()}
+
+    # --- Network (blocking; the GUI runs these on its I/O worker) ---
+
+    def sync(self, timeout: float = CALENDAR_SYNC_WAIT):
+        """
+        Pull only the events that changed since the last sync (compared by
+        etag) in every calendar, and parse just those. Returns None when
+        nothing changed, otherwise the change set for `apply_changes()`:
+        `{"added": {event_id: task or None}, "modified": {...}, "removed": [event_id, ...]}`.
+        A calendar that fails is reported and retried next time; only if all fail is it an error.
+        """
+        started = time.perf_counter()
+        with metrics.span("calendar_sync"):
+            synced = self.calendar_sync.sync(self.service(), timeout=timeout)
+        fetched = time.perf_counter()
+        self._update_later_records()
+        for calendar_id, error in synced["errors"].items():
+            print(f"Failed to sync calendar {calendar_id}:", error)
+        if synced["errors"] and not synced["changes"]:
+            raise next(iter(synced["errors"].values()))
+        events = self.calendar_sync.events
+        result = {"added": {}, "modified": {}, "removed": []}
+        with metrics.span("parse_events"):
+            for changes in synced["changes"].values():
+                if not has_changes(changes):
+                    continue
+                for event_id in changes["added"]:
+                    result["added"][event_id] = event_to_task(events[event_id])
+                for event_id in changes["updated"]:
+                    result["modified"][event_id] = event_to_task(events[event_id])
+                for event_id in changes["removed"]:
+                    if event_id in events:  # still on another calendar
+                        result["modified"][event_id] = event_to_task(events[event_id])
+                    else:
+                        result["removed"].append(event_id)
+        self.last_sync_timings = {"fetch": fetched - started, "parse": time.perf_counter() - fetched}
+        metrics.count("events_parsed", len(result["added"]) + len(result["modified"]))
+        if not any(result.values()):
+            return None
+        return result
+
+    def apply_changes(self, result) -> bool:
+        """Fold a `sync()` result into `tasks_by_id`. Returns True if anything changed."""
+        if not result:
+            return False
+        deleting = self.op_log.pending_delete_ids()
+        changed = False
+        for event_id in result["removed"]:
+            changed = self.tasks_by_id.pop(event_id, None) is not None or changed
+        for event_id, task in {**result["added"], **result["modified"]}.items():
+            if event_id in deleting:
+                continue  # deleted here, Google just hasn't been told yet
+            if task:
+                # Tasks carry the event's etag, so this is a cheap "did it change?"
+                if self.tasks_by_id.get(event_id) != task:
+                    self.tasks_by_id[event_id] = task
+                    changed = True
+            elif self.tasks_by_id.pop(event_id, None) is not None:
+                changed = True
+        return changed
+
+    def flush_pending_ops(self):
+        """Send everything queued in the op log. None if there was no service (the log backs off)."""
+        try:
+            service = self.service()
+        except Exception as e:
+            self.op_log.backoff(e)
+            return None
+        indexes = {calendar_id: index for calendar_id, index in self.calendar_sync.indexes.items() if len(index)}
+        with metrics.span("flush_pending_ops"):
+            return self.op_log.replay(service, index=indexes)
+
+    def later_backup_records(self) -> dict:
+        """
+        Backup entries for the dates after the loaded windows, which
+        `tasks_by_id` doesn't hold ({} when every calendar is synced in full).
+        They start as the entries already in the backup on disk and are kept
+        current from the changes the windowed syncs' delta polls see past
+        their windows, so the backup never lists those dates itself.
+        """
+        until = self.calendar_sync.loaded_until
+        if until is None:
+            return {}
+        first_later_date = until.date().isoformat()
+        self._update_later_records()
+        with self._later_lock:
+            return {key: entry for key, entry in self._later_records.items() if entry[0] >= first_later_date}
+
+    def _update_later_records(self):
+        """Fold the polled changes past the loaded windows into `_later_records`."""
+        until = self.calendar_sync.loaded_until
+        if until is None:
+            return
+        with self._later_lock:
+            if self._later_records is None:
+                self._later_records = self._saved_backup_records()
+            records = self._later_records
+            for event in self.calendar_sync.take_later_changes():
+                records.pop(event["id"], None)
+                task = event_to_task(event)
+                if task is None:
+                    continue
+                entry = task_backup_entry(task)
+                # Entries read back from task_data.json have no event id; this one replaces its copy
+                for key in [key for key, saved in records.items() if key.startswith("saved:") and saved == entry]:
+                    del records[key]
+                if event.get("status") != "cancelled" and entry[0] >= until.date().isoformat():
+                    records[event["id"]] = entry
+
+    def _saved_backup_records(self) -> dict:
+        """What the backup on disk holds, as `{key: (date, task)}`."""
+        if self.task_backup.journal_path:
+            return load_journal(self.task_backup.journal_path)
+        try:
+            with open(self.task_backup.path) as f:
+                by_date = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {f"saved:{date}:{i}": (date, task) for date, tasks in by_date.items() for i, task in enumerate(tasks)}
+
+    def save_backup(self, records: dict = None) -> int:
+        """Write the backup: `records` (default: `backup_records()`) plus the dates past the loaded windows."""
+        if records is None:
+            records = self.backup_records()
+        # A synced task wins over an older entry for the same event
+        return self.task_backup.save({**self.later_backup_records(), **records})
+
+    def shutdown(self):
+        self.calendar_sync.shutdown()
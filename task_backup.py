@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+
+from metrics import metrics
+
+BACKUP_PATH = 'task_data.json'
+JOURNAL_PATH = 'task_data.jsonl'
+# Compact the journal once it holds this many lines per live task (and at least COMPACT_MIN_LINES)
+COMPACT_RATIO = 2
+COMPACT_MIN_LINES = 200
+
+
+def write_json_atomic(path: str, data, **dump_kwargs):
+    """Write to a temp file and rename it over `path`, so a crash never leaves half a file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def group_by_date(records: dict) -> dict:
+    """`{id: (date, task)}` -> the task_data.json layout `{date: [task, ...]}`, in time order."""
+    by_date = {}
+    for date, task in sorted(records.values(), key=lambda r: (r[0], r[1]["time"] or "")):
+        by_date.setdefault(date, []).append(task)
+    return by_date
+
+
+def load_journal(path: str = JOURNAL_PATH) -> dict:
+    """Replay a journal into `{id: (date, task)}`. A torn last line is ignored."""
+    records = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("op") == "put":
+                    records[entry["id"]] = (entry["date"], entry["task"])
+                elif entry.get("op") == "del":
+                    records.pop(entry["id"], None)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+class TaskBackup:
+    """
+    Writes the local task backup from in-memory state, without going back to the API.
+
+    `save(records)` takes `{id: (date, task)}`, where `task` is the
+    `{"task", "time", "duration"}` dict stored in task_data.json, and does
+    nothing if it matches what was last written.
+
+    With a `journal_path`, each save only appends the records that changed
+    (`put`/`del` JSON lines) instead of rewriting everything; once the journal
+    grows past `COMPACT_RATIO` lines per task it is compacted to one line per
+    task and task_data.json is rewritten. Call `compact()` on exit to bring
+    task_data.json up to date. All writes are atomic.
+    """
+
+    def __init__(self, path: str = BACKUP_PATH, journal_path: str = None):
+        self.path = path
+        self.journal_path = journal_path
+        self._lock = threading.Lock()
+        self._written = None
+        self._journal_lines = 0
+        self.snapshots = 0  # full rewrites of `path`, for tests and benchmarks
+
+    def save(self, records: dict) -> int:
+        """Persist `records`. Returns how many tasks changed since the last save."""
+        with self._lock, metrics.span("backup_write"):
+            if self.journal_path:
+                return self._append_changes(records)
+            changed = _count_changes(self._written or {}, records)
+            if self._written is not None and not changed:
+                return 0
+            self._write_snapshot(records)
+            self._written = dict(records)
+            return changed
+
+    def compact(self):
+        """Rewrite the journal as one line per task, and task_data.json from it."""
+        with self._lock:
+            if self._written is None:
+                self._load_journal()
+            self._compact()
+
+    def _append_changes(self, records):
+        if self._written is None:
+            self._load_journal()
+        lines = [
+            {"op": "put", "id": key, "date": date, "task": task}
+            for key, (date, task) in records.items() if self._written.get(key) != (date, task)
+        ]
+        lines += [{"op": "del", "id": key} for key in self._written if key not in records]
+        if not lines:
+            return 0
+        with open(self.journal_path, "a") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines += len(lines)
+        self._written = dict(records)
+        if self._journal_lines >= max(COMPACT_MIN_LINES, COMPACT_RATIO * len(records)):
+            self._compact()
+        return len(lines)
+
+    def _load_journal(self):
+        self._written = load_journal(self.journal_path)
+        try:
+            with open(self.journal_path) as f:
+                self._journal_lines = sum(1 for _ in f)
+        except FileNotFoundError:
+            self._journal_lines = 0
+
+    def _compact(self):
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for key, (date, task) in self._written.items():
+                f.write(json.dumps({"op": "put", "id": key, "date": date, "task": task}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        self._journal_lines = len(self._written)
+        self._write_snapshot(self._written)
+
+    def _write_snapshot(self, records):
+        write_json_atomic(self.path, group_by_date(records), indent=2)
+        self.snapshots += 1
+        print(f"📝 Backup saved to {self.path}")
+
+
+def _count_changes(old, new):
+    return sum(1 for key, record in new.items() if old.get(key) != record) + sum(1 for key in old if key not in new)
@@ -0,0 +1,294 @@
+"""
+Scripted access to the calendar, without the GUI.
+
+    task-scheduler add "Patch db01" 2025-05-01T09:00 --duration 1.5
+    task-scheduler bulk-add < tasks.csv          # or --input-format jsonl
+    task-scheduler delete EVENT_ID ...           # or rows on stdin
+    task-scheduler list --days 7 --format csv
+    task-scheduler list --all-calendars          # every synced calendar, in start order
+    task-scheduler backup --out task_data.json
+    task-scheduler --metrics run.prom --trace run.json bulk-add < tasks.csv
+
+(or `python task_cli.py ...`). Rows on stdin are CSV with a header row or
+JSON lines, with the fields `title`, `start` (ISO 8601), `duration` (hours,
+optional) and `id` (optional; a client-side event id makes re-running a bulk
+add safe). `delete` takes rows with an `id`, or a `title` and `start`.
+
+Input is read and sent in batches of `--batch-size`, so any number of rows
+streams through in constant memory. Every result is written to stdout as a
+JSON line as soon as its batch is done; progress, throughput and
+diagnostics go to stderr. The exit status is 1 if anything failed.
+`--metrics`/`--trace` write the run's timings and API counters (see
+metrics.py) when the command finishes.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from calendar_utils import (
+    BATCH_SIZE, CALENDAR_ID, CALENDAR_IDS, DEFAULT_TIMEZONE, EventIndex, api_limiter, backup_calendar_to_json,
+    create_event, create_events, delete_tasks, get_calendar_service, iter_events
+)
+from metrics import metrics
+from multi_calendar import list_calendars_events
+from op_log import new_event_id
+from task_backup import BACKUP_PATH
+from task_model import Task
+
+INPUT_FORMATS = ("csv", "jsonl")
+LIST_FORMATS = ("jsonl", "csv")
+LIST_COLUMNS = ["id", "title", "start", "end"]
+
+
+def read_rows(stream, input_format: str = "csv"):
+    """Yield one dict per input row, reading `stream` lazily. Blank lines are skipped."""
+    if input_format == "jsonl":
+        for n, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"line {n}: {e}") from None
+        return
+    for row in csv.DictReader(stream):
+        yield {key.strip(): value.strip() for key, value in row.items() if key and value is not None}
+
+
+def row_to_event_body(row: dict, tz: str = DEFAULT_TIMEZONE) -> dict:
+    """Event body for an input row; raises ValueError if it has no title or a bad start/duration."""
+    title = (row.get("title") or "").strip()
+    if not title:
+        raise ValueError("missing title")
+    start = datetime.fromisoformat(str(row.get("start") or ""))
+    duration = row.get("duration")
+    minutes = round(float(duration) * 60) if duration not in (None, "") else None
+    body = Task(title, start, duration_minutes=minutes).to_event_body(tz)
+    body["id"] = row.get("id") or new_event_id()
+    return body
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Progress:
+    """Counts results and reports done/failed and throughput to stderr after each batch."""
+
+    def __init__(self, verb: str, stream):
+        self.verb = verb
+        self.stream = stream
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def record(self, ok: bool):
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+
+    @property
+    def per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return (self.done + self.failed) / elapsed if elapsed else 0.0
+
+    def report(self, final: bool = False):
+        prefix = "✅ Done:" if final else "⏱️"
+        print(f"{prefix} {self.done} {self.verb}, {self.failed} failed, "
+              f"{self.per_second:.0f} rows/s, {time.perf_counter() - self.started:.1f}s", file=self.stream, flush=True)
+
+
+def _emit(out, record):
+    out.write(json.dumps(record) + "\n")
+    out.flush()
+
+
+def cmd_add(service, args, stdin, out, err):
+    body = row_to_event_body({"title": args.title, "start": args.start, "duration": args.duration}, args.timezone)
+    event = create_event(service, body, calendar_id=args.calendar, fields='id,summary,start,end')
+    _emit(out, {"ok": True, "id": event.get("id", body["id"]), "title": body["summary"],
+                "start": body["start"]["dateTime"]})
+    return 0
+
+
+def cmd_bulk_add(service, args, stdin, out, err):
+    progress = Progress("added", err)
+    rows = read_rows(stdin, args.input_format)
+    for chunk in _chunks(enumerate(rows, 1), args.batch_size):
+        records = {}  # input line -> result record, emitted in input order
+        bodies = {}
+        for line, row in chunk:
+            try:
+                bodies[line] = row_to_event_body(row, args.timezone)
+            except (TypeError, ValueError) as e:
+                records[line] = {"row": line, "ok": False, "error": f"bad row: {e}"}
+        if bodies:
+            results = create_events(service, list(bodies.values()), batch_size=args.batch_size, calendar_id=args.calendar)
+            for line, result in zip(bodies, results):
+                body = result["body"]
+                records[line] = {"row": line, "ok": result["ok"], "id": body["id"], "title": body["summary"],
+                                 "start": body["start"]["dateTime"], "error": result["error"]}
+        for line in sorted(records):
+            progress.record(records[line]["ok"])
+            _emit(out, records[line])
+        progress.report()
+    progress.report(final=True)
+    return 1 if progress.failed else 0
+
+
+def cmd_delete(service, args, stdin, out, err):
+    progress = Progress("deleted", err)
+    rows = ({"id": event_id} for event_id in args.ids) if args.ids else read_rows(stdin, args.input_format)
+    index = None
+    for chunk in _chunks(rows, args.batch_size):
+        targets = []
+        for row in chunk:
+            if row.get("id"):
+                targets.append(row["id"])
+            else:
+                targets.append((row.get("title") or "", str(row.get("start") or "")))
+        if index is None and any(not isinstance(target, str) for target in targets):
+            # One listing of the calendar resolves every title/start row
+            index = EventIndex(iter_events(service, calendar_id=args.calendar))
+        for result in delete_tasks(service, targets, index=index, batch_size=args.batch_size, calendar_id=args.calendar,
+                                   tz=args.timezone):
+            progress.record(result["ok"])
+            target = result["target"]
+            record = {"ok": result["ok"], "id": result["event_id"], "error": result["error"]}
+            if not isinstance(target, str):
+                record.update(title=target[0], start=target[1])
+            _emit(out, record)
+        progress.report()
+    progress.report(final=True)
+    return 1 if progress.failed else 0
+
+
+def cmd_list(service, args, stdin, out, err):
+    time_min = datetime.now(timezone.utc)
+    time_max = time_min + timedelta(days=args.days) if args.days else None
+    if args.all_calendars:
+        # Each calendar is listed in start order; merging keeps the combined list in start order
+        listed = list_calendars_events(service, CALENDAR_IDS, time_min=time_min, time_max=time_max)
+    else:
+        listed = ((None, event) for event in iter_events(service, time_max=time_max, calendar_id=args.calendar))
+    writer = None
+    if args.format == "csv":
+        writer = csv.DictWriter(out, fieldnames=LIST_COLUMNS + (["calendar"] if args.all_calendars else []))
+        writer.writeheader()
+    count = 0
+    for calendar_id, event in listed:
+        record = {
+            "id": event.get("id"),
+            "title": event.get("summary"),
+            "start": _when(event.get("start")),
+            "end": _when(event.get("end"))
+        }
+        if args.all_calendars:
+            record["calendar"] = calendar_id
+        if writer:
+            writer.writerow(record)
+        else:
+            _emit(out, record)
+        count += 1
+    out.flush()
+    print(f"📋 {count} events", file=err)
+    return 0
+
+
+def _when(value):
+    value = value or {}
+    return value.get("dateTime") or value.get("date")
+
+
+def cmd_backup(service, args, stdin, out, err):
+    backup_calendar_to_json(service, out_path=args.out, calendar_id=args.calendar)
+    _emit(out, {"ok": True, "path": args.out})
+    return 0
+
+
+COMMANDS = {
+    "add": cmd_add,
+    "bulk-add": cmd_bulk_add,
+    "delete": cmd_delete,
+    "list": cmd_list,
+    "backup": cmd_backup
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="task-scheduler", description="Manage scheduler tasks in Google Calendar.")
+    parser.add_argument("--calendar", default=CALENDAR_ID, help="calendar id (default: the scheduler's calendar)")
+    parser.add_argument("--timezone", default=DEFAULT_TIMEZONE, help="zone for naive start times")
+    parser.add_argument("--metrics", metavar="PATH", help="write Prometheus metrics for the run here")
+    parser.add_argument("--trace", metavar="PATH", help="write a JSON trace of the run here (Perfetto)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="create one task")
+    add.add_argument("title")
+    add.add_argument("start", help="ISO 8601 start, e.g. 2025-05-01T09:00")
+    add.add_argument("--duration", type=float, help="hours")
+
+    for name, help_text in (("bulk-add", "create tasks read from stdin"),
+                            ("delete", "delete tasks by id, or rows read from stdin")):
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument("--input-format", choices=INPUT_FORMATS, default="csv")
+        sub.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        if name == "delete":
+            sub.add_argument("ids", nargs="*", help="event ids (default: read rows from stdin)")
+
+    listing = commands.add_parser("list", help="print upcoming events")
+    listing.add_argument("--days", type=int, help="only the next N days")
+    listing.add_argument("--format", choices=LIST_FORMATS, default="jsonl")
+    listing.add_argument("--all-calendars", action="store_true",
+                         help="list every calendar the scheduler syncs, merged in start order")
+
+    backup = commands.add_parser("backup", help="write upcoming events to a task_data.json backup")
+    backup.add_argument("--out", default=BACKUP_PATH)
+    return parser
+
+
+def main(argv=None, service_factory=None, stdin=None, stdout=None, stderr=None) -> int:
+    """Run one command. Returns the exit status; `service_factory` defaults to `get_calendar_service`."""
+    stdin, stdout, stderr = stdin or sys.stdin, stdout or sys.stdout, stderr or sys.stderr
+    args = build_parser().parse_args(argv)
+    if getattr(args, "batch_size", 1) < 1:
+        print("❌ --batch-size must be at least 1", file=stderr)
+        return 2
+    if args.metrics or args.trace:
+        metrics.enable(trace=bool(args.trace))
+    # Library diagnostics are printed; keep them out of the result stream
+    with redirect_stdout(stderr):
+        try:
+            with metrics.span("command", command=args.command):
+                service = (service_factory or get_calendar_service)()
+                return COMMANDS[args.command](service, args, stdin, stdout, stderr)
+        except Exception as e:
+            print(f"❌ {args.command} failed:", e)
+            return 1
+        finally:
+            throttled = sum(stats["throttled"] for stats in api_limiter.snapshot().values())
+            if throttled:
+                print(f"⏳ {throttled} calls waited for the rate limiter")
+            write_metrics(args)
+            stderr.flush()
+
+
+def write_metrics(args):
+    try:
+        if args.metrics:
+            metrics.write_prometheus(args.metrics)
+        if args.trace:
+            metrics.write_trace(args.trace)
+    except OSError as e:
+        print("⚠️ Could not write metrics:", e)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
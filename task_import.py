@@ -0,0 +1,282 @@
+"""
+Load a task_data.json backup back into the calendar.
+
+    python task_import.py [task_data.json]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+from calendar_utils import (
+    BATCH_SIZE, CALENDAR_ID, DEFAULT_TIMEZONE, EventIndex, create_events, event_match_key, get_calendar_service,
+    iter_events
+)
+from op_log import is_transient, new_event_id
+from task_backup import BACKUP_PATH, load_journal, write_json_atomic
+
+READ_CHUNK = 64 * 1024
+IMPORT_CONCURRENCY = 4  # batches in flight when run from the command line
+# The backup can hold past tasks too, so the duplicate check looks at the whole calendar
+LIST_SINCE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def iter_backup(path: str = BACKUP_PATH):
+    """
+    Yield `(date, task)` pairs from a backup, reading task_data.json one date
+    at a time instead of loading it whole. A `.jsonl` backup journal is replayed.
+    """
+    if path.endswith(".jsonl"):
+        yield from load_journal(path).values()
+        return
+    with open(path) as f:
+        for date, tasks in _iter_object_items(f):
+            for task in tasks:
+                yield date, task
+
+
+def _iter_object_items(f):
+    """Incrementally parse a top-level JSON object, yielding its `(key, value)` pairs."""
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+
+    def more():
+        nonlocal buf, pos
+        chunk = f.read(READ_CHUNK)
+        buf, pos = buf[pos:] + chunk, 0
+        return bool(chunk)
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or not more():
+                return
+
+    def expect(chars):
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buf) or buf[pos] not in chars:
+            raise ValueError(f"Malformed backup: expected one of {chars!r} at offset {pos}")
+        pos += 1
+        return buf[pos - 1]
+
+    def value():
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                obj, pos = decoder.raw_decode(buf, pos)
+                return obj
+            except json.JSONDecodeError:
+                if not more():  # the value really is broken, not just cut off by the chunk
+                    raise
+
+    expect("{")
+    skip_whitespace()
+    if buf[pos:pos + 1] == "}":
+        return
+    while True:
+        key = value()
+        expect(":")
+        yield key, value()
+        if expect(",}") == "}":
+            return
+
+
+def backup_event_body(date: str, task: dict, tz: str = DEFAULT_TIMEZONE) -> dict:
+    """Event body for one backup entry, with a fresh client-side id."""
+    start = datetime.fromisoformat(f"{date}T{task.get('time') or '00:00'}")
+    end = start + timedelta(hours=_duration_hours(task.get('duration')))
+    return {
+        "id": new_event_id(),
+        "summary": task['task'],
+        "start": {"dateTime": start.isoformat(), "timeZone": tz},
+        "end": {"dateTime": end.isoformat(), "timeZone": tz}
+    }
+
+
+def _duration_hours(duration) -> float:
+    """Hours in a backup duration like `"2.5 hours\t"`; 0 if there is none."""
+    try:
+        return float(str(duration).split()[0])
+    except (ValueError, IndexError):
+        return 0.0
+
+
+def import_backup(service, path: str = BACKUP_PATH, index=None, batch_size: int = BATCH_SIZE,
+                  concurrency: int = 1, service_factory=None, checkpoint_path: str = None,
+                  calendar_id: str = CALENDAR_ID, tz: str = DEFAULT_TIMEZONE):
+    """
+    Insert every task in the backup that the calendar doesn't already have.
+
+    The backup is streamed and each entry checked against `index` (an
+    `EventIndex`; one listing of the calendar is indexed when not given) and
+    against earlier entries, so re-running an import never duplicates.
+    Missing events are inserted through batched requests of `batch_size`,
+    with up to `concurrency` batches in flight. Each worker thread calls
+    `service_factory()` once for its service; `get_calendar_service` works,
+    since its transport gives each thread its own connection.
+    Throttled and failed inserts are retried as the limiter's "batch" policy says.
+
+    Progress is checkpointed (`<path>.import` by default) as batches finish,
+    so an interrupted import resumes after the last entry it finished.
+
+    Returns stats: `read`, `resumed`, `skipped`, `inserted`, `failed`,
+    `unsent`, `batches`, `seconds` and `per_second` (inserts per second).
+    """
+    started = time.perf_counter()
+    stats = {"read": 0, "resumed": 0, "skipped": 0, "inserted": 0, "failed": 0, "unsent": 0, "batches": 0}
+    checkpoint = _Checkpoint(checkpoint_path or path + ".import", path)
+    if index is None:
+        index = EventIndex(iter_events(service, time_min=LIST_SINCE, calendar_id=calendar_id))
+    if service_factory is None:
+        concurrency = 1
+
+    local = threading.local()
+
+    def run_batch(bodies):
+        if concurrency > 1:
+            if not hasattr(local, "service"):
+                local.service = service_factory()
+            return _insert_batch(local.service, bodies, calendar_id)
+        return _insert_batch(service, bodies, calendar_id)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+    in_flight = {}  # future -> (first entry, end entry)
+    seen = set()
+    bodies, first = [], checkpoint.done
+
+    def finish(result, span):
+        inserted, failed, unsent = result
+        stats["inserted"] += inserted
+        stats["failed"] += failed
+        stats["unsent"] += unsent
+        stats["batches"] += 1
+        checkpoint.complete(span, ok=not unsent)
+
+    def submit(end):
+        nonlocal bodies, first
+        span = (first, end)
+        if not bodies:
+            checkpoint.complete(span, ok=True)
+        elif executor is None:
+            finish(run_batch(bodies), span)
+        else:
+            while len(in_flight) >= concurrency * 2:  # bounded: don't read ahead of the API
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future.result(), in_flight.pop(future))
+            in_flight[executor.submit(run_batch, bodies)] = span
+        bodies, first = [], end
+
+    try:
+        for n, (date, task) in enumerate(iter_backup(path)):
+            stats["read"] += 1
+            if n < checkpoint.done:
+                stats["resumed"] += 1
+                continue
+            body = backup_event_body(date, task, tz)
+            key = event_match_key(body["summary"], body["start"]["dateTime"], tz)
+            if key in seen or index.find(body["summary"], body["start"]["dateTime"], tz):
+                stats["skipped"] += 1
+            else:
+                seen.add(key)
+                bodies.append(body)
+            if len(bodies) >= batch_size:
+                submit(n + 1)
+        submit(stats["read"])
+        for future in list(in_flight):
+            finish(future.result(), in_flight.pop(future))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    if stats["unsent"] == 0:
+        checkpoint.clear()
+    stats["seconds"] = time.perf_counter() - started
+    stats["per_second"] = stats["inserted"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(f"📥 Imported {stats['inserted']} of {stats['read']} tasks "
+          f"({stats['skipped']} already in calendar, {stats['resumed']} done earlier, "
+          f"{stats['failed'] + stats['unsent']} failed) in {stats['seconds']:.1f}s, "
+          f"{stats['per_second']:.0f} events/s")
+    return stats
+
+
+def _insert_batch(service, bodies, calendar_id):
+    """
+    Insert `bodies` in one batch request through `create_events`, which resends
+    throttled inserts. Returns (inserted, failed, unsent); unsent inserts are
+    the ones still failing transiently, left for a resumed import.
+    """
+    try:
+        results = create_events(service, bodies, batch_size=len(bodies), calendar_id=calendar_id)
+    except Exception as e:
+        # The limiter already retried the whole batch
+        if not is_transient(e):
+            raise
+        print(f"⏳ A batch of {len(bodies)} tasks could not be sent:", e)
+        return 0, 0, len(bodies)
+    inserted = failed = unsent = 0
+    for result in results:
+        if result["ok"]:
+            inserted += 1
+        elif result["retryable"]:
+            unsent += 1
+        else:
+            failed += 1
+            print(f"❌ Could not import {result['body']['summary']}:", result["error"])
+    return inserted, failed, unsent
+
+
+class _Checkpoint:
+    """
+    How many leading backup entries are fully handled. Batches can finish out of
+    order, so only the contiguous prefix of finished spans counts. Tied to the
+    backup's size and mtime so a different file starts from scratch.
+    """
+
+    def __init__(self, path, backup_path):
+        self.path = path
+        try:
+            stat = os.stat(backup_path)
+            self.source = {"size": stat.st_size, "mtime": stat.st_mtime}
+        except OSError:
+            self.source = None
+        self.done = 0
+        self._finished = {}  # span start -> span end
+        self._barrier = float('inf')  # start of the first span that didn't finish
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("source") == self.source:
+                self.done = saved["done"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def complete(self, span, ok):
+        if not ok:
+            self._barrier = min(self._barrier, span[0])
+            return
+        self._finished[span[0]] = span[1]
+        advanced = False
+        while self.done in self._finished and self.done < self._barrier:
+            self.done = self._finished.pop(self.done)
+            advanced = True
+        if advanced:
+            write_json_atomic(self.path, {"source": self.source, "done": self.done})
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    import_backup(get_calendar_service(), sys.argv[1] if len(sys.argv) > 1 else BACKUP_PATH,
+                  concurrency=IMPORT_CONCURRENCY, service_factory=get_calendar_service)
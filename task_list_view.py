@@ -0,0 +1,223 @@
+import math
+import customtkinter as ctk
+
+# Every list entry (date header or task) gets the same height, so the position
+# of any entry is just index * ROW_HEIGHT and nothing has to be measured.
+ROW_HEIGHT = 34
+# Extra rows kept alive above and below the viewport so fast scrolling
+# doesn't show blank space before the next render
+OVERSCAN = 4
+WHEEL_ROWS = 3
+
+
+def visible_range(offset, viewport_height, count, row_height=ROW_HEIGHT, overscan=OVERSCAN):
+    """Indexes `[first, last)` of the entries to materialize at scroll `offset`."""
+    if count <= 0:
+        return 0, 0
+    first = max(0, int(offset // row_height) - overscan)
+    last = min(count, int(math.ceil((offset + viewport_height) / row_height)) + overscan)
+    return first, max(first, last)
+
+
+def pool_size_for(viewport_height, row_height=ROW_HEIGHT, overscan=OVERSCAN):
+    """Most rows `visible_range` can ever ask for at once with this viewport."""
+    return int(math.ceil(viewport_height / row_height)) + 1 + 2 * overscan
+
+
+def clamp_offset(offset, viewport_height, count, row_height=ROW_HEIGHT):
+    return max(0, min(offset, count * row_height - viewport_height))
+
+
+class CheckState:
+    """`IntVar`-like handle on one task's checkbox that lives in the list, not in a widget."""
+
+    def __init__(self, view, key):
+        self.view = view
+        self.key = key
+
+    def get(self):
+        return 1 if self.key in self.view.checked else 0
+
+    def set(self, value):
+        self.view.set_checked(self.key, bool(value))
+
+
+class RowSlot:
+    """A recycled row. Shows either a date header or a task, whichever entry it is given."""
+
+    def __init__(self, view):
+        self.view = view
+        self.frame = ctk.CTkFrame(view.viewport, height=ROW_HEIGHT, fg_color="transparent")
+        self.header_label = ctk.CTkLabel(self.frame, text="", font=view.header_font)
+        self.var = ctk.IntVar()
+        self.checkbox = ctk.CTkCheckBox(self.frame, text="", variable=self.var, command=self._on_toggle)
+        self.info_label = ctk.CTkLabel(self.frame, text="")
+        self.name_label = ctk.CTkLabel(self.frame, text="", anchor="w", justify="left")
+        self.kind = None
+        self.key = None
+        self.index = None
+        self.texts = {}
+
+    def show(self, entry):
+        """Display `entry`, reconfiguring only the parts that differ from what's on screen."""
+        kind, key, payload = entry
+        if kind != self.kind:
+            for widget in (self.header_label, self.checkbox, self.info_label, self.name_label):
+                widget.pack_forget()
+            self.texts = {}
+            if kind == "header":
+                self.header_label.pack(side='left', padx=10, pady=(6, 0))
+            else:
+                self.checkbox.pack(side='left', padx=(30, 5))
+                self.name_label.pack(side='left', padx=5, fill="x", expand=True)
+            self.kind = kind
+        self.key = key
+
+        if kind == "header":
+            self._set_text(self.header_label, payload)
+            return
+        info = self.view.info_text(payload)
+        if info != self.texts.get(self.info_label):
+            if info and not self.texts.get(self.info_label):
+                self.info_label.pack(side='left', padx=5, before=self.name_label)
+            elif not info:
+                self.info_label.pack_forget()
+            self.texts[self.info_label] = info
+            self.info_label.configure(text=info)
+        self._set_text(self.name_label, payload.title)
+        checked = 1 if key in self.view.checked else 0
+        if self.var.get() != checked:
+            self.var.set(checked)
+
+    def _set_text(self, label, text):
+        if self.texts.get(label) != text:
+            label.configure(text=text)
+            self.texts[label] = text
+
+    def _on_toggle(self):
+        if self.key is not None:
+            self.view.set_checked(self.key, bool(self.var.get()))
+
+
+class VirtualTaskList(ctk.CTkFrame):
+    """
+    Scrolling task list that only creates widgets for the entries in view.
+
+    Entries are `(kind, key, payload)` tuples: `("header", key, text)` for a
+    date header or `("task", key, task)` for a `Task`. A fixed pool of
+    `RowSlot`s (viewport rows plus `OVERSCAN` on each side) is recycled as the
+    list scrolls, so the widget count stays constant however many tasks there
+    are. Checkbox state is kept by key in `checked`, since a slot can show a
+    different task after every scroll.
+    """
+
+    def __init__(self, master, info_text, header_font=None, empty_text="", on_scroll=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.info_text = info_text
+        self.on_scroll = on_scroll  # called with the view after each user scroll
+        self.header_font = header_font
+        self.entries = []
+        self.checked = set()
+        self.offset = 0
+        self.slots = []
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.pack(side='left', fill='both', expand=True)
+        self.empty_label = ctk.CTkLabel(self.viewport, text=empty_text, font=header_font, text_color="gray")
+
+        self.viewport.bind("<Configure>", lambda e: self.render())
+        self.bind_all("<MouseWheel>", self._on_wheel, add="+")
+        self.bind_all("<Button-4>", self._on_wheel, add="+")
+        self.bind_all("<Button-5>", self._on_wheel, add="+")
+
+    @property
+    def widget_count(self):
+        """Row widgets currently alive (constant for a given window size)."""
+        return len(self.slots)
+
+    def set_items(self, entries):
+        self.entries = entries
+        keys = {key for kind, key, _ in entries if kind == "task"}
+        self.checked &= keys
+        self.render()
+
+    def check_state(self, key):
+        return CheckState(self, key)
+
+    def set_checked(self, key, value):
+        if value:
+            self.checked.add(key)
+        else:
+            self.checked.discard(key)
+
+    def scroll_to(self, offset):
+        self.offset = clamp_offset(offset, self._viewport_height(), len(self.entries))
+        self.render()
+        if self.on_scroll is not None:
+            self.on_scroll(self)
+
+    def rows_below(self):
+        """Entries below the bottom of the viewport."""
+        _, last = visible_range(self.offset, self._viewport_height(), len(self.entries), overscan=0)
+        return len(self.entries) - last
+
+    def render(self):
+        height = self._viewport_height()
+        self.offset = clamp_offset(self.offset, height, len(self.entries))
+        self._resize_pool(pool_size_for(height))
+
+        if not self.entries:
+            self.empty_label.place(relx=0.5, y=30, anchor="n")
+        else:
+            self.empty_label.place_forget()
+
+        first, last = visible_range(self.offset, height, len(self.entries))
+        used = set()
+        for index in range(first, last):
+            slot = self.slots[index % len(self.slots)]
+            used.add(id(slot))
+            slot.show(self.entries[index])
+            slot.frame.place(x=0, y=index * ROW_HEIGHT - self.offset, relwidth=1.0)
+            slot.index = index
+        for slot in self.slots:
+            if id(slot) not in used and slot.index is not None:
+                slot.frame.place_forget()
+                slot.index = None
+
+        total = len(self.entries) * ROW_HEIGHT
+        if total > height:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _viewport_height(self):
+        pixels = self.viewport.winfo_height()
+        scaling = ctk.ScalingTracker.get_widget_scaling(self.viewport)
+        # Before the first layout pass Tk reports 1px; assume a modest window
+        return max(pixels / scaling, ROW_HEIGHT) if pixels > 1 else 300
+
+    def _resize_pool(self, size):
+        while len(self.slots) < size:
+            self.slots.append(RowSlot(self))
+        while len(self.slots) > size:
+            self.slots.pop().frame.destroy()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        height = self._viewport_height()
+        if action == 'moveto':
+            self.scroll_to(float(amount) * len(self.entries) * ROW_HEIGHT)
+        elif unit == 'pages':
+            self.scroll_to(self.offset + int(amount) * height)
+        else:
+            self.scroll_to(self.offset + int(amount) * ROW_HEIGHT)
+
+    def _on_wheel(self, event):
+        if not str(event.widget).startswith(str(self)):
+            return
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            step = -1
+        else:
+            step = 1
+        self.scroll_to(self.offset + step * WHEEL_ROWS * ROW_HEIGHT)
@@ -0,0 +1,80 @@
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+
+from calendar_utils import DEFAULT_TIMEZONE
+
+
+@dataclass(frozen=True, slots=True)
+class Task:
+    """
+    One task as the app shows it.
+
+    Immutable and slotted, so it is small, hashable and safe to share between
+    the sync results and the list view; edit with `dataclasses.replace`.
+    `version` is the etag (or `updated` time) of the event the task came
+    from, so two tasks for the same event compare unequal exactly when the
+    event changed. Local tasks not seen by the server yet have no version.
+    """
+
+    title: str
+    start: datetime
+    duration_minutes: int = None  # None when no duration was given
+    event_id: str = None
+    has_time: bool = True  # False for tasks added without a time of day
+    version: str = None
+
+    @classmethod
+    def from_event(cls, event: dict):
+        """Task for a Calendar event, or None if it has no title or start time."""
+        if not event.get('summary') or 'dateTime' not in event.get('start', {}):
+            return None
+        start = datetime.fromisoformat(event['start']['dateTime'])
+        duration = None
+        if 'dateTime' in event.get('end', {}):
+            end = datetime.fromisoformat(event['end']['dateTime'])
+            duration = round((end - start).total_seconds() / 60)
+        return cls(
+            title=event['summary'],
+            start=start,
+            duration_minutes=duration,
+            event_id=event.get('id'),
+            version=event.get('etag') or event.get('updated')
+        )
+
+    def to_event_body(self, tz: str = DEFAULT_TIMEZONE) -> dict:
+        body = {
+            "summary": self.title,
+            "start": {"dateTime": self.start.isoformat(), "timeZone": tz},
+            "end": {"dateTime": self.end.isoformat(), "timeZone": tz}
+        }
+        if self.event_id:
+            body["id"] = self.event_id
+        return body
+
+    def with_event_id(self, event_id: str) -> "Task":
+        return replace(self, event_id=event_id)
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(minutes=self.duration_minutes or 0)
+
+    @property
+    def sort_key(self) -> datetime:
+        """Wall-clock start; synced (aware) and local (naive) tasks sort together."""
+        return self.start.replace(tzinfo=None)
+
+    @property
+    def date_label(self) -> str:
+        return self.start.strftime("%-m/%-d/%y")
+
+    @property
+    def time_label(self) -> str:
+        return self.start.strftime("%-I:%M %p") if self.has_time else ""
+
+    @property
+    def duration_label(self):
+        """`1 hour` / `1.5 hours` plus a tab, as task_data.json stores it; None without a duration."""
+        if self.duration_minutes is None:
+            return None
+        hours = self.duration_minutes / 60
+        return "1 hour\t" if hours == 1 else f"{hours:g} hours\t"
@@ -1,7 +1,20 @@
+import time
+import uuid
+from concurrent.futures import wait
 import customtkinter as ctk
-from datetime import datetime, time as dtime, timedelta
+from datetime import datetime, time as dtime
 from tkinter import messagebox
-from calendar_utils import create_event, delete_task, get_calendar_service, list_all_events, backup_calendar_to_json
+from calendar_push import PushReceiver, watch_calendar, stop_channel, PUSH_PORT
+from calendar_utils import get_calendar_service, invalidate_calendar_service, is_auth_error, CALENDAR_IDS
+from event_store import STORE_PATH
+from io_worker import IOWorker
+from metrics import metrics
+from op_log import OPLOG_PATH
+from perf_overlay import LAG_PROBE_MS, LoopLagProbe, RefreshTimings, count_widgets, format_overlay
+from poll_scheduler import PollScheduler
+from scheduler_core import SchedulerCore, SYNC_WINDOW_DAYS
+from task_list_view import VirtualTaskList
+from task_model import Task
 
 # ✅ Moved to the top so vcmd doesn't fail
 app = ctk.CTk()
@@ -14,6 +27,44 @@ custom_font = ("Comic Sans MS", 16)
 
 all_tasks = []
 checkbox_refs = []
+# Tasks, calendar syncs, op log and backup live in the headless core; this module only shows them.
+# The service is looked up here on every call, so swapping `get_calendar_service` (e.g. in tests) applies.
+core = SchedulerCore(CALENDAR_IDS, window_days=SYNC_WINDOW_DAYS, service_factory=lambda: get_calendar_service())
+tasks_by_id = core.tasks_by_id  # event id -> Task, the same dict as the core's
+op_log = core.op_log
+LAZY_LOAD_ROWS = 5  # load the next window when the list is scrolled this close to its end
+
+# task_data.json is written a couple of seconds after the last change
+BACKUP_DELAY_MS = 2000
+
+# All Google API calls run here; results come back through pump_io_results()
+io_worker = IOWorker()
+IO_PUMP_INTERVAL_MS = 50
+
+# Syncs run when poll_scheduler says so; the tick only checks
+poll_scheduler = PollScheduler()
+POLL_TICK_MS = 1000
+# Optional push mode: the public HTTPS URL Google should notify, forwarded to PUSH_PORT here.
+# While a channel is open, polling drops to the scheduler's safety-net interval.
+PUSH_WEBHOOK_URL = None
+push_receiver = None
+push_channel = None
+PUSH_STOP_WAIT = 2.0  # seconds on close for the channel stop; if it takes longer the channel just expires
+# Timing spans and API counters (see metrics.py). When enabled they are written to METRICS_PATH
+# (Prometheus text) and TRACE_PATH (Perfetto/chrome://tracing JSON) every METRICS_WRITE_MS and on exit,
+# and served at http://127.0.0.1:METRICS_PORT/metrics if a port is set.
+METRICS_ENABLED = False
+METRICS_PATH = "metrics.prom"
+TRACE_PATH = "trace.json"
+METRICS_PORT = None
+METRICS_WRITE_MS = 10000
+metrics_server = None
+# Debug overlay with the fetch/parse/diff/render time of recent refreshes, Tk loop lag and widget count
+PERF_OVERLAY_KEY = "<F12>"
+PERF_OVERLAY_UPDATE_MS = 500
+refresh_timings = RefreshTimings()  # recorded on every sync, so the overlay has history when opened
+loop_lag = LoopLagProbe()
+perf_overlay = None  # the overlay label while it is shown
 task_hint = "Write your task or describe it here."
 
 def numeric_only(char):
@@ -64,78 +115,128 @@ def clear_completed_tasks():
     global all_tasks, checkbox_refs
     remaining_tasks = []
     new_refs = []
-
-    try:
-        service = get_calendar_service()
-    except Exception as e:
-        print("❌ Could not load calendar service:", e)
-        service = None
+    completed = []
 
     for (task, var, frame) in checkbox_refs:
         if var.get() == 0:
             remaining_tasks.append(task)
             new_refs.append((task, var, frame))
         else:
-            frame.destroy()
-            if service:
-                start_time = task['start_datetime'].isoformat()[:16]
-                try:
-                    delete_task(service, task['task_name'], start_time)
-                except Exception as e:
-                    print(f"❌ Could not delete {task['task_name']}:", e)
+            completed.append(task)
 
     all_tasks.clear()
     all_tasks.extend(remaining_tasks)
     checkbox_refs.clear()
     checkbox_refs.extend(new_refs)
+    core.delete_tasks(completed)
     sort_tasks()
     messagebox.showinfo("Tasks Cleared", "Completed tasks have been removed and deleted from Google Calendar.")
 
-    try:
-        backup_calendar_to_json(service, out_path="task_data.json")
-    except Exception as e:
-        print("⚠️ Backup after clearing tasks failed:", e)
-
+    flush_pending_ops_soon()
+    schedule_backup()
+    poll_scheduler.wake()
 
+_flush_in_flight = False
 
-def sort_tasks():
-    for widget in task_list_container.winfo_children():
-        widget.destroy()
-    checkbox_refs.clear()
-    
-    if not all_tasks:
-        empty_label = ctk.CTkLabel(task_list_container, text="➕ Add a task and it will be shown here.", font=custom_font, text_color="gray")
-        empty_label.pack(pady=30)
+def flush_pending_ops_soon():
+    """Send queued creates/deletes on the I/O worker, unless a flush is running or we're backing off."""
+    global _flush_in_flight
+    if _flush_in_flight or not op_log.due():
         return
+    _flush_in_flight = True
+    io_worker.submit(flush_pending_ops, on_done=on_ops_flushed, on_error=on_ops_flush_failed)
+
+def flush_pending_ops():
+    """Runs on the I/O worker: send everything queued in the op log."""
+    return core.flush_pending_ops()
+
+def on_ops_flushed(result):
+    global _flush_in_flight, all_tasks
+    _flush_in_flight = False
+    if result is None:
+        result = {"created": [], "dropped": []}
+    if result["created"]:
+        messagebox.showinfo("Task Added", "Your task was added to Google Calendar.")
+    rejected = False
+    for op, error in result["dropped"]:
+        if op["op"] == "create":
+            # The server will never accept it, so stop showing it
+            rejected = tasks_by_id.pop(op["body"]["id"], None) is not None or rejected
+            messagebox.showerror("Calendar Error", f"Failed to add task:\n{error}")
+        else:
+            print(f"❌ Could not delete {op['target']}:", error)
+    if rejected:
+        all_tasks = visible_tasks()
+        sort_tasks()
+        schedule_backup()
+    if op_log.due():
+        flush_pending_ops_soon()  # more was queued while this flush ran
+
+def on_ops_flush_failed(e):
+    global _flush_in_flight
+    _flush_in_flight = False
+    print("⚠️ Could not send queued calendar changes:", e)
+
+
+_backup_after_id = None
+
+def schedule_backup():
+    """Back up the local tasks soon; a burst of changes is written once."""
+    global _backup_after_id
+    if _backup_after_id is None:
+        _backup_after_id = app.after(BACKUP_DELAY_MS, write_backup)
+
+def backup_records():
+    return core.backup_records()
+
+def write_backup():
+    """Snapshot the tasks here on the Tk thread; the file I/O runs on the worker."""
+    global _backup_after_id
+    _backup_after_id = None
+    io_worker.submit(core.save_backup, backup_records(),
+                     on_error=lambda e: print("⚠️ Backup failed:", e))
+
+def task_key(task):
+    """Stable identity of a task row: its event id, or title + start for tasks not synced yet."""
+    if task.event_id:
+        return task.event_id
+    return ("local", task.title, task.start.isoformat())
+
+def task_date_key(task):
+    return task.date_label
+
+def task_info_text(task):
+    return " | ".join(label for label in (task.time_label, task.duration_label) if label)
+
+def build_list_entries(tasks):
+    """Flatten tasks into the date-header/task entries shown by the task list, in display order."""
+    entries = []
+    seen_keys = set()
+    last_date = None
+    for task in sorted(tasks, key=lambda t: t.sort_key):
+        date_key = task_date_key(task)
+        if date_key != last_date:
+            entries.append(("header", ("header", date_key), f"\U0001F4C5 {date_key}"))
+            last_date = date_key
+        key = task_key(task)
+        while key in seen_keys:  # identical tasks still get a row each
+            key = (key, "dup")
+        seen_keys.add(key)
+        entries.append(("task", key, task))
+    return entries
 
-    grouped = {}
-    for task in sorted(all_tasks, key=lambda t: (t['date'], t['time'] or datetime.min)):
-        date_key = task['date'].strftime("%-m/%-d/%y") if hasattr(task['date'], 'strftime') else "Unknown"
-        grouped.setdefault(date_key, []).append(task)
-
-    for date_key, tasks in grouped.items():
-        ctk.CTkLabel(task_list_container, text=f"\U0001F4C5 {date_key}", font=custom_font).pack(anchor='w', padx=10, pady=(10, 0))
-        for task in tasks:
-            task_frame = ctk.CTkFrame(task_list_container, fg_color="transparent")
-            task_frame.pack(fill='x', padx=30, pady=2, anchor='w')
-
-            var = ctk.IntVar()
-            checkbox = ctk.CTkCheckBox(task_frame, text="", variable=var)
-            checkbox.pack(side='left', padx=5)
-
-            label_parts = []
-            if task['time']:
-                time_str = task['time'].strftime("%-I:%M %p") if hasattr(task['time'], 'strftime') else ""
-                label_parts.append(time_str)
-            if task['duration']:
-                label_parts.append(task['duration'])
-            if label_parts:
-                ctk.CTkLabel(task_frame, text=" | ".join(label_parts)).pack(side='left', padx=5)
-
-            task_label = ctk.CTkLabel(task_frame, text=task['task_name'], wraplength=400, anchor="w", justify="left")
-            task_label.pack(side='left', padx=5, fill="x", expand=True)
-
-            checkbox_refs.append((task, var, task_frame))
+def sort_tasks():
+    """
+    Render `all_tasks` grouped by date. The list is virtualized, so this only
+    rebuilds the entry list; widgets exist just for the rows in view.
+    """
+    with metrics.span("render_task_list"):
+        checkbox_refs.clear()
+        entries = build_list_entries(all_tasks)
+        for kind, key, task in entries:
+            if kind == "task":
+                checkbox_refs.append((task, task_list_container.check_state(key), None))
+        task_list_container.set_items(entries)
 
 def submit_task():
     month = month_var.get()
@@ -156,109 +257,250 @@ def submit_task():
     if not parsed_date:
         messagebox.showerror("Invalid Date", "Please enter a valid date.")
         return
-    formatted_duration = f"{duration} hour\t" if duration == "1" else f"{duration} hours\t" if duration else None
-
-    combined_start = datetime.combine(parsed_date.date(), parsed_time.time() if parsed_time else dtime(0, 0))
-    if parsed_time and duration:
+    duration_minutes = None
+    if duration:
         try:
             duration_minutes = int(float(duration) * 60)
         except ValueError:
             messagebox.showerror("Invalid Duration", "Please enter a valid numeric duration.")
             return
-        combined_end = combined_start + timedelta(minutes=duration_minutes)
-    else:
-        combined_end = combined_start
-
-    all_tasks.append({
-        "date": parsed_date,
-        "time": parsed_time,
-        "duration": formatted_duration,
-        "task_name": task_name.strip(),
-        "start_datetime": combined_start
-    })
-
-    event_body = {
-        "summary": task_name.strip(),
-        "start": {
-            "dateTime": combined_start.isoformat(),
-            "timeZone": "America/New_York"
-        },
-        "end": {
-            "dateTime": combined_end.isoformat(),
-            "timeZone": "America/New_York"
-        }
-    }
 
-    try:
-        service = get_calendar_service()
-        create_event(service, event_body)
+    combined_start = datetime.combine(parsed_date.date(), parsed_time.time() if parsed_time else dtime(0, 0))
+    local_task = Task(
+        title=task_name.strip(),
+        start=combined_start,
+        duration_minutes=duration_minutes,
+        has_time=parsed_time is not None
+    )
+
+    all_tasks.append(core.add_task(local_task))
+    sort_tasks()
+    reset_task_form()
+    flush_pending_ops_soon()
+    schedule_backup()
+    poll_scheduler.wake()
+
+def reset_task_form():
+    # Reset task entry box
+    task_entry.delete("1.0", "end")
+    task_entry.insert("1.0", task_hint)
+    task_entry.configure(text_color="gray")
+    check_submit_ready()
+
+    # Reset dropdowns and year entry
+    month_var.set("")
+    day_var.set("")
+    hour_var.set("")
+    minute_var.set("")
+    am_pm_var.set("AM")
+    duration_var.set("")
+    year_entry.delete(0, "end")
+
+
+def sync_calendar_tasks():
+    """Runs on the I/O worker: the core's `sync()`, whose result goes to apply_task_changes()."""
+    return core.sync()
+
+def apply_task_changes(result):
+    """Fold a sync_calendar_tasks() result into `tasks_by_id`. Returns True if anything changed."""
+    return core.apply_changes(result)
+
+def load_local_store(path=STORE_PATH):
+    """
+    Open the on-disk event store and render whatever it holds, before any network call.
+    Background syncs then only reconcile what changed since the last run.
+    """
+    global all_tasks, _last_refresh_day
+    if not core.load_local_store(path):
+        return
+    _last_refresh_day = datetime.now().date()
+    all_tasks = visible_tasks()
+    sort_tasks()
 
-        # ✅ Immediately back up the calendar after adding a task
-        backup_calendar_to_json(service, out_path="task_data.json")
+def load_pending_ops(path=OPLOG_PATH):
+    core.load_pending_ops(path)
+
+def visible_tasks():
+    return core.visible_tasks()
+
+_last_refresh_day = None
+_sync_in_flight = False
+
+def on_sync_done(result):
+    global all_tasks, _last_refresh_day, _sync_in_flight
+    _sync_in_flight = False
+    started = time.perf_counter()
+    changed = apply_task_changes(result)
+    applied = time.perf_counter()
+    poll_scheduler.record_result(changed)
+    if changed:
+        schedule_backup()
+    today = datetime.now().date()
+    if changed or today != _last_refresh_day:
+        _last_refresh_day = today
+        all_tasks = visible_tasks()
+        sort_tasks()
+    refresh_timings.record(**core.last_sync_timings, diff=applied - started, render=time.perf_counter() - applied)
+
+def on_sync_failed(e):
+    global _sync_in_flight
+    _sync_in_flight = False
+    poll_scheduler.record_error(e)
+    print("Failed to sync calendar tasks:", e)
+    if is_auth_error(e):
+        invalidate_calendar_service()
+
+def on_task_list_scroll(view):
+    """Fetch the next window of dates once the user scrolls near the end of what is loaded."""
+    if view.rows_below() <= LAZY_LOAD_ROWS and core.calendar_sync.request_more():
+        poll_scheduler.wake()
 
-        messagebox.showinfo("Task Added", "Your task was added to Google Calendar.")
-        
-        # Reset task entry box
-        task_entry.delete("1.0", "end")
-        task_entry.insert("1.0", task_hint)
-        task_entry.configure(text_color="gray")
-        check_submit_ready()
+def refresh_task_list_periodically():
+    global _sync_in_flight
+    if not app.winfo_exists():
+        return
 
-        # Reset dropdowns and year entry
-        month_var.set("")
-        day_var.set("")
-        hour_var.set("")
-        minute_var.set("")
-        am_pm_var.set("AM")
-        duration_var.set("")
-        year_entry.delete(0, "end")
+    flush_pending_ops_soon()
+    # Never stack syncs: a slow API just means the next tick skips
+    if not _sync_in_flight and poll_scheduler.due():
+        _sync_in_flight = True
+        io_worker.submit(sync_calendar_tasks, on_done=on_sync_done, on_error=on_sync_failed)
 
-    except Exception as e:
-        messagebox.showerror("Calendar Error", f"Failed to add task:\n{e}")
+    app.after(POLL_TICK_MS, refresh_task_list_periodically)
 
+def on_focus_event(event=None):
+    # Focus moving between our own widgets fires FocusOut+FocusIn; look once things settle
+    app.after_idle(update_focus)
 
-def fetch_calendar_tasks():
-    tasks = []
+def update_focus():
     try:
-        service = get_calendar_service()
-        events = list_all_events(service)
-        for e in events:
-            if not e.get('summary') or 'start' not in e or 'dateTime' not in e['start']:
-                continue
-
-            start_str = e['start']['dateTime']
-            start_dt = datetime.fromisoformat(start_str)
-            duration = None
-            if 'end' in e and 'dateTime' in e['end']:
-                end_dt = datetime.fromisoformat(e['end']['dateTime'])
-                delta = end_dt - start_dt
-                hours = delta.total_seconds() / 3600
-                duration = f"{hours:g} hours\t" if hours != 1 else "1 hour\t"
-            tasks.append({
-                "date": start_dt,
-                "time": start_dt,
-                "duration": duration,
-                "task_name": e['summary'],
-                "start_datetime": start_dt
-            })
-    except Exception as e:
-        print("Failed to fetch calendar tasks:", e)
-    return tasks
+        focused = app.focus_get() is not None
+    except KeyError:  # focus is on a widget Tk can't name (e.g. a dropdown menu of ours)
+        focused = True
+    poll_scheduler.set_focused(focused)
+
+def on_map_event(event):
+    if event.widget is app:
+        poll_scheduler.set_visible(str(event.type) == "Map")
+
+def start_push_notifications(address=PUSH_WEBHOOK_URL):
+    """Receive Calendar push notifications and sync when they arrive, instead of polling often."""
+    global push_receiver
+    if not address:
+        return
+    token = uuid.uuid4().hex
+    try:
+        push_receiver = PushReceiver(lambda info: poll_scheduler.wake(), port=PUSH_PORT, token=token).start()
+    except OSError as e:
+        print("⚠️ Could not start push receiver, polling instead:", e)
+        return
 
-def refresh_task_list_periodically():
-    global all_tasks
+    def watch():
+        return watch_calendar(get_calendar_service(), address, token=token, calendar_id=core.calendar_sync.calendar_id)
+
+    io_worker.submit(watch, on_done=on_push_channel_open,
+                     on_error=lambda e: print("⚠️ Could not open push channel, polling instead:", e))
+
+def start_metrics(enabled=METRICS_ENABLED):
+    """Record spans and counters, and export them periodically until the app closes."""
+    global metrics_server
+    if not enabled:
+        return
+    metrics.enable(trace=bool(TRACE_PATH))
+    if METRICS_PORT:
+        try:
+            metrics_server = metrics.serve(METRICS_PORT)
+            print(f"📈 Metrics at http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print("⚠️ Could not start metrics endpoint:", e)
+    app.after(METRICS_WRITE_MS, write_metrics_periodically)
+
+def save_metrics():
+    if METRICS_PATH:
+        metrics.write_prometheus(METRICS_PATH)
+    if TRACE_PATH and metrics.tracing:
+        metrics.write_trace(TRACE_PATH)
+
+def write_metrics_periodically():
     if not app.winfo_exists():
         return
+    io_worker.submit(save_metrics, on_error=lambda e: print("⚠️ Could not write metrics:", e))
+    app.after(METRICS_WRITE_MS, write_metrics_periodically)
+
+def toggle_perf_overlay(event=None):
+    """Show or hide the performance overlay in the window's top right corner."""
+    global perf_overlay
+    if perf_overlay is not None:
+        perf_overlay.destroy()
+        perf_overlay = None
+        return
+    perf_overlay = ctk.CTkLabel(app, text="", font=("Courier", 12), justify="left", anchor="nw",
+                                fg_color="gray15", corner_radius=6, padx=8, pady=6)
+    perf_overlay.place(relx=1.0, x=-10, y=10, anchor="ne")
+    loop_lag.samples.clear()
+    update_perf_overlay(perf_overlay)
+    probe_loop_lag(perf_overlay)
+
+def update_perf_overlay(overlay):
+    # Each overlay runs its own loops; they stop once it is hidden
+    if overlay is not perf_overlay or not app.winfo_exists():
+        return
+    overlay.configure(text=format_overlay(refresh_timings, loop_lag, count_widgets(app), task_list_container.widget_count))
+    overlay.lift()
+    app.after(PERF_OVERLAY_UPDATE_MS, update_perf_overlay, overlay)
 
+def probe_loop_lag(overlay, fired=False):
+    if overlay is not perf_overlay or not app.winfo_exists():
+        return
+    if fired:
+        loop_lag.fired()
+    loop_lag.scheduled(LAG_PROBE_MS)
+    app.after(LAG_PROBE_MS, probe_loop_lag, overlay, True)
+
+def close_push_channel(channel):
+    """Runs on the I/O worker: tell Google to stop notifying `channel`."""
     try:
-        updated_tasks = fetch_calendar_tasks()
-        if updated_tasks != all_tasks:
-            all_tasks = updated_tasks
-            sort_tasks()
+        stop_channel(get_calendar_service(), channel)
     except Exception as e:
-        print("⚠️ Error during task refresh:", e)
+        print("⚠️ Could not close push channel:", e)
 
-    app.after(1000, refresh_task_list_periodically)
+def on_push_channel_open(channel):
+    global push_channel
+    push_channel = channel
+    poll_scheduler.push_active = True
+    print("🔔 Push notifications on; polling every", int(poll_scheduler.max_interval), "s as a fallback")
+
+def pump_io_results():
+    """Run finished background callbacks on the Tk thread, a few milliseconds at a time."""
+    if not app.winfo_exists():
+        return
+    io_worker.drain()
+    app.after(IO_PUMP_INTERVAL_MS, pump_io_results)
+
+def on_close():
+    try:
+        if _backup_after_id is not None:  # a change is still waiting to be backed up
+            app.after_cancel(_backup_after_id)
+            core.save_backup()
+        if core.task_backup.journal_path:
+            core.task_backup.compact()
+    except Exception as e:
+        print("⚠️ Backup on exit failed:", e)
+    core.shutdown()
+    if push_receiver is not None:
+        push_receiver.stop()
+    if push_channel is not None:
+        # A network call (maybe a token refresh too): don't hold the window open for it
+        wait([io_worker.submit(close_push_channel, push_channel)], timeout=PUSH_STOP_WAIT)
+    if metrics.enabled:
+        try:
+            save_metrics()
+        except OSError as e:
+            print("⚠️ Could not write metrics:", e)
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    io_worker.shutdown(wait=False)
+    app.destroy()
 
 
 
@@ -310,13 +552,25 @@ clear_btn = ctk.CTkButton(app, text="🗑️ Completed Tasks", command=clear_com
 clear_btn.pack(pady=(0,10))
 
 ctk.CTkLabel(app, text="Task List", font=custom_font).pack(pady=(5,0), anchor='center', padx=10)
-task_scroll = ctk.CTkScrollableFrame(app, height=300)
+task_scroll = VirtualTaskList(app, task_info_text, header_font=custom_font, height=300,
+                              empty_text="➕ Add a task and it will be shown here.", on_scroll=on_task_list_scroll)
 task_scroll.pack(fill='both', expand=True, padx=5, pady=(0,10))
 task_list_container = task_scroll
 
+app.protocol("WM_DELETE_WINDOW", on_close)
+app.bind("<FocusIn>", on_focus_event, add="+")
+app.bind("<FocusOut>", on_focus_event, add="+")
+app.bind("<Map>", on_map_event, add="+")
+app.bind("<Unmap>", on_map_event, add="+")
+app.bind(PERF_OVERLAY_KEY, toggle_perf_overlay, add="+")
+
 if __name__ == "__main__":
-    all_tasks = fetch_calendar_tasks()
     sort_tasks()
+    load_pending_ops()
+    load_local_store()
+    pump_io_results()
+    start_push_notifications()
+    start_metrics()
     refresh_task_list_periodically()
     app.after(1, lambda: app.attributes('-topmost', True))
     app.mainloop()
@@ -0,0 +1,15 @@
+import sys
+import os
+
+import pytest
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from calendar_utils import api_limiter
+
+
+@pytest.fixture(autouse=True)
+def fresh_api_limiter():
+    """Each test starts with full rate-limit buckets, so earlier tests' calls never slow it down."""
+    api_limiter.reset()
+    yield
@@ -0,0 +1,262 @@
+"""
+In-memory stand-in for the `events()` part of a Calendar service object.
+
+It answers the same calls calendar_utils makes (list with paging and sync
+tokens, insert, delete, batch requests) so sync, store and GUI code can be
+tested without a network or MagicMock call chains.
+
+Listing, sync-token and updatedMin queries cost about as much as the
+response they return, so it also stands in for a large calendar in the
+benchmarks (100k events). `latency` and the failure settings make it
+behave like a slow or unreliable server.
+"""
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timezone
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def http_error(status, reason=""):
+    return HttpError(httplib2.Response({"status": status, "reason": reason}), reason.encode())
+
+
+def _start_key(event):
+    start = event.get("start", {})
+    value = start.get("dateTime") or start.get("date") or ""
+    dt = datetime.fromisoformat(value) if value else datetime.max.replace(tzinfo=timezone.utc)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class FakeRequest:
+    def __init__(self, run, calendar=None, **kwargs):
+        self._run = run
+        self._calendar = calendar
+        self.kwargs = kwargs
+
+    def execute(self):
+        if self._calendar is not None:
+            self._calendar._round_trip()
+        return self._call()
+
+    def _call(self):
+        if self._calendar is not None:
+            self._calendar._maybe_fail()
+        return self._run()
+
+
+class FakeBatch:
+    def __init__(self, callback, calendar=None):
+        self.callback = callback
+        self.calendar = calendar
+        self.requests = []
+
+    def add(self, request, request_id=None, callback=None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback))
+
+    def execute(self):
+        if self.calendar is not None:
+            self.calendar._round_trip()  # one HTTP request for the whole batch
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = request._call(), None
+            except HttpError as e:
+                response, exception = None, e
+            (callback or self.callback)(request_id, response, exception)
+
+
+class FakeEvents:
+    def __init__(self, calendar):
+        self.calendar = calendar
+
+    def list(self, calendarId, maxResults=250, pageToken=None, syncToken=None, timeMin=None,
+             timeMax=None, fields=None, updatedMin=None, **kwargs):
+        return FakeRequest(lambda: self.calendar._list(calendarId, maxResults, pageToken, syncToken, timeMin, timeMax,
+                                                       updatedMin),
+                           self.calendar, calendarId=calendarId, pageToken=pageToken, syncToken=syncToken, fields=fields,
+                           timeMin=timeMin, timeMax=timeMax, updatedMin=updatedMin)
+
+    def insert(self, calendarId, body, fields=None, **kwargs):
+        return FakeRequest(lambda: self.calendar._insert(calendarId, body), self.calendar,
+                           calendarId=calendarId, body=body)
+
+    def delete(self, calendarId, eventId, **kwargs):
+        return FakeRequest(lambda: self.calendar._delete(calendarId, eventId), self.calendar,
+                           calendarId=calendarId, eventId=eventId)
+
+
+class FakeCalendarService:
+    """
+    `service` replacement. Every mutation is logged with a sequence number and a
+    sync token is just the sequence number it was issued at, so incremental
+    lists return exactly the changes since then (deletions as cancelled events).
+
+    `latency` (seconds, or a callable returning them) is slept once per HTTP
+    request; a batch is one request. `error_rate` fails that share of calls,
+    batched ones included, with `error_status`, drawn from a generator seeded
+    with `seed` so runs repeat. `requests` counts HTTP requests.
+    """
+
+    def __init__(self, events=(), latency=0.0, error_rate: float = 0.0, error_status: int = 503, seed: int = 0,
+                 sleep=time.sleep):
+        self.events_by_calendar = {}  # calendar id -> {event id: event}
+        self.changes = []  # (seq, calendar id, event id); changes[i] has seq i + 1
+        self.change_times = {}  # seq -> RFC 3339 time of the change, for updatedMin queries
+        self._seq = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._last_change = {}  # calendar id -> seq of its latest change
+        self._listing = None  # (calendar id, timeMin, timeMax, last change) -> items, reused across pages
+        self._sorted = {}  # calendar id -> (version, events in start order, their starts)
+        self.list_calls = 0
+        self.requests = 0
+        self.min_valid_token = 0
+        self.min_valid_updated = ""
+        self.insert_failures = []  # statuses the next inserts fail with, in order (None = succeed)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.sleep = sleep
+        for calendar_id, event in events:
+            self.add_event(event, calendar_id)
+
+    # --- service surface used by calendar_utils ---
+    def events(self):
+        return FakeEvents(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(callback, self)
+
+    # --- helpers for tests ---
+    def add_event(self, body, calendar_id="primary"):
+        return self._insert(calendar_id, body)
+
+    def update_event(self, calendar_id, event_id, **fields):
+        """Change an event in place (e.g. move its `start`), as an edit in another client would."""
+        event = self.events_by_calendar[calendar_id][event_id]
+        event.update(fields)
+        event["updated"] = datetime.now(timezone.utc).isoformat()
+        event["etag"] = f'"{len(self.changes) + 1}"'
+        self._record(calendar_id, event_id)
+        return dict(event)
+
+    def expire_sync_tokens(self):
+        """Make every token issued so far answer 410 GONE, like the real API eventually does."""
+        self.min_valid_token = self._current_seq()
+        self.min_valid_updated = datetime.now(timezone.utc).isoformat()
+
+    def _current_seq(self):
+        return self.changes[-1][0] if self.changes else 0
+
+    def _record(self, calendar_id, event_id):
+        seq = next(self._seq)
+        self.changes.append((seq, calendar_id, event_id))
+        self.change_times[seq] = datetime.now(timezone.utc).isoformat()
+        self._last_change[calendar_id] = seq
+        return seq
+
+    def _round_trip(self):
+        self.requests += 1
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            self.sleep(latency)
+
+    def _maybe_fail(self):
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise http_error(self.error_status, "injected failure")
+
+    def _insert(self, calendar_id, body):
+        status = self.insert_failures.pop(0) if self.insert_failures else None
+        if status:
+            raise http_error(status, "injected failure")
+        events = self.events_by_calendar.setdefault(calendar_id, {})
+        event_id = body.get("id") or f"evt{next(self._ids)}"
+        if event_id in events:
+            raise http_error(409, "duplicate")
+        event = dict(body, id=event_id, status="confirmed")
+        event["updated"] = datetime.now(timezone.utc).isoformat()
+        event["etag"] = f'"{len(self.changes) + 1}"'
+        events[event_id] = event
+        self._record(calendar_id, event_id)
+        return dict(event)
+
+    def _delete(self, calendar_id, event_id):
+        events = self.events_by_calendar.get(calendar_id, {})
+        if event_id not in events:
+            raise http_error(404, "not found")
+        del events[event_id]
+        self._record(calendar_id, event_id)
+        return ""
+
+    def _list(self, calendar_id, max_results, page_token, sync_token, time_min, time_max, updated_min=None):
+        self.list_calls += 1
+        events = self.events_by_calendar.get(calendar_id, {})
+        if updated_min is not None:
+            if updated_min < self.min_valid_updated:
+                raise http_error(410, "updatedMin too far in the past")
+            latest = {}
+            # Change times only grow, so skip straight to the first one at or after updatedMin
+            first = bisect.bisect_left(self.changes, updated_min, key=lambda change: self.change_times[change[0]])
+            for seq, cal, event_id in self.changes[first:]:
+                if cal == calendar_id:
+                    latest[event_id] = seq
+            items = [events[i] if i in events else {"id": i, "status": "cancelled"} for i in latest]
+        elif sync_token is not None:
+            since = int(sync_token)
+            if since < self.min_valid_token:
+                raise http_error(410, "sync token expired")
+            changed = {}  # insertion-ordered set
+            for seq, cal, event_id in self.changes[since:]:
+                if cal == calendar_id:
+                    changed[event_id] = None
+            items = [events[i] if i in events else {"id": i, "status": "cancelled"} for i in changed]
+        else:
+            items = self._full_listing(calendar_id, events, time_min, time_max)
+
+        offset = int(page_token or 0)
+        page = {"items": [dict(e) for e in items[offset:offset + max_results]]}
+        if offset + max_results < len(items):
+            page["nextPageToken"] = str(offset + max_results)
+        else:
+            page["nextSyncToken"] = str(self._current_seq())
+        # Collection etag: changes whenever anything in this calendar does
+        last = self._last_change.get(calendar_id, 0)
+        page["etag"] = '"%d"' % last
+        page["updated"] = self.change_times.get(last, "1970-01-01T00:00:00+00:00")
+        return page
+
+    def _full_listing(self, calendar_id, events, time_min, time_max):
+        """Events in the range, in start order; reused for the following pages of the same listing."""
+        key = (calendar_id, time_min, time_max, self._last_change.get(calendar_id, 0))
+        if self._listing is not None and self._listing[0] == key:
+            return self._listing[1]
+        ordered, starts = self._in_start_order(calendar_id, events)
+        first, end, running = 0, len(ordered), []
+        if time_min:
+            low = datetime.fromisoformat(time_min)
+            first = bisect.bisect_left(starts, low)
+            running = [e for e in ordered[:first] if _end_after(e, low)]
+        if time_max:
+            end = max(first, bisect.bisect_left(starts, datetime.fromisoformat(time_max)))
+        items = running + ordered[first:end]
+        self._listing = (key, items)
+        return items
+
+    def _in_start_order(self, calendar_id, events):
+        """A calendar's events sorted by start, with their start times; re-sorted only after a change."""
+        version = (calendar_id, self._last_change.get(calendar_id, 0))
+        cached = self._sorted.get(calendar_id)
+        if cached is None or cached[0] != version:
+            ordered = sorted(events.values(), key=_start_key)
+            cached = self._sorted[calendar_id] = (version, ordered, [_start_key(e) for e in ordered])
+        return cached[1], cached[2]
+
+def _end_after(event, moment):
+    end = event.get("end", {}).get("dateTime")
+    if not end:
+        return False
+    dt = datetime.fromisoformat(end)
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)) > moment
@@ -0,0 +1,141 @@
+import sys
+import os
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import httplib2
+import pytest
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import api_limits
+from api_limits import ApiLimiter, RetryPolicy, TokenBucket, is_retryable, retry_after_seconds
+from googleapiclient.errors import HttpError
+from fake_calendar import http_error
+
+
+class FakeClock:
+    """A clock that only moves when the limiter sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _limiter(**kwargs):
+    clock = FakeClock()
+    return ApiLimiter(sleep=clock.sleep, clock=clock, **kwargs), clock
+
+
+def _request(*outcomes):
+    """A request whose execute() raises or returns each outcome in turn."""
+    request = MagicMock()
+    request.execute.side_effect = list(outcomes)
+    return request
+
+
+def _with_retry_after(status, value):
+    return HttpError(httplib2.Response({"status": status, "retry-after": value}), b"slow down")
+
+
+def test_bucket_allows_burst_then_spaces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(1.0)  # queued behind the previous caller
+    clock.now += 10
+    assert bucket.acquire() == 0
+
+
+def test_oversized_batch_drains_bucket_instead_of_waiting_forever():
+    bucket = TokenBucket(rate=10, burst=5, clock=FakeClock())
+    assert bucket.acquire(50) == 0
+    assert bucket.acquire(1) == pytest.approx(0.1)
+
+
+def test_limiter_throttles_and_counts():
+    limiter, clock = _limiter(limits={"list": (1.0, 2)})
+    for _ in range(4):
+        limiter.execute(_request({"items": []}), "list")
+    assert clock.slept == [1.0, 1.0]
+    stats = limiter.snapshot()["list"]
+    assert stats["calls"] == 4
+    assert stats["throttled"] == 2
+    assert stats["throttle_seconds"] == pytest.approx(2.0)
+
+
+@patch("api_limits.print")
+def test_retries_transient_errors_with_backoff(mock_print):
+    limiter, clock = _limiter(policies={"insert": RetryPolicy(max_retries=3, base_delay=1, max_delay=8)})
+    request = _request(http_error(503), http_error(429), {"id": "x"})
+    assert limiter.execute(request, "insert") == {"id": "x"}
+    assert request.execute.call_count == 3
+    assert 0.5 <= clock.slept[0] <= 1 and 1 <= clock.slept[1] <= 2
+    assert limiter.stats["insert"]["retries"] == 2
+    assert limiter.stats["insert"]["failures"] == 0
+
+
+def test_non_retryable_errors_raise_immediately():
+    limiter, _ = _limiter()
+    request = _request(http_error(400))
+    with pytest.raises(HttpError):
+        limiter.execute(request, "insert")
+    assert request.execute.call_count == 1
+    assert limiter.stats["insert"]["failures"] == 1
+
+
+@patch("api_limits.print")
+def test_gives_up_after_max_retries(mock_print):
+    limiter, _ = _limiter(policies={"delete": RetryPolicy(max_retries=2)})
+    request = _request(*[http_error(500)] * 5)
+    with pytest.raises(HttpError):
+        limiter.execute(request, "delete")
+    assert request.execute.call_count == 3
+
+
+@patch("api_limits.print")
+def test_honors_retry_after(mock_print):
+    limiter, clock = _limiter()
+    request = _request(_with_retry_after(429, "7"), {"ok": True})
+    limiter.execute(request, "list")
+    assert clock.slept == [7.0]
+
+
+def test_retry_after_beyond_max_delay_is_left_to_caller():
+    limiter, clock = _limiter(policies={"list": RetryPolicy(max_delay=30)})
+    with pytest.raises(HttpError):
+        limiter.execute(_request(_with_retry_after(503, "120")), "list")
+    assert clock.slept == []
+
+
+def test_retry_after_accepts_http_dates():
+    error = _with_retry_after(429, "Wed, 21 Oct 2026 07:28:30 GMT")
+    now = datetime(2026, 10, 21, 7, 28, 0, tzinfo=timezone.utc)
+    assert retry_after_seconds(error, now=now) == 30
+    assert retry_after_seconds(http_error(429)) is None
+
+
+def test_retryable_classification():
+    assert is_retryable(http_error(429))
+    assert is_retryable(http_error(403, "rateLimitExceeded"))
+    assert is_retryable(http_error(502))
+    assert not is_retryable(http_error(403, "forbidden"))
+    assert not is_retryable(http_error(404))
+    assert not is_retryable(http_error(410))
+    assert not is_retryable(ValueError("boom"))
+
+
+def test_configure_changes_one_operation_only():
+    limiter, _ = _limiter()
+    limiter.configure("insert", rate=1)
+    assert limiter.buckets["insert"].rate == 1
+    assert limiter.buckets["insert"].burst == api_limits.OPERATION_LIMITS["insert"][1]
+    assert limiter.buckets["delete"].rate == api_limits.OPERATION_LIMITS["delete"][0]
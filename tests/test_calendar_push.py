@@ -0,0 +1,76 @@
+import sys
+import os
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from calendar_push import PushReceiver, watch_calendar, stop_channel
+from poll_scheduler import PollScheduler
+
+
+@pytest.fixture
+def receiver():
+    received = []
+    server = PushReceiver(received.append, port=0, token="secret").start()
+    server.received = received
+    yield server
+    server.stop()
+
+
+def _notify(port, state, token="secret"):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/", data=b"", method="POST", headers={
+        "X-Goog-Channel-ID": "chan",
+        "X-Goog-Channel-Token": token,
+        "X-Goog-Resource-ID": "res",
+        "X-Goog-Resource-State": state,
+        "X-Goog-Message-Number": "2"
+    })
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status
+
+
+def test_exists_notification_is_passed_on(receiver):
+    assert _notify(receiver.port, "exists") == 200
+    assert receiver.received == [{"channel_id": "chan", "resource_id": "res", "state": "exists", "message_number": "2"}]
+
+
+def test_sync_handshake_is_ignored(receiver):
+    assert _notify(receiver.port, "sync") == 200
+    assert receiver.received == []
+    assert receiver.notifications == 0
+
+
+def test_wrong_token_is_rejected(receiver):
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        _notify(receiver.port, "exists", token="nope")
+    assert exc.value.code == 403
+    assert receiver.received == []
+
+
+def test_notification_wakes_scheduler():
+    scheduler = PollScheduler()
+    for _ in range(5):
+        scheduler.record_result(changed=False)
+    assert not scheduler.due()
+    server = PushReceiver(lambda info: scheduler.wake(), port=0).start()
+    try:
+        _notify(server.port, "exists")
+    finally:
+        server.stop()
+    assert scheduler.due()
+
+
+def test_watch_and_stop_channel_requests():
+    service = MagicMock()
+    service.events().watch().execute.return_value = {"id": "chan", "resourceId": "res"}
+    channel = watch_calendar(service, "https://example.com/hook", token="secret", channel_id="chan", calendar_id="cal")
+    service.events().watch.assert_called_with(calendarId="cal", body={
+        "id": "chan", "type": "web_hook", "address": "https://example.com/hook",
+        "params": {"ttl": str(7 * 24 * 3600)}, "token": "secret"
+    })
+    stop_channel(service, channel)
+    service.channels().stop.assert_called_with(body={"id": "chan", "resourceId": "res"})
@@ -2,12 +2,23 @@ import sys
 import os
 import pickle
 import json
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock, mock_open
 
 # ✅ Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import calendar_utils as utils
+import pytest
+
+
+# 🔁 Fixture: every test starts with an empty service cache
+@pytest.fixture(autouse=True)
+def reset_service_cache():
+    utils.reset_calendar_service()
+    yield
+    utils.reset_calendar_service()
 
 @patch("calendar_utils.pickle.dump")
 @patch("calendar_utils.pickle.load")
@@ -93,7 +104,7 @@ def test_delete_task_not_found(mock_list):
 
 @patch("builtins.open", new_callable=mock_open)
 @patch("calendar_utils.json.dump")
-@patch("calendar_utils.list_all_events")
+@patch("calendar_utils.iter_events")
 @patch("calendar_utils.print")
 def test_backup_calendar_to_json(mock_print, mock_list_all_events, mock_json_dump, mock_open_file):
     mock_service = MagicMock()
@@ -188,3 +199,430 @@ def test_get_calendar_service_refresh_token(mock_request, mock_build, mock_open_
     service = utils.get_calendar_service()
     assert service == mock_build.return_value
     mock_creds.refresh.assert_called_once_with(mock_request.return_value)
+
+
+@patch("calendar_utils._load_credentials")
+@patch("calendar_utils.build")
+def test_get_calendar_service_is_cached(mock_build, mock_load_creds):
+    mock_load_creds.return_value = MagicMock(valid=True, expiry=None)
+
+    first = utils.get_calendar_service()
+    second = utils.get_calendar_service()
+
+    assert first is second
+    mock_build.assert_called_once()
+    mock_load_creds.assert_called_once()
+    assert utils.service_cache_stats["misses"] == 1
+    assert utils.service_cache_stats["hits"] == 1
+    assert utils.service_cache_stats["rebuilds"] == 0
+
+
+@patch("calendar_utils._save_credentials")
+@patch("calendar_utils.Request")
+@patch("calendar_utils._load_credentials")
+@patch("calendar_utils.build")
+def test_get_calendar_service_refreshes_before_expiry(mock_build, mock_load_creds, mock_request, mock_save):
+    expiring = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=1)
+    creds = MagicMock(valid=True, expiry=expiring, refresh_token="r")
+    mock_load_creds.return_value = creds
+
+    utils.get_calendar_service()
+    utils.get_calendar_service()
+
+    creds.refresh.assert_called_once_with(mock_request.return_value)
+    mock_save.assert_called_once_with(creds)
+    mock_build.assert_called_once()
+    assert utils.service_cache_stats["refreshes"] == 1
+
+
+@patch("calendar_utils._save_credentials")
+@patch("calendar_utils.Request")
+@patch("calendar_utils._load_credentials")
+@patch("calendar_utils.build")
+@patch("calendar_utils.print")
+def test_get_calendar_service_rebuilds_when_refresh_fails(mock_print, mock_build, mock_load_creds, mock_request, mock_save):
+    expiring = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=1)
+    creds = MagicMock(valid=True, expiry=expiring, refresh_token="r")
+    creds.refresh.side_effect = utils.RefreshError("revoked")
+    mock_load_creds.return_value = creds
+
+    utils.get_calendar_service()
+    utils.get_calendar_service()
+
+    assert mock_build.call_count == 2
+    assert utils.service_cache_stats["rebuilds"] == 1
+
+
+@patch("calendar_utils._load_credentials")
+@patch("calendar_utils.build")
+def test_get_calendar_service_without_refresh_token_is_cached_until_expiry(mock_build, mock_load_creds):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    creds = MagicMock(valid=True, expiry=now + timedelta(minutes=1), refresh_token=None)
+    mock_load_creds.return_value = creds
+
+    first = utils.get_calendar_service()
+    assert utils.get_calendar_service() is first
+    mock_load_creds.assert_called_once()
+    assert utils.service_cache_stats["hits"] == 1 and utils.service_cache_stats["rebuilds"] == 0
+
+    creds.expiry = now - timedelta(seconds=1)
+    utils.get_calendar_service()
+    assert mock_build.call_count == 2
+    assert utils.service_cache_stats["rebuilds"] == 1
+
+
+@patch("calendar_utils._load_credentials")
+@patch("calendar_utils.build")
+def test_invalidate_calendar_service_forces_rebuild(mock_build, mock_load_creds):
+    mock_load_creds.return_value = MagicMock(valid=True, expiry=None)
+
+    utils.get_calendar_service()
+    utils.invalidate_calendar_service()
+    utils.get_calendar_service()
+
+    assert mock_build.call_count == 2
+    assert utils.service_cache_stats["misses"] == 1
+    assert utils.service_cache_stats["rebuilds"] == 1
+
+
+def test_is_auth_error():
+    resp = MagicMock(status=401)
+    assert utils.is_auth_error(utils.HttpError(resp, b"unauthorized"))
+    assert utils.is_auth_error(utils.RefreshError("expired"))
+    assert not utils.is_auth_error(utils.HttpError(MagicMock(status=500), b"boom"))
+    assert not utils.is_auth_error(ValueError("nope"))
+
+
+def _http_error(status):
+    return utils.HttpError(MagicMock(status=status), b"error")
+
+
+def test_calendar_sync_full_then_incremental():
+    mock_service = MagicMock()
+    list_call = mock_service.events.return_value.list
+    list_call.return_value.execute.side_effect = [
+        {"items": [{"id": "a", "updated": "1"}], "nextPageToken": "p2"},
+        {"items": [{"id": "b", "updated": "1"}], "nextSyncToken": "s1"},
+        {"items": [
+            {"id": "a", "updated": "2"},
+            {"id": "b", "status": "cancelled"},
+            {"id": "c", "updated": "1"},
+        ], "nextSyncToken": "s2"},
+        {"items": [], "nextSyncToken": "s3"},
+    ]
+
+    sync = utils.CalendarSync()
+    changes = sync.sync(mock_service)
+    assert changes == {"added": ["a", "b"], "updated": [], "removed": []}
+    assert sync.sync_token == "s1"
+    assert list_call.call_args_list[1].kwargs["pageToken"] == "p2"
+
+    changes = sync.sync(mock_service)
+    assert changes == {"added": ["c"], "updated": ["a"], "removed": ["b"]}
+    assert list_call.call_args.kwargs["syncToken"] == "s1"
+    assert set(sync.events) == {"a", "c"}
+
+    changes = sync.sync(mock_service)
+    assert not utils.has_changes(changes)
+    assert sync.sync_token == "s3"
+
+
+@patch("calendar_utils.print")
+def test_calendar_sync_resyncs_on_410(mock_print):
+    mock_service = MagicMock()
+    list_call = mock_service.events.return_value.list
+    list_call.return_value.execute.side_effect = [
+        {"items": [{"id": "a", "updated": "1"}, {"id": "b", "updated": "1"}], "nextSyncToken": "s1"},
+        _http_error(410),
+        {"items": [{"id": "a", "updated": "1"}], "nextSyncToken": "fresh"},
+    ]
+
+    sync = utils.CalendarSync()
+    sync.sync(mock_service)
+    changes = sync.sync(mock_service)
+
+    assert changes == {"added": [], "updated": [], "removed": ["b"]}
+    assert sync.sync_token == "fresh"
+    assert "syncToken" not in list_call.call_args.kwargs
+
+
+@patch("api_limits.print")
+def test_calendar_sync_other_errors_propagate(mock_print):
+    mock_service = MagicMock()
+    mock_service.events.return_value.list.return_value.execute.side_effect = [
+        {"items": [], "nextSyncToken": "s1"},
+        *[_http_error(500)] * 4,
+    ]
+    sync = utils.CalendarSync()
+    sync.sync(mock_service)
+    with patch.object(utils.api_limiter, "sleep"), pytest.raises(utils.HttpError):
+        sync.sync(mock_service)
+    assert sync.sync_token == "s1"
+    assert utils.api_limiter.stats["list"]["retries"] == 3
+    assert utils.api_limiter.stats["list"]["failures"] == 1
+
+
+def test_calendar_sync_upcoming_events_sorted_and_filtered():
+    sync = utils.CalendarSync()
+    for event in [
+        {"id": "past", "start": {"dateTime": "2020-01-01T10:00:00+00:00"},
+         "end": {"dateTime": "2020-01-01T11:00:00+00:00"}},
+        {"id": "late", "start": {"dateTime": "2030-01-02T10:00:00Z"}},
+        {"id": "early", "start": {"date": "2030-01-01"}, "end": {"date": "2030-01-02"}},
+    ]:
+        sync.index.add(event)
+    upcoming = sync.upcoming_events(since=datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert [e["id"] for e in upcoming] == ["early", "late"]
+
+
+class FakeBatch:
+    """Stands in for a BatchHttpRequest: runs the callback for each added request on execute()."""
+
+    def __init__(self, callback, failures):
+        self.callback = callback
+        self.failures = failures
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            event_id = request.kwargs["eventId"]
+            self.callback(request_id, None, self.failures.get(event_id))
+
+
+def _batch_service(failures=None):
+    service = MagicMock()
+    batches = []
+
+    def new_batch(callback):
+        batches.append(FakeBatch(callback, failures or {}))
+        return batches[-1]
+
+    service.new_batch_http_request.side_effect = new_batch
+    service.events.return_value.delete.side_effect = lambda **kwargs: MagicMock(kwargs=kwargs)
+    return service, batches
+
+
+@patch("calendar_utils.print")
+def test_delete_tasks_batches_by_id(mock_print):
+    service, batches = _batch_service()
+    ids = [f"e{i}" for i in range(120)]
+
+    results = utils.delete_tasks(service, ids)
+
+    assert [len(b.requests) for b in batches] == [50, 50, 20]
+    assert all(r["ok"] for r in results)
+    assert [r["event_id"] for r in results] == ids
+    service.events.return_value.list.assert_not_called()
+
+
+@patch("calendar_utils.print")
+@patch("calendar_utils.list_all_events")
+def test_delete_tasks_resolves_titles_from_one_listing(mock_list, mock_print):
+    mock_list.return_value = [
+        {"id": "a", "summary": "A", "start": {"dateTime": "2025-04-20T10:00:00"}},
+        {"id": "b", "summary": "B", "start": {"dateTime": "2025-04-20T11:00:00"}},
+    ]
+    service, batches = _batch_service(failures={"b": _http_error(500)})
+
+    results = utils.delete_tasks(service, [("A", "2025-04-20T10:00"), ("B", "2025-04-20T11:00"),
+                                           ("Missing", "2025-04-20T12:00"), "c"])
+
+    mock_list.assert_called_once()
+    assert len(batches) == 1
+    assert [r["ok"] for r in results] == [True, False, False, True]
+    assert results[2]["error"] == "no matching event"
+    assert results[2]["event_id"] is None
+    assert results[1]["error"]
+
+
+@patch("calendar_utils.print")
+def test_delete_tasks_treats_already_deleted_as_ok(mock_print):
+    service, _ = _batch_service(failures={"gone": _http_error(410)})
+    results = utils.delete_tasks(service, ["gone"], index=utils.EventIndex())
+    assert results[0]["ok"] is True
+
+
+
+@patch("calendar_utils.print")
+def test_create_events_batches_and_resends_throttled_inserts(mock_print):
+    from fake_calendar import FakeCalendarService
+    service = FakeCalendarService()
+    service.insert_failures = [None, 429, 400]
+    bodies = [{"id": f"id{i}", "summary": f"T{i}", "start": {"dateTime": "2030-01-01T09:00:00Z"}} for i in range(5)]
+    bodies.append(dict(bodies[0]))  # same id again: already created counts as ok
+    with patch.object(utils.api_limiter, "sleep") as mock_sleep:
+        results = utils.create_events(service, bodies, batch_size=4)
+
+    assert [r["ok"] for r in results] == [True, True, False, True, True, True]
+    assert results[2]["status"] == 400 and results[2]["error"]
+    assert results[1]["event"]["id"] == "id1"
+    mock_sleep.assert_called_once()  # one wait before resending the throttled insert
+    assert sorted(service.events_by_calendar[utils.CALENDAR_ID]) == ["id0", "id1", "id3", "id4"]
+
+def test_event_match_key_normalizes_offsets_and_seconds():
+    utc = utils.event_match_key("Task ", "2025-04-20T14:00:59Z")
+    offset = utils.event_match_key("Task", "2025-04-20T10:00:00-04:00")
+    naive_ny = utils.event_match_key("Task", "2025-04-20T10:00", tz="America/New_York")
+    assert utc == offset == naive_ny == ("Task", "2025-04-20T14:00")
+
+
+def test_event_index_lookup_by_id_and_key():
+    index = utils.EventIndex([
+        {"id": "a", "summary": "Standup", "start": {"dateTime": "2025-04-20T10:00:00-04:00"}},
+        {"id": "b", "summary": "Standup", "start": {"dateTime": "2025-04-20T10:00:00-04:00"}},
+        {"id": "allday", "summary": "Holiday", "start": {"date": "2025-04-21"}},
+    ])
+    assert len(index) == 3 and "allday" in index
+    assert index.find("Standup", "2025-04-20T14:00:00+00:00") == "a"
+
+    index.remove("a")
+    assert index.find("Standup", "2025-04-20T10:00") == "b"
+    index.remove("b")
+    assert index.find("Standup", "2025-04-20T10:00") is None
+    assert index.by_key == {}
+
+    # Re-adding an event with a new start moves its key
+    index.add({"id": "c", "summary": "Move me", "start": {"dateTime": "2025-04-20T09:00:00Z"}})
+    index.add({"id": "c", "summary": "Move me", "start": {"dateTime": "2025-04-20T11:00:00Z"}})
+    assert index.find("Move me", "2025-04-20T09:00:00Z") is None
+    assert index.find("Move me", "2025-04-20T11:00:00Z") == "c"
+
+
+def test_event_index_lookup_and_remove_do_not_interleave():
+    """A calendar syncing in the background and an op log flush can use the same index."""
+    index = utils.EventIndex([{"id": "a", "summary": "Standup", "start": {"dateTime": "2025-04-20T10:00:00Z"}}])
+    looking_up = threading.Event()
+
+    class SlowLookups(dict):
+        def get(self, key, default=None):
+            ids = super().get(key, default)
+            if not looking_up.is_set():
+                looking_up.set()
+                time.sleep(0.1)  # the other thread's remove lands here unless it waits
+            return ids
+
+    index.by_key = SlowLookups(index.by_key)
+    found = []
+    lookup = threading.Thread(target=lambda: found.append(index.find("Standup", "2025-04-20T10:00:00Z")))
+    lookup.start()
+    looking_up.wait()
+    index.remove("a")
+    lookup.join()
+    assert found == ["a"]
+    assert len(index) == 0 and index.by_key == {}
+
+
+@patch("calendar_utils.list_all_events")
+@patch("calendar_utils.print")
+def test_delete_task_with_index_skips_listing(mock_print, mock_list):
+    mock_service = MagicMock()
+    index = utils.EventIndex([{"id": "abc", "summary": "Task", "start": {"dateTime": "2025-04-20T10:00:00-04:00"}}])
+
+    utils.delete_task(mock_service, "Task", "2025-04-20T10:00", index=index)
+
+    mock_list.assert_not_called()
+    mock_service.events.return_value.delete.assert_called_once_with(calendarId=utils.CALENDAR_ID, eventId="abc")
+    assert "abc" not in index
+
+    utils.delete_task(mock_service, "Task", "2025-04-20T10:00", index=index)
+    mock_print.assert_called_with("❌ No matching event found for deletion: Task at 2025-04-20T10:00")
+
+
+def test_calendar_sync_keeps_index_current():
+    mock_service = MagicMock()
+    mock_service.events.return_value.list.return_value.execute.side_effect = [
+        {"items": [{"id": "a", "updated": "1", "summary": "A", "start": {"dateTime": "2025-04-20T10:00:00Z"}}],
+         "nextSyncToken": "s1"},
+        {"items": [{"id": "a", "status": "cancelled"}], "nextSyncToken": "s2"},
+    ]
+    sync = utils.CalendarSync()
+    sync.sync(mock_service)
+    assert sync.index.find("A", "2025-04-20T10:00:00Z") == "a"
+    sync.sync(mock_service)
+    assert sync.index.find("A", "2025-04-20T10:00:00Z") is None
+
+
+def test_iter_events_follows_pages_lazily():
+    mock_service = MagicMock()
+    list_call = mock_service.events.return_value.list
+    list_call.return_value.execute.side_effect = [
+        {"items": [{"id": "1"}, {"id": "2"}], "nextPageToken": "p2"},
+        {"items": [{"id": "3"}]},
+    ]
+
+    events = utils.iter_events(mock_service, page_size=2, fields="id,summary",
+                               time_min="2025-01-01T00:00:00Z", time_max=datetime(2025, 2, 1, tzinfo=timezone.utc))
+    assert next(events)["id"] == "1"
+    assert list_call.call_count == 1  # second page not requested yet
+    assert [e["id"] for e in events] == ["2", "3"]
+
+    first, second = list_call.call_args_list
+    assert first.kwargs["maxResults"] == 2
+    assert first.kwargs["fields"] == "nextPageToken,items(id,summary)"
+    assert first.kwargs["timeMin"] == "2025-01-01T00:00:00Z"
+    assert first.kwargs["timeMax"] == "2025-02-01T00:00:00+00:00"
+    assert second.kwargs["pageToken"] == "p2"
+
+
+def test_list_all_events_is_no_longer_truncated_to_one_page():
+    mock_service = MagicMock()
+    mock_service.events.return_value.list.return_value.execute.side_effect = [
+        {"items": [{"id": str(i)} for i in range(250)], "nextPageToken": "p2"},
+        {"items": [{"id": "250"}]},
+    ]
+    assert len(utils.list_all_events(mock_service)) == 251
+
+
+def test_list_all_events_max_results_caps_total():
+    mock_service = MagicMock()
+    mock_service.events.return_value.list.return_value.execute.return_value = {
+        "items": [{"id": str(i)} for i in range(5)], "nextPageToken": "more"}
+    assert len(utils.list_all_events(mock_service, max_results=3)) == 3
+    assert mock_service.events.return_value.list.call_count == 1
+
+
+def test_list_and_insert_calls_use_the_field_mask():
+    mock_service = MagicMock()
+    events = mock_service.events.return_value
+    events.list.return_value.execute.return_value = {"items": [], "nextSyncToken": "s"}
+
+    list(utils.iter_events(mock_service))
+    assert events.list.call_args.kwargs["fields"] == f"nextPageToken,items({utils.EVENT_FIELDS})"
+
+    utils.CalendarSync().sync(mock_service)
+    assert events.list.call_args.kwargs["fields"] == f"nextPageToken,nextSyncToken,etag,items({utils.EVENT_FIELDS})"
+
+    utils.create_event(mock_service, {"summary": "x"})
+    assert events.insert.call_args.kwargs["fields"] == utils.EVENT_FIELDS
+
+    list(utils.iter_events(mock_service, fields="*"))
+    assert events.list.call_args.kwargs["fields"] is None
+
+
+def test_metered_model_counts_bytes_and_calls_hooks():
+    seen = []
+    hook = lambda num_bytes, seconds: seen.append((num_bytes, seconds))
+    utils.add_response_hook(hook)
+    before = utils.payload_stats.snapshot()
+    try:
+        data = utils.MeteredJsonModel().deserialize(b'{"items": [1, 2, 3]}')
+    finally:
+        utils.remove_response_hook(hook)
+
+    assert data == {"items": [1, 2, 3]}
+    assert seen[0][0] == 20 and seen[0][1] >= 0
+    after = utils.payload_stats.snapshot()
+    assert after["responses"] == before["responses"] + 1
+    assert after["bytes"] == before["bytes"] + 20
+
+
+def test_requests_ask_for_gzip():
+    # Built from the bundled discovery document, no network needed
+    service = utils.build('calendar', 'v3', developerKey='test', model=utils.MeteredJsonModel())
+    request = service.events().list(calendarId='primary', fields=utils.EVENT_FIELDS)
+    assert "gzip" in request.headers["accept-encoding"]
+    assert "gzip" in request.headers["user-agent"]
+    assert "fields=" in request.uri
@@ -0,0 +1,112 @@
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from calendar_utils import CalendarSync, has_changes
+from event_store import EventStore
+from fake_calendar import FakeCalendarService
+
+
+def _event(event_id, start, end=None, summary="Task"):
+    event = {"id": event_id, "summary": summary, "start": {"dateTime": start}, "updated": "1"}
+    if end:
+        event["end"] = {"dateTime": end}
+    return event
+
+
+def test_apply_get_and_delete():
+    store = EventStore(":memory:")
+    store.apply(upserts=[_event("a", "2025-04-20T10:00:00-04:00")], sync_token="t1")
+    assert store.get("a")["summary"] == "Task"
+    assert store.sync_token() == "t1"
+
+    store.apply(upserts=[_event("a", "2025-04-20T10:00:00-04:00", summary="Renamed")], deletes=["missing"])
+    assert store.get("a")["summary"] == "Renamed"
+    assert store.sync_token() == "t1"  # unchanged when no new token is given
+
+    store.apply(deletes=["a"])
+    assert store.get("a") is None
+    assert store.count() == 0
+
+
+def test_events_are_ordered_by_utc_start_and_range_queried():
+    store = EventStore(":memory:")
+    store.apply(upserts=[
+        _event("late", "2025-04-21T09:00:00Z"),
+        _event("offset", "2025-04-20T10:00:00-04:00", "2025-04-20T11:00:00-04:00"),  # 14:00 UTC
+        _event("early", "2025-04-20T12:00:00Z"),
+    ])
+    assert [e["id"] for e in store.all_events()] == ["early", "offset", "late"]
+    between = store.events_between("2025-04-20T14:30:00+00:00", "2025-04-21T00:00:00+00:00")
+    assert [e["id"] for e in between] == ["offset"]  # still running at 14:30
+
+
+def test_replace_all_and_calendars_are_separate():
+    store = EventStore(":memory:")
+    store.apply(upserts=[_event("a", "2025-04-20T10:00:00Z")], sync_token="t1")
+    store.apply(upserts=[_event("x", "2025-04-20T10:00:00Z")], calendar_id="other")
+    store.replace_all([_event("b", "2025-04-20T11:00:00Z")], sync_token="t2")
+    assert [e["id"] for e in store.all_events()] == ["b"]
+    assert store.sync_token() == "t2"
+    assert [e["id"] for e in store.all_events("other")] == ["x"]
+
+
+def test_sync_persists_and_restart_resumes_incrementally(tmp_path):
+    path = str(tmp_path / "events.db")
+    service = FakeCalendarService()
+    for i in range(300):
+        service.add_event({"summary": f"T{i}", "start": {"dateTime": f"2025-05-01T{i % 24:02d}:00:00Z"}}, "cal")
+
+    first = CalendarSync(calendar_id="cal", store=EventStore(path))
+    first.sync(service)
+    first.store.close()
+
+    # A fresh process: everything comes back from disk, no network needed
+    restarted = CalendarSync(calendar_id="cal", store=EventStore(path))
+    assert len(restarted.events) == 300
+    assert restarted.sync_token == first.sync_token
+
+    service.add_event({"summary": "New", "start": {"dateTime": "2025-05-02T09:00:00Z"}}, "cal")
+    calls_before = service.list_calls
+    changes = restarted.sync(service)
+    assert service.list_calls == calls_before + 1
+    assert len(changes["added"]) == 1 and not changes["updated"] and not changes["removed"]
+    assert restarted.store.count("cal") == 301
+
+
+def test_expired_token_full_resync_rewrites_store():
+    store = EventStore(":memory:")
+    service = FakeCalendarService()
+    keep = service.add_event({"summary": "Keep", "start": {"dateTime": "2025-05-01T09:00:00Z"}})
+    drop = service.add_event({"summary": "Drop", "start": {"dateTime": "2025-05-01T10:00:00Z"}})
+    sync = CalendarSync(calendar_id="primary", store=store)
+    sync.sync(service)
+
+    service._delete("primary", drop["id"])
+    service.expire_sync_tokens()
+    sync.sync(service)
+
+    assert [e["id"] for e in store.all_events("primary")] == [keep["id"]]
+    assert store.sync_token("primary") == sync.sync_token
+
+
+def test_unchanged_poll_skips_store_write():
+    store = EventStore(":memory:")
+    service = FakeCalendarService()
+    service.add_event({"summary": "A", "start": {"dateTime": "2025-05-01T09:00:00Z"}}, "cal")
+    sync = CalendarSync(calendar_id="cal", store=store)
+    sync.sync(service)
+    etag = sync.collection_etag
+    assert etag
+
+    with patch.object(store, "apply") as mock_apply:
+        assert not has_changes(sync.sync(service))
+    mock_apply.assert_not_called()
+    assert sync.collection_etag == etag
+
+    service.add_event({"summary": "B", "start": {"dateTime": "2025-05-01T10:00:00Z"}}, "cal")
+    assert sync.sync(service)["added"]
+    assert sync.collection_etag != etag
+    assert store.count("cal") == 2
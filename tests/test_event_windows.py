@@ -0,0 +1,159 @@
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from calendar_utils import has_changes
+from event_store import EventStore
+from event_windows import WindowedSync
+from fake_calendar import FakeCalendarService
+
+CAL = "cal"
+TODAY = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _at(days, hour=10):
+    return (TODAY + timedelta(days=days, hours=hour)).isoformat()
+
+
+def _event(summary, days):
+    return {"summary": summary, "start": {"dateTime": _at(days)}, "end": {"dateTime": _at(days, 11)}}
+
+
+def _service(days=(1, 5, 20, 40, 200)):
+    service = FakeCalendarService()
+    for d in days:
+        service.add_event(_event(f"day {d}", d), CAL)
+    return service
+
+
+def _titles(sync):
+    return sorted(e["summary"] for e in sync.events.values())
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_only_near_window_is_listed_up_front():
+    service = _service()
+    sync = WindowedSync(CAL, window_days=14)
+    changes = sync.sync(service)
+    assert len(changes["added"]) == 2
+    assert _titles(sync) == ["day 1", "day 5"]
+    assert sync.loaded_until == TODAY + timedelta(days=14)
+
+
+def test_request_more_loads_the_next_window_lazily():
+    service = _service()
+    sync = WindowedSync(CAL, window_days=14)
+    sync.sync(service)
+    assert sync.request_more() is True
+    assert sync.request_more() is False  # the requested window hasn't loaded yet
+    changes = sync.sync(service)
+    assert [sync.events[i]["summary"] for i in changes["added"]] == ["day 20"]
+    assert sync.loaded_until == TODAY + timedelta(days=28)
+
+
+def test_delta_poll_applies_only_changes_in_loaded_windows():
+    service = _service()
+    sync = WindowedSync(CAL, window_days=14)
+    sync.sync(service)
+    assert not has_changes(sync.sync(service))
+
+    near = service.add_event(_event("new near", 3), CAL)
+    service.add_event(_event("new far", 100), CAL)
+    changes = sync.sync(service)
+    assert changes["added"] == [near["id"]]
+    assert "new far" not in _titles(sync)
+    assert "new far" in [e["summary"] for e in sync.take_later_changes()]
+    assert sync.take_later_changes() == []
+
+    # Moved out of the near window: dropped; deleted: removed
+    moved = next(i for i, e in sync.events.items() if e["summary"] == "day 1")
+    service.update_event(CAL, moved, start={"dateTime": _at(60)}, end={"dateTime": _at(60, 11)})
+    service._delete(CAL, near["id"])
+    changes = sync.sync(service)
+    assert sorted(changes["removed"]) == sorted([moved, near["id"]])
+    assert _titles(sync) == ["day 5"]
+    assert {moved, near["id"]} <= {e["id"] for e in sync.take_later_changes()}
+
+
+def test_delta_poll_lists_no_window_again():
+    service = _service()
+    sync = WindowedSync(CAL, window_days=14)
+    sync.sync(service)
+    service.add_event(_event("another", 2), CAL)
+    with patch.object(service, "_list", wraps=service._list) as spy:
+        sync.sync(service)
+    assert spy.call_count == 1
+    assert spy.call_args.args[6] is not None  # updatedMin query, no timeMin/timeMax
+    assert spy.call_args.args[4] is None
+
+
+def test_windows_move_forward_when_the_date_changes():
+    service = _service(days=(0, 1, 5, 15, 20))
+    today = [TODAY]
+    sync = WindowedSync(CAL, window_days=14, today=lambda: today[0])
+    sync.sync(service)
+    sync.request_more()
+    sync.sync(service)
+    assert _titles(sync) == ["day 0", "day 1", "day 15", "day 20", "day 5"]
+
+    # Two days later, without a restart: still two windows, now from the new today
+    today[0] = TODAY + timedelta(days=2)
+    changes = sync.sync(service)
+    assert [w.start for w in sync.windows] == [TODAY + timedelta(days=2), TODAY + timedelta(days=16)]
+    assert sync.loaded_until == TODAY + timedelta(days=30)
+    assert sorted(changes["removed"]) == sorted(e["id"] for e in service.events_by_calendar[CAL].values()
+                                                if e["summary"] in ("day 0", "day 1"))
+    assert _titles(sync) == ["day 15", "day 20", "day 5"]
+    assert sync.sync(service)["removed"] == []  # same day again: nothing moves
+
+
+def test_invalidate_and_ttl_relist_a_window():
+    service = _service()
+    clock = Clock()
+    sync = WindowedSync(CAL, window_days=14, ttl=100, clock=clock)
+    sync.sync(service)
+    sync.request_more()
+    sync.sync(service)
+
+    calls = service.list_calls
+    sync.invalidate(TODAY + timedelta(days=20))
+    sync.sync(service)
+    assert service.list_calls == calls + 2  # the second window, then the delta poll
+
+    clock.now = 150
+    calls = service.list_calls
+    sync.sync(service)
+    assert service.list_calls == calls + 3  # both windows expired
+
+
+@patch("event_windows.print")
+def test_expired_watermark_relists_loaded_windows(mock_print):
+    service = _service()
+    sync = WindowedSync(CAL, window_days=14)
+    sync.sync(service)
+    service.expire_sync_tokens()
+    service.add_event(_event("after expiry", 4), CAL)
+    sync.sync(service)  # 410: windows are marked for a full listing
+    changes = sync.sync(service)
+    assert [sync.events[i]["summary"] for i in changes["added"]] == ["after expiry"]
+
+
+def test_store_renders_near_window_and_receives_changes(tmp_path):
+    service = _service()
+    store = EventStore(str(tmp_path / "events.db"))
+    sync = WindowedSync(CAL, window_days=14, store=store)
+    sync.sync(service)
+    assert len(store.all_events(CAL)) == 2
+
+    restarted = WindowedSync(CAL, window_days=14, store=store)
+    assert _titles(restarted) == ["day 1", "day 5"]
+    store.close()
@@ -0,0 +1,57 @@
+import sys
+import os
+import pytest
+from googleapiclient.errors import HttpError
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fake_calendar import FakeCalendarService
+
+
+def _events(n):
+    return [("cal", {"summary": f"E{i}", "start": {"dateTime": f"2030-01-01T{i % 24:02d}:00:00+00:00"}}) for i in range(n)]
+
+
+def test_latency_is_per_http_request_and_a_batch_is_one():
+    slept = []
+    service = FakeCalendarService(_events(3), latency=0.25, sleep=slept.append)
+    service.events().list(calendarId="cal").execute()
+    batch = service.new_batch_http_request(callback=lambda *args: None)
+    for event_id in ("evt1", "evt2"):
+        batch.add(service.events().delete(calendarId="cal", eventId=event_id))
+    batch.execute()
+    assert slept == [0.25, 0.25]
+    assert service.requests == 2
+
+
+def test_error_rate_fails_a_repeatable_share_of_calls():
+    def failures(seed):
+        service = FakeCalendarService(_events(1), error_rate=0.3, seed=seed)
+        statuses = []
+        for _ in range(200):
+            try:
+                service.events().list(calendarId="cal").execute()
+                statuses.append(None)
+            except HttpError as e:
+                statuses.append(e.resp.status)
+        return statuses
+
+    statuses = failures(seed=1)
+    assert 30 < statuses.count(503) < 90
+    assert set(statuses) == {None, 503}
+    assert failures(seed=1) == statuses
+
+
+def test_listing_pages_a_large_calendar_in_start_order():
+    service = FakeCalendarService(_events(1000))
+    page = service.events().list(calendarId="cal", maxResults=400, timeMin="2030-01-01T12:00:00+00:00").execute()
+    items = page["items"]
+    while "nextPageToken" in page:
+        page = service.events().list(calendarId="cal", maxResults=400, pageToken=page["nextPageToken"],
+                                     timeMin="2030-01-01T12:00:00+00:00").execute()
+        items += page["items"]
+    starts = [e["start"]["dateTime"] for e in items]
+    assert starts == sorted(starts) and starts[0] == "2030-01-01T12:00:00+00:00"
+    assert len(items) == sum(1 for i in range(1000) if i % 24 >= 12)
+    with pytest.raises(HttpError):
+        service.events().delete(calendarId="cal", eventId="missing").execute()
@@ -0,0 +1,91 @@
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import calendar_utils as utils
+from http_pool import ThreadLocalHttp
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        body = b'{"items": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_on_one_thread_reuse_one_connection(stub_server):
+    server, url = stub_server
+    pool = ThreadLocalHttp()
+    for _ in range(5):
+        response, content = pool.request(url)
+        assert response.status == 200 and content == b'{"items": []}'
+    pool.close()
+    assert server.connections == 1
+    assert pool.transports_created == 1
+
+
+def test_each_thread_gets_its_own_transport(stub_server):
+    server, url = stub_server
+    pool = ThreadLocalHttp()
+    seen = []
+
+    def worker():
+        for _ in range(3):
+            pool.request(url)
+        seen.append(pool.http())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.close()
+    assert len({id(http) for http in seen}) == 3
+    assert server.connections == 3
+
+
+def test_credentials_wrap_transport_and_are_visible_to_batches():
+    creds = MagicMock()
+    pool = ThreadLocalHttp(creds)
+    assert pool.http().credentials is creds
+    assert pool.credentials is creds
+    assert pool.http() is pool.http()
+
+
+@patch("calendar_utils._load_credentials")
+@patch("calendar_utils.build")
+def test_service_is_built_on_pooled_transport(mock_build, mock_load_creds):
+    utils.reset_calendar_service()
+    utils.get_calendar_service()
+    http = mock_build.call_args.kwargs["http"]
+    assert isinstance(http, ThreadLocalHttp)
+    assert http.credentials is mock_load_creds.return_value
+    utils.reset_calendar_service()
@@ -0,0 +1,73 @@
+import sys
+import os
+import threading
+import time
+from concurrent.futures import wait
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from io_worker import IOWorker
+
+
+def test_callbacks_run_on_the_draining_thread():
+    worker = IOWorker()
+    seen = []
+    worker.submit(lambda: threading.current_thread().name,
+                  on_done=lambda name: seen.append((name, threading.current_thread().name)))
+    worker.flush()
+    job_thread, callback_thread = seen[0]
+    assert job_thread.startswith("calendar-io")
+    assert callback_thread == threading.current_thread().name
+    worker.shutdown()
+
+
+def test_errors_go_to_on_error():
+    worker = IOWorker()
+    errors = []
+
+    def boom():
+        raise ValueError("network down")
+
+    worker.submit(boom, on_done=lambda r: errors.append("wrong"), on_error=errors.append)
+    worker.flush()
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+    worker.shutdown()
+
+
+def test_submit_does_not_block_on_slow_calls():
+    worker = IOWorker()
+    release = threading.Event()
+    start = time.perf_counter()
+    worker.submit(release.wait)
+    assert time.perf_counter() - start < 0.5
+    assert worker.pending == 1
+    assert worker.drain() == 0
+    release.set()
+    worker.flush()
+    assert worker.pending == 0
+    worker.shutdown()
+
+
+def test_drain_respects_budget():
+    worker = IOWorker()
+    ran = []
+    futures = [
+        worker.submit(lambda i=i: i, on_done=lambda i: (ran.append(i), time.sleep(0.01)))
+        for i in range(5)
+    ]
+    wait(futures)
+    assert worker.drain(budget=0.001) == 1
+    worker.flush()
+    assert sorted(ran) == [0, 1, 2, 3, 4]
+    worker.shutdown()
+
+
+def test_failing_callback_does_not_break_drain(capsys):
+    worker = IOWorker()
+    done = []
+    worker.submit(lambda: 1, on_done=lambda r: 1 / 0)
+    worker.submit(lambda: 2, on_done=done.append)
+    worker.flush()
+    assert done == [2]
+    assert "callback" in capsys.readouterr().out
+    worker.shutdown()
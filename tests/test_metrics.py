@@ -0,0 +1,84 @@
+import sys
+import os
+import json
+import urllib.request
+import pytest
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from metrics import Metrics, metrics as app_metrics
+
+
+def test_disabled_metrics_record_nothing():
+    m = Metrics()
+    with m.span("backup_write"):
+        pass
+    m.count("events_parsed", 5)
+    assert m.span("a") is m.span("b")  # one shared no-op
+    assert m.snapshot() == {"counters": {}, "spans": {}}
+
+
+def test_spans_fill_a_histogram_and_count_errors():
+    m = Metrics(buckets=(0.5, 1.0)).enable()
+    m._finish("api_request", {"op": "list"}, 0.0, 0.2, False)
+    m._finish("api_request", {"op": "list"}, 0.0, 0.7, False)
+    m._finish("api_request", {"op": "list"}, 0.0, 3.0, True)
+    m.count("events_parsed", 4)
+    text = m.to_prometheus()
+    assert "# TYPE task_scheduler_events_parsed_total counter\ntask_scheduler_events_parsed_total 4\n" in text
+    assert 'task_scheduler_span_errors_total{span="api_request",op="list"} 1' in text
+    assert 'task_scheduler_span_seconds_bucket{span="api_request",op="list",le="0.5"} 1' in text
+    assert 'task_scheduler_span_seconds_bucket{span="api_request",op="list",le="1.0"} 2' in text
+    assert 'task_scheduler_span_seconds_bucket{span="api_request",op="list",le="+Inf"} 3' in text
+    assert 'task_scheduler_span_seconds_sum{span="api_request",op="list"} 3.9' in text
+    assert 'task_scheduler_span_seconds_count{span="api_request",op="list"} 3' in text
+    with pytest.raises(ValueError):
+        with m.span("backup_write"):
+            raise ValueError("disk full")
+    assert m.snapshot()["counters"]['span_errors{span="backup_write"}'] == 1
+
+
+def test_trace_file_has_one_complete_event_per_span(tmp_path):
+    m = Metrics().enable(trace=True)
+    with m.span("calendar_sync"):
+        with m.span("api_request", op="list"):
+            pass
+    path = str(tmp_path / "trace.json")
+    m.write_trace(path)
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    assert [e["name"] for e in events] == ["api_request", "calendar_sync"]
+    inner, outer = events
+    assert inner["ph"] == "X" and inner["args"] == {"op": "list"}
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_collectors_report_existing_counters_and_failures_are_skipped(capsys):
+    m = Metrics().enable()
+    m.add_collector(lambda: [("service_cache_hits", "counter", {}, 7), ("queue_depth", "gauge", {"q": "io"}, 2)])
+    m.add_collector(lambda: 1 / 0)
+    text = m.to_prometheus()
+    assert "task_scheduler_service_cache_hits_total 7" in text
+    assert '# TYPE task_scheduler_queue_depth gauge\ntask_scheduler_queue_depth{q="io"} 2' in text
+    assert "Metrics collector failed" in capsys.readouterr().out
+
+
+def test_calendar_utils_reports_api_counters():
+    import calendar_utils
+    calendar_utils.api_limiter.reset()
+    calendar_utils.api_limiter.stats["list"]["calls"] += 3
+    assert 'task_scheduler_api_requests_total{op="list"} 3' in app_metrics.to_prometheus()
+    calendar_utils.api_limiter.reset()
+
+
+def test_serve_exposes_metrics_endpoint():
+    m = Metrics().enable()
+    m.count("events_parsed", 2)
+    server = m.serve(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert "task_scheduler_events_parsed_total 2" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,137 @@
+import sys
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import multi_calendar
+from calendar_utils import has_changes
+from multi_calendar import MultiCalendarSync, list_calendars_events, merge_by_start
+from op_log import OpLog
+from fake_calendar import FakeCalendarService
+
+BASE = datetime(2030, 1, 1, 9, 0, tzinfo=timezone.utc)
+CALENDARS = ["team", "personal", "oncall"]
+
+
+def _event(summary, hours):
+    start = BASE + timedelta(hours=hours)
+    return {"summary": summary, "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": (start + timedelta(hours=1)).isoformat()}}
+
+
+def _service():
+    service = FakeCalendarService()
+    for calendar_id, hours in zip(CALENDARS, ([0, 3, 6], [1, 4], [2, 5, 7])):
+        for h in hours:
+            service.add_event(_event(f"{calendar_id} {h}", h), calendar_id)
+    return service
+
+
+def test_merge_by_start_interleaves_sorted_streams():
+    a = [("a", _event("a0", 0)), ("a", _event("a2", 2)), ("a", {"id": "nostart"})]
+    b = [("b", _event("b1", 1)), ("b", {"start": {"dateTime": (BASE + timedelta(hours=3)).isoformat()}})]
+    merged = list(merge_by_start([a, b]))
+    assert [cal for cal, _ in merged] == ["a", "b", "a", "b", "a"]
+    assert merged[-1][1] == {"id": "nostart"}
+
+
+def test_list_calendars_events_merges_in_start_order():
+    merged = list_calendars_events(_service(), CALENDARS, max_workers=2, time_min=BASE)
+    assert [event["summary"] for _, event in merged] == [
+        "team 0", "personal 1", "oncall 2", "team 3", "personal 4", "oncall 5", "team 6", "oncall 7"
+    ]
+    assert merged[1][0] == "personal"
+
+
+@patch("multi_calendar.print")
+def test_list_calendars_events_skips_failed_calendar(mock_print):
+    real = multi_calendar.iter_events
+
+    def flaky(service, calendar_id, **kwargs):
+        if calendar_id == "personal":
+            raise RuntimeError("boom")
+        return real(service, calendar_id=calendar_id, **kwargs)
+
+    with patch("multi_calendar.iter_events", side_effect=flaky):
+        merged = list_calendars_events(_service(), CALENDARS, time_min=BASE)
+    assert {cal for cal, _ in merged} == {"team", "oncall"}
+    mock_print.assert_called_once()
+
+
+def test_sync_keeps_state_per_calendar():
+    service = _service()
+    sync = MultiCalendarSync(CALENDARS, max_workers=2)
+    first = sync.sync(service)
+    assert {cal: len(changes["added"]) for cal, changes in first["changes"].items()} == \
+        {"team": 3, "personal": 2, "oncall": 3}
+    assert len(sync.events) == 8
+    assert sync.calendar_of(next(iter(sync.syncs["oncall"].events))) == "oncall"
+    assert sync.calendar_of("local-only") == "team"
+
+    service.add_event(_event("late", 8), "personal")
+    second = sync.sync(service)
+    assert not has_changes(second["changes"]["team"])
+    assert second["changes"]["personal"]["added"]
+    assert sync.syncs["team"].collection_etag != sync.syncs["personal"].collection_etag
+    sync.shutdown()
+
+
+def test_slow_calendar_does_not_hold_back_the_others():
+    service = _service()
+    sync = MultiCalendarSync(CALENDARS)
+    release = threading.Event()
+    calls = []
+    slow_sync = sync.syncs["oncall"].sync
+
+    def slow(service):
+        calls.append(1)
+        release.wait(5)
+        return slow_sync(service)
+
+    sync.syncs["oncall"].sync = slow
+    first = sync.sync(service, timeout=0.2)
+    assert set(first["changes"]) == {"team", "personal"}
+
+    second = sync.sync(service, timeout=0.2)  # still running: not started again
+    assert "oncall" not in second["changes"]
+    assert len(calls) == 1
+
+    release.set()
+    third = sync.sync(service, timeout=5)
+    assert len(third["changes"]["oncall"]["added"]) == 3
+    sync.shutdown()
+
+
+def test_errors_are_per_calendar():
+    service = _service()
+    sync = MultiCalendarSync(CALENDARS)
+    sync.syncs["personal"].sync = lambda service: (_ for _ in ()).throw(RuntimeError("down"))
+    result = sync.sync(service)
+    assert set(result["changes"]) == {"team", "oncall"}
+    assert str(result["errors"]["personal"]) == "down"
+    sync.shutdown()
+
+
+def test_upcoming_events_merge_across_calendars():
+    sync = MultiCalendarSync(CALENDARS)
+    sync.sync(_service())
+    upcoming = sync.upcoming_events(since=BASE)
+    assert [event["summary"] for _, event in upcoming][:3] == ["team 0", "personal 1", "oncall 2"]
+    sync.shutdown()
+
+
+@patch("calendar_utils.print")
+def test_op_log_resolves_deletes_with_each_calendars_index(mock_print):
+    service = _service()
+    sync = MultiCalendarSync(CALENDARS)
+    sync.sync(service)
+    log = OpLog()
+    start = (BASE + timedelta(hours=4)).isoformat()
+    log.record_delete(("personal 4", start), calendar_id="personal")
+    result = log.replay(service, index=sync.indexes)
+    assert result["deleted"] and not result["dropped"]
+    assert len(service.events_by_calendar["personal"]) == 1
+    sync.shutdown()
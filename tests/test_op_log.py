@@ -0,0 +1,112 @@
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import op_log as oplog_module
+from calendar_utils import CALENDAR_ID
+from op_log import OpLog, is_transient
+from fake_calendar import FakeCalendarService, http_error
+
+
+def _body(summary="Task"):
+    return {"summary": summary, "start": {"dateTime": "2025-05-01T09:00:00Z"}, "end": {"dateTime": "2025-05-01T10:00:00Z"}}
+
+
+def test_create_then_delete_cancels_out():
+    log = OpLog()
+    body = log.record_create(_body())
+    assert len(body["id"]) == 32
+    assert log.record_delete(body["id"]) is False
+    assert len(log) == 0
+
+
+def test_duplicate_delete_is_queued_once():
+    log = OpLog()
+    assert log.record_delete("abc") is True
+    assert log.record_delete("abc") is False
+    assert log.pending_delete_ids() == {"abc"}
+
+
+def test_replay_sends_in_order_and_empties_log():
+    service = FakeCalendarService()
+    existing = service.add_event(_body("Old"), CALENDAR_ID)
+    log = OpLog()
+    created = log.record_create(_body("New"))
+    log.record_delete(existing["id"])
+
+    result = log.replay(service)
+
+    assert [b["id"] for b in result["created"]] == [created["id"]]
+    assert result["deleted"] == [existing["id"]]
+    assert result["error"] is None
+    assert len(log) == 0
+    assert list(service.events_by_calendar[CALENDAR_ID]) == [created["id"]]
+
+
+def test_retried_create_does_not_duplicate():
+    service = FakeCalendarService()
+    log = OpLog()
+    body = log.record_create(_body())
+    service.add_event(body, CALENDAR_ID)  # the first attempt landed but its response was lost
+
+    result = log.replay(service)
+    assert result["created"] and not result["dropped"]
+    assert len(service.events_by_calendar[CALENDAR_ID]) == 1
+
+
+def test_transient_failure_keeps_ops_and_backs_off():
+    log = OpLog()
+    log.record_create(_body())
+    with patch.object(oplog_module, "create_event", side_effect=http_error(503)), \
+            patch.object(oplog_module.time, "monotonic", return_value=100.0):
+        result = log.replay(FakeCalendarService())
+        assert result["error"] is not None
+        assert len(log) == 1
+        assert log.attempts == 1
+        assert 101.0 <= log.next_attempt <= 102.0
+        assert not log.due()
+        log.backoff("again")
+        assert 102.0 <= log.next_attempt <= 104.0
+    assert log.due(now=log.next_attempt)
+
+
+def test_permanent_failure_drops_op():
+    log = OpLog()
+    log.record_create(_body())
+    with patch.object(oplog_module, "create_event", side_effect=http_error(400)):
+        result = log.replay(FakeCalendarService())
+    assert result["error"] is None
+    assert len(result["dropped"]) == 1
+    assert len(log) == 0
+
+
+def test_is_transient():
+    assert is_transient(OSError("no route"))
+    assert is_transient(http_error(500))
+    assert is_transient(http_error(429))
+    assert is_transient(http_error(401))
+    assert not is_transient(http_error(400))
+    assert not is_transient(http_error(403, "forbidden"))
+
+
+def test_log_survives_restart(tmp_path):
+    path = str(tmp_path / "ops.jsonl")
+    log = OpLog(path)
+    kept = log.record_create(_body("Kept"))
+    gone = log.record_create(_body("Gone"))
+    log.record_delete(gone["id"])
+    log.record_delete(("Legacy", "2025-05-01T09:00"))
+    with open(path, "a") as f:
+        f.write('{"op": "create", "seq"')  # torn write from a crash
+
+    reopened = OpLog(path)
+    assert [b["id"] for b in reopened.pending_creates()] == [kept["id"]]
+    assert [op["target"] for op in reopened.pending() if op["op"] == "delete"] == [["Legacy", "2025-05-01T09:00"]]
+
+    service = FakeCalendarService()
+    service.add_event(dict(_body("Legacy"), start={"dateTime": "2025-05-01T09:00:00-04:00"}), CALENDAR_ID)
+    reopened.replay(service)
+    assert len(reopened) == 0
+    assert os.path.getsize(path) == 0  # compacted once empty
@@ -0,0 +1,63 @@
+import sys
+import os
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from perf_overlay import LoopLagProbe, RefreshTimings, count_widgets, format_overlay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeWidget:
+    def __init__(self, *children):
+        self.children = list(children)
+
+    def winfo_children(self):
+        return self.children
+
+
+def test_refresh_timings_keep_the_last_cycles_per_phase():
+    timings = RefreshTimings(size=20)
+    for i in range(25):
+        timings.record(fetch=0.1 * i, parse=0.01, diff=0.002)
+    assert len(timings.cycles) == 20
+    summary = timings.summary()
+    assert summary["render"] == (0.0, 0.0, 0.0)
+    mean, p95, worst = summary["fetch"]
+    assert abs(mean - 1.45) < 1e-9 and abs(worst - 2.4) < 1e-9 and abs(p95 - 2.4) < 1e-9
+    assert abs(summary["total"][2] - 2.412) < 1e-9
+    assert RefreshTimings().summary() == {}
+
+
+def test_loop_lag_is_how_late_the_callback_ran():
+    clock = FakeClock()
+    lag = LoopLagProbe(clock=clock)
+    assert lag.summary() is None
+    for late in (0.0, 0.03):
+        lag.scheduled(100)
+        clock.now += 0.1 + late
+        lag.fired()
+    lag.fired()  # a callback that wasn't scheduled through the probe
+    mean, _, worst = lag.summary()
+    assert len(lag.samples) == 2 and abs(mean - 0.015) < 1e-9 and abs(worst - 0.03) < 1e-9
+
+
+def test_overlay_text_shows_phases_lag_and_widgets():
+    timings, lag = RefreshTimings(), LoopLagProbe()
+    root = FakeWidget(FakeWidget(FakeWidget(), FakeWidget()), FakeWidget())
+    assert count_widgets(root) == 5
+    assert "(waiting for a sync)" in format_overlay(timings, lag, count_widgets(root))
+
+    timings.record(fetch=0.25, parse=0.0125, diff=0.001, render=0.04)
+    text = format_overlay(timings, lag, 5, row_widgets=12)
+    lines = text.splitlines()
+    assert lines[0].split() == ["last", "1", "refreshes", "mean", "p95", "max"]
+    assert lines[1].split() == ["fetch", "250.0", "250.0", "250.0"]
+    assert lines[4].split()[0] == "render" and lines[5].split()[:2] == ["total", "303.5"]
+    assert lines[-1] == "widgets: 5 (12 list rows)"
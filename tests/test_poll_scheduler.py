@@ -0,0 +1,100 @@
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import poll_scheduler as poll_module
+from poll_scheduler import PollScheduler
+from fake_calendar import http_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(min_interval=5.0, max_interval=300.0):
+    clock = FakeClock()
+    return PollScheduler(min_interval, max_interval, clock=clock), clock
+
+
+def test_first_poll_is_due_immediately():
+    scheduler, _ = _scheduler()
+    assert scheduler.due()
+
+
+@patch.object(poll_module, "JITTER", 0)
+def test_idle_polls_back_off_up_to_the_cap():
+    scheduler, clock = _scheduler(5, 20)
+    delays = []
+    for _ in range(6):
+        scheduler.record_result(changed=False)
+        delays.append(scheduler.seconds_until_due())
+    assert delays[:3] == [7.5, 11.25, 16.875]
+    assert delays[-1] == 20
+    assert not scheduler.due()
+    clock.now += 20
+    assert scheduler.due()
+
+
+@patch.object(poll_module, "JITTER", 0)
+def test_change_resets_interval():
+    scheduler, _ = _scheduler()
+    for _ in range(5):
+        scheduler.record_result(changed=False)
+    scheduler.record_result(changed=True)
+    assert scheduler.seconds_until_due() == 5
+
+
+@patch.object(poll_module, "JITTER", 0)
+def test_rate_limit_waits_at_least_the_floor():
+    scheduler, _ = _scheduler()
+    scheduler.record_error(http_error(429))
+    assert scheduler.seconds_until_due() == poll_module.RATE_LIMIT_FLOOR
+    scheduler.wake()
+    scheduler.record_error(http_error(500))
+    assert scheduler.seconds_until_due() == 10
+
+
+def test_wake_makes_a_poll_due_now():
+    scheduler, _ = _scheduler()
+    for _ in range(5):
+        scheduler.record_result(changed=False)
+    assert not scheduler.due()
+    scheduler.wake()
+    assert scheduler.due()
+    assert scheduler.interval == 5
+
+
+@patch.object(poll_module, "JITTER", 0)
+def test_unfocused_window_polls_less_and_refocus_wakes():
+    scheduler, _ = _scheduler()
+    scheduler.set_focused(False)
+    scheduler.record_result(changed=True)
+    assert scheduler.seconds_until_due() == 5 * poll_module.UNFOCUSED_FACTOR
+    scheduler.set_focused(True)
+    assert scheduler.due()
+
+
+@patch.object(poll_module, "JITTER", 0)
+def test_minimized_or_push_only_polls_at_max_interval():
+    scheduler, _ = _scheduler()
+    scheduler.set_visible(False)
+    scheduler.record_result(changed=True)
+    assert scheduler.seconds_until_due() == 300
+    scheduler.set_visible(True)
+    assert scheduler.due()
+    scheduler.push_active = True
+    scheduler.record_result(changed=True)
+    assert scheduler.seconds_until_due() == 300
+
+
+def test_jitter_stays_within_bounds():
+    scheduler, _ = _scheduler()
+    for _ in range(50):
+        scheduler.record_result(changed=True)
+        assert 5 * (1 - poll_module.JITTER) <= scheduler.seconds_until_due() <= 5 * (1 + poll_module.JITTER)
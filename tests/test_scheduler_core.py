@@ -0,0 +1,139 @@
+import sys
+import os
+import json
+import subprocess
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add project root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+from scheduler_core import SchedulerCore
+from task_model import Task
+from fake_calendar import FakeCalendarService
+
+
+def _core(service, tmp_path, **kwargs):
+    return SchedulerCore(["team"], service_factory=lambda: service, backup_path=str(tmp_path / "task_data.json"), **kwargs)
+
+
+def _tomorrow(hour=10):
+    return datetime.now().replace(hour=hour, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+def test_import_needs_neither_tk_nor_the_google_client():
+    heavy = ["customtkinter", "tkinter", "googleapiclient.discovery", "google_auth_oauthlib", "google.auth.transport.requests"]
+    code = f"import sys, scheduler_core; print([m for m in {heavy!r} if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_add_flush_and_sync_round_trip(tmp_path):
+    service = FakeCalendarService()
+    core = _core(service, tmp_path)
+    task = core.add_task(Task("Write report", _tomorrow(), duration_minutes=60))
+    assert task.event_id and core.tasks_by_id[task.event_id] is task
+    assert core.visible_tasks() == [task]
+
+    result = core.flush_pending_ops()
+    assert [body["id"] for body in result["created"]] == [task.event_id]
+    assert task.event_id in service.events_by_calendar["team"]
+
+    service.add_event({"summary": "From elsewhere", "start": {"dateTime": _tomorrow(14).astimezone().isoformat()}}, "team")
+    assert core.apply_changes(core.sync()) is True
+    assert sorted(t.title for t in core.visible_tasks()) == ["From elsewhere", "Write report"]
+    assert set(core.last_sync_timings) == {"fetch", "parse"}
+    assert core.sync() is None
+    core.shutdown()
+
+
+def test_delete_tasks_hides_them_and_queues_the_delete(tmp_path):
+    service = FakeCalendarService()
+    service.add_event({"summary": "Done", "start": {"dateTime": _tomorrow().astimezone().isoformat()}}, "team")
+    core = _core(service, tmp_path, window_days=None)
+    core.apply_changes(core.sync())
+    [task] = core.tasks_by_id.values()
+
+    core.delete_tasks([task])
+    assert core.tasks_by_id == {}
+    assert core.op_log.pending_delete_ids() == {task.event_id}
+
+    core.flush_pending_ops()
+    assert service.events_by_calendar["team"] == {}
+    assert core.apply_changes(core.sync()) is False
+    core.shutdown()
+
+
+def test_load_local_store_and_pending_ops_work_offline(tmp_path):
+    service = FakeCalendarService()
+    service.add_event({"summary": "Synced", "start": {"dateTime": _tomorrow().astimezone().isoformat()}}, "team")
+    core = _core(service, tmp_path)
+    assert core.load_pending_ops(str(tmp_path / "ops.jsonl"))
+    assert core.load_local_store(str(tmp_path / "events.db"))
+    core.apply_changes(core.sync())
+    core.add_task(Task("Offline", _tomorrow(15)))
+    core.save_backup()
+    core.calendar_sync.store.close()
+    core.shutdown()
+
+    def offline():
+        raise OSError("offline")
+
+    restarted = SchedulerCore(["team"], service_factory=offline, backup_path=str(tmp_path / "task_data.json"))
+    restarted.load_pending_ops(str(tmp_path / "ops.jsonl"))
+    assert restarted.load_local_store(str(tmp_path / "events.db"))
+    assert sorted(t.title for t in restarted.visible_tasks()) == ["Offline", "Synced"]
+    assert restarted.flush_pending_ops() is None
+    assert len(restarted.op_log) == 1
+    backup = json.loads((tmp_path / "task_data.json").read_text())
+    assert sorted(entry["task"] for entries in backup.values() for entry in entries) == ["Offline", "Synced"]
+    restarted.calendar_sync.store.close()
+    restarted.shutdown()
+
+
+def test_backup_keeps_dates_past_the_loaded_window(tmp_path):
+    service = FakeCalendarService()
+    for title, days in (("Soon", 1), ("Later", 30)):
+        start = _tomorrow() + timedelta(days=days - 1)
+        service.add_event({"summary": title, "start": {"dateTime": start.astimezone().isoformat()}}, "team")
+    later = _tomorrow() + timedelta(days=29)
+    # Written by an earlier run, before the app only loaded the next two weeks
+    (tmp_path / "task_data.json").write_text(json.dumps({
+        later.date().isoformat(): [{"task": "Later", "time": "10:00", "duration": None}]
+    }))
+    core = _core(service, tmp_path, window_days=14)
+    core.apply_changes(core.sync())
+    assert [t.title for t in core.visible_tasks()] == ["Soon"]
+
+    def backed_up():
+        backup = json.loads((tmp_path / "task_data.json").read_text())
+        return sorted(entry["task"] for entries in backup.values() for entry in entries)
+
+    core.save_backup()
+    assert backed_up() == ["Later", "Soon"]
+
+    # Changes past the window come from the delta polls; the later dates are never listed
+    later_id = next(i for i, e in service.events_by_calendar["team"].items() if e["summary"] == "Later")
+    service.update_event("team", later_id, description="touched")  # same title and time: replaces the saved copy
+    far = service.add_event({"summary": "Far", "start": {"dateTime": (later + timedelta(days=30)).astimezone().isoformat()}},
+                            "team")
+    with patch.object(service, "_list", wraps=service._list) as spy:
+        core.apply_changes(core.sync())
+        core.save_backup()
+    assert backed_up() == ["Far", "Later", "Soon"]
+    assert [call.args[4] for call in spy.call_args_list] == [None]  # one updatedMin poll, no timeMin
+    service._delete("team", far["id"])
+    core.apply_changes(core.sync())
+    core.save_backup()
+    assert backed_up() == ["Later", "Soon"]
+    core.shutdown()
+
+    # Offline, a new run keeps the later dates from the backup it finds on disk
+    def offline():
+        raise OSError("offline")
+
+    restarted = SchedulerCore(["team"], service_factory=offline, backup_path=str(tmp_path / "task_data.json"))
+    restarted.add_task(Task("Offline", _tomorrow(15)))
+    restarted.save_backup()
+    assert backed_up() == ["Later", "Offline"]
+    restarted.shutdown()
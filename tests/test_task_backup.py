@@ -0,0 +1,65 @@
+import sys
+import os
+import json
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import task_backup
+from task_backup import TaskBackup, group_by_date, load_journal
+
+
+def _record(name, date="2025-04-20", time="10:00"):
+    return date, {"task": name, "time": time, "duration": "1 hour\t"}
+
+
+def test_group_by_date_orders_by_date_and_time():
+    records = {"b": _record("B", time="12:00"), "a": _record("A", time="09:00"), "c": _record("C", date="2025-04-19")}
+    assert group_by_date(records) == {
+        "2025-04-19": [_record("C")[1]],
+        "2025-04-20": [_record("A", time="09:00")[1], _record("B", time="12:00")[1]],
+    }
+
+
+def test_save_skips_unchanged_and_writes_atomically(tmp_path):
+    path = tmp_path / "task_data.json"
+    backup = TaskBackup(str(path))
+    records = {"a": _record("A")}
+    assert backup.save(records) == 1
+    assert backup.save(dict(records)) == 0
+    assert backup.snapshots == 1
+    assert json.loads(path.read_text()) == {"2025-04-20": [_record("A")[1]]}
+    assert not (tmp_path / "task_data.json.tmp").exists()
+
+
+def test_journal_appends_only_changes(tmp_path):
+    journal = tmp_path / "task_data.jsonl"
+    backup = TaskBackup(str(tmp_path / "task_data.json"), journal_path=str(journal))
+    records = {f"id{i}": _record(f"T{i}") for i in range(50)}
+    assert backup.save(records) == 50
+
+    records = dict(records, id3=_record("Renamed"))
+    del records["id7"]
+    assert backup.save(records) == 2
+    lines = journal.read_text().splitlines()
+    assert len(lines) == 52
+    assert json.loads(lines[-1]) == {"op": "del", "id": "id7"}
+    assert backup.snapshots == 0
+
+    assert load_journal(str(journal)) == records
+    # A fresh writer picks up where the journal left off
+    assert TaskBackup(str(tmp_path / "task_data.json"), journal_path=str(journal)).save(records) == 0
+
+
+def test_journal_compacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_backup, "COMPACT_MIN_LINES", 10)
+    journal = tmp_path / "task_data.jsonl"
+    path = tmp_path / "task_data.json"
+    backup = TaskBackup(str(path), journal_path=str(journal))
+    for i in range(12):
+        backup.save({"a": _record(f"A{i}")})
+    assert len(journal.read_text().splitlines()) <= 10
+    assert load_journal(str(journal)) == {"a": _record("A11")}
+    assert backup.snapshots == 1
+    backup.compact()
+    assert len(journal.read_text().splitlines()) == 1
+    assert json.loads(path.read_text()) == {"2025-04-20": [_record("A11")[1]]}
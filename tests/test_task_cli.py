@@ -0,0 +1,161 @@
+import sys
+import os
+import io
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import task_cli
+from calendar_utils import CALENDAR_ID
+from fake_calendar import FakeCalendarService
+
+
+def _run(service, argv, stdin=""):
+    out, err = io.StringIO(), io.StringIO()
+    status = task_cli.main(argv, service_factory=lambda: service, stdin=io.StringIO(stdin), stdout=out, stderr=err)
+    return status, [json.loads(line) for line in out.getvalue().splitlines()], err.getvalue()
+
+
+def _titles(service):
+    return sorted(e["summary"] for e in service.events_by_calendar.get(CALENDAR_ID, {}).values())
+
+
+def _soon(days=1):
+    return (datetime.now().replace(microsecond=0) + timedelta(days=days)).isoformat(timespec="minutes")
+
+
+def test_add_creates_one_event():
+    service = FakeCalendarService()
+    status, [result], _ = _run(service, ["add", "Patch db01", "2030-05-01T09:00", "--duration", "1.5"])
+    assert status == 0 and result["ok"]
+    [event] = service.events_by_calendar[CALENDAR_ID].values()
+    assert event["id"] == result["id"]
+    assert event["end"]["dateTime"] == "2030-05-01T10:30:00"
+
+
+def test_bulk_add_csv_streams_batches_and_reports_bad_rows():
+    service = FakeCalendarService()
+    rows = "".join(f"Task {i},2030-05-01T{8 + i % 10:02d}:00,1\n" for i in range(7))
+    stdin = "title,start,duration\n" + rows + "Broken,not a date,1\n"
+    status, results, err = _run(service, ["bulk-add", "--batch-size", "3"], stdin)
+
+    assert status == 1  # the broken row
+    assert [r["row"] for r in results] == list(range(1, 9))
+    assert [r["ok"] for r in results] == [True] * 7 + [False]
+    assert "bad row" in results[-1]["error"]
+    assert len(_titles(service)) == 7
+    assert err.count("⏱️") == 3  # one progress line per batch
+    assert "✅ Done: 7 added, 1 failed" in err
+    assert "Created" in err  # library output stays off the result stream
+
+
+def test_bulk_add_jsonl_retries_throttled_inserts_and_is_idempotent(monkeypatch):
+    monkeypatch.setattr(task_cli.api_limiter, "sleep", lambda seconds: None)
+    service = FakeCalendarService()
+    service.insert_failures = [None, 429]
+    stdin = "\n".join(json.dumps({"id": f"id{i}", "title": f"Task {i}", "start": "2030-05-01T09:00"}) for i in range(3))
+    status, results, err = _run(service, ["bulk-add", "--input-format", "jsonl"], stdin)
+    assert status == 0
+    assert [r["id"] for r in results if r["ok"]] == ["id0", "id1", "id2"]
+    assert "retrying" in err
+
+    # Same rows again: the ids already exist, so nothing is duplicated
+    status, results, _ = _run(service, ["bulk-add", "--input-format", "jsonl"], stdin)
+    assert status == 0 and all(r["ok"] for r in results)
+    assert _titles(service) == ["Task 0", "Task 1", "Task 2"]
+
+
+def test_delete_by_id_and_by_title_and_start():
+    service = FakeCalendarService()
+    keep = service.add_event({"summary": "Keep", "start": {"dateTime": _soon() + ":00"}}, CALENDAR_ID)
+    by_id = service.add_event({"summary": "By id", "start": {"dateTime": _soon() + ":00"}}, CALENDAR_ID)
+    service.add_event({"summary": "By title", "start": {"dateTime": _soon(2) + ":00"}}, CALENDAR_ID)
+
+    status, [result], _ = _run(service, ["delete", by_id["id"]])
+    assert status == 0 and result == {"ok": True, "id": by_id["id"], "error": None}
+
+    stdin = f"title,start\nBy title,{_soon(2)}\nMissing,{_soon(3)}\n"
+    status, results, err = _run(service, ["delete"], stdin)
+    assert status == 1
+    assert [(r["title"], r["ok"]) for r in results] == [("By title", True), ("Missing", False)]
+    assert list(service.events_by_calendar[CALENDAR_ID]) == [keep["id"]]
+
+
+def test_delete_reads_naive_starts_in_the_given_timezone():
+    service = FakeCalendarService()
+    service.add_event({"summary": "Standup", "start": {"dateTime": "2030-05-01T09:00:00+09:00"}}, CALENDAR_ID)
+    stdin = "title,start\nStandup,2030-05-01T09:00\n"
+    status, [result], _ = _run(service, ["delete"], stdin)  # 09:00 in New York is another time
+    assert status == 1 and not result["ok"]
+    status, [result], _ = _run(service, ["--timezone", "Asia/Tokyo", "delete"], stdin)
+    assert status == 0 and result["ok"]
+    assert service.events_by_calendar[CALENDAR_ID] == {}
+
+
+def test_list_jsonl_and_csv():
+    service = FakeCalendarService()
+    service.add_event({"summary": "Soon", "start": {"dateTime": _soon() + ":00"}}, CALENDAR_ID)
+    service.add_event({"summary": "Later", "start": {"dateTime": _soon(30) + ":00"}}, CALENDAR_ID)
+
+    status, results, _ = _run(service, ["list", "--days", "7"])
+    assert status == 0 and [r["title"] for r in results] == ["Soon"]
+
+    out = io.StringIO()
+    task_cli.main(["list", "--format", "csv"], service_factory=lambda: service, stdout=out, stderr=io.StringIO())
+    lines = out.getvalue().splitlines()
+    assert lines[0] == "id,title,start,end"
+    assert [line.split(",")[1] for line in lines[1:]] == ["Soon", "Later"]
+
+
+def test_list_all_calendars_merges_in_start_order():
+    service = FakeCalendarService()
+    service.add_event({"summary": "Primary later", "start": {"dateTime": _soon(3) + ":00"}}, CALENDAR_ID)
+    service.add_event({"summary": "Team soon", "start": {"dateTime": _soon(1) + ":00"}}, "team")
+    service.add_event({"summary": "Primary soon", "start": {"dateTime": _soon(2) + ":00"}}, CALENDAR_ID)
+    with patch("task_cli.CALENDAR_IDS", [CALENDAR_ID, "team"]):
+        status, results, _ = _run(service, ["list", "--all-calendars"])
+    assert status == 0
+    assert [(r["title"], r["calendar"]) for r in results] == [
+        ("Team soon", "team"), ("Primary soon", CALENDAR_ID), ("Primary later", CALENDAR_ID)
+    ]
+
+
+def test_backup_writes_file(tmp_path):
+    service = FakeCalendarService()
+    service.add_event({"summary": "Backed up", "start": {"dateTime": _soon() + ":00"},
+                       "end": {"dateTime": _soon() + ":00"}}, CALENDAR_ID)
+    path = str(tmp_path / "backup.json")
+    status, [result], _ = _run(service, ["backup", "--out", path])
+    assert status == 0 and result["path"] == path
+    with open(path) as f:
+        assert [t["task"] for tasks in json.load(f).values() for t in tasks] == ["Backed up"]
+
+
+def test_service_failure_is_reported_not_raised():
+    def offline():
+        raise OSError("offline")
+
+    err = io.StringIO()
+    status = task_cli.main(["list"], service_factory=offline, stdout=io.StringIO(), stderr=err)
+    assert status == 1
+    assert "list failed" in err.getvalue()
+
+
+def test_metrics_and_trace_are_written_for_the_run(tmp_path):
+    from metrics import metrics
+    service = FakeCalendarService()
+    prom, trace = str(tmp_path / "run.prom"), str(tmp_path / "run.json")
+    try:
+        status, _, _ = _run(service, ["--metrics", prom, "--trace", trace, "add", "Patch db01", "2030-05-01T09:00"])
+    finally:
+        metrics.disable()
+        metrics.reset()
+    assert status == 0
+    with open(prom) as f:
+        text = f.read()
+    assert 'task_scheduler_span_seconds_count{span="command",command="add"} 1' in text
+    assert 'task_scheduler_api_requests_total{op="insert"}' in text
+    with open(trace) as f:
+        assert {e["name"] for e in json.load(f)["traceEvents"]} >= {"command", "api_request"}
@@ -0,0 +1,150 @@
+import sys
+import os
+import json
+import pytest
+from unittest.mock import MagicMock
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import task_import
+from api_limits import RetryPolicy
+from calendar_utils import CALENDAR_ID, api_limiter
+from task_import import backup_event_body, import_backup, iter_backup
+from fake_calendar import FakeCalendarService, http_error
+
+
+def _write_backup(tmp_path, days=3, per_day=4):
+    data = {
+        f"2025-05-{day + 1:02d}": [
+            {"task": f"Task {day}-{i}", "time": f"{9 + i:02d}:00", "duration": "1.5 hours\t"} for i in range(per_day)
+        ]
+        for day in range(days)
+    }
+    path = tmp_path / "task_data.json"
+    path.write_text(json.dumps(data, indent=2))
+    return str(path), data
+
+
+def _titles(service):
+    return sorted(e["summary"] for e in service.events_by_calendar.get(CALENDAR_ID, {}).values())
+
+
+def test_iter_backup_streams_in_small_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_import, "READ_CHUNK", 7)
+    path, data = _write_backup(tmp_path)
+    expected = [(date, task) for date, tasks in data.items() for task in tasks]
+    assert list(iter_backup(path)) == expected
+
+
+def test_iter_backup_empty_and_malformed(tmp_path):
+    empty = tmp_path / "empty.json"
+    empty.write_text("{}")
+    assert list(iter_backup(str(empty))) == []
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"2025-05-01": [{"task": "A"')
+    with pytest.raises(ValueError):
+        list(iter_backup(str(broken)))
+
+
+def test_backup_event_body():
+    body = backup_event_body("2025-05-01", {"task": "A", "time": "09:30", "duration": "1.5 hours\t"})
+    assert body["start"] == {"dateTime": "2025-05-01T09:30:00", "timeZone": "America/New_York"}
+    assert body["end"]["dateTime"] == "2025-05-01T11:00:00"
+    assert len(body["id"]) == 32
+
+
+def test_import_skips_existing_and_duplicate_entries(tmp_path):
+    path, data = _write_backup(tmp_path)
+    data["2025-05-01"].append(dict(data["2025-05-01"][0]))  # same task twice in the file
+    with open(path, "w") as f:
+        json.dump(data, f)
+    service = FakeCalendarService()
+    # Already in the calendar, written with a UTC offset instead of a time zone name
+    service.add_event({"summary": "Task 0-1", "start": {"dateTime": "2025-05-01T14:00:00Z"}}, CALENDAR_ID)
+
+    stats = import_backup(service, path, batch_size=5)
+
+    assert stats["read"] == 13
+    assert stats["skipped"] == 2
+    assert stats["inserted"] == 11
+    assert stats["batches"] == 3
+    assert len(_titles(service)) == 12
+    assert not os.path.exists(path + ".import")
+
+    # Running it again finds everything already there
+    again = import_backup(service, path)
+    assert again["inserted"] == 0 and again["skipped"] == 13
+
+
+def test_import_resumes_after_interruption(tmp_path, monkeypatch):
+    path, _ = _write_backup(tmp_path)
+    service = FakeCalendarService()
+    real_batch = service.new_batch_http_request
+    calls = []
+
+    def flaky_batch(callback=None):
+        calls.append(1)
+        if len(calls) == 2:
+            raise KeyboardInterrupt  # killed during the second batch
+        return real_batch(callback)
+
+    monkeypatch.setattr(service, "new_batch_http_request", flaky_batch)
+    with pytest.raises(KeyboardInterrupt):
+        import_backup(service, path, batch_size=5)
+    assert len(_titles(service)) == 5
+    with open(path + ".import") as f:
+        assert json.load(f)["done"] == 5
+
+    list_calls = service.list_calls
+    stats = import_backup(service, path, batch_size=5)
+    assert stats["resumed"] == 5
+    assert stats["inserted"] == 7
+    assert len(_titles(service)) == 12
+    assert service.list_calls == list_calls + 1
+    assert not os.path.exists(path + ".import")
+
+
+def test_import_retries_transient_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_limiter, "sleep", lambda seconds: None)
+    path, _ = _write_backup(tmp_path, days=1)
+    service = FakeCalendarService()
+    service.insert_failures = [503, 429]
+    stats = import_backup(service, path)
+    assert stats["inserted"] == 4 and stats["unsent"] == 0
+    assert len(_titles(service)) == 4
+
+
+def test_import_keeps_checkpoint_when_batches_stay_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_limiter, "sleep", lambda seconds: None)
+    monkeypatch.setitem(api_limiter.policies, "batch", RetryPolicy(max_retries=1))
+    path, _ = _write_backup(tmp_path, days=2)
+    service = FakeCalendarService()
+    service.insert_failures = [None] * 4 + [500] * 8  # first batch lands, second fails twice
+    stats = import_backup(service, path, batch_size=4)
+    assert stats["inserted"] == 4 and stats["unsent"] == 4
+    with open(path + ".import") as f:
+        assert json.load(f)["done"] == 4
+
+
+def test_throttled_batch_is_only_retried_by_the_limiter(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(api_limiter, "sleep", sleeps.append)
+    path, _ = _write_backup(tmp_path, days=1)
+    service = FakeCalendarService()
+    batch = MagicMock()
+    batch.execute.side_effect = http_error(429, "rate limited")
+    monkeypatch.setattr(service, "new_batch_http_request", lambda callback: batch)
+    stats = import_backup(service, path)
+    retries = api_limiter.policies["batch"].max_retries
+    assert batch.execute.call_count == retries + 1 and len(sleeps) == retries
+    assert stats["inserted"] == 0 and stats["unsent"] == 4
+
+
+def test_import_with_concurrent_batches(tmp_path):
+    path, _ = _write_backup(tmp_path, days=10, per_day=5)
+    service = FakeCalendarService()
+    stats = import_backup(service, path, batch_size=4, concurrency=3, service_factory=lambda: service)
+    assert stats["inserted"] == 50
+    assert stats["batches"] == 13
+    assert len(_titles(service)) == 50
+    assert stats["per_second"] > 0
@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from task_list_view import visible_range, pool_size_for, clamp_offset, CheckState, ROW_HEIGHT, OVERSCAN
+
+
+def test_visible_range_at_top():
+    assert visible_range(0, ROW_HEIGHT * 10, 10000) == (0, 10 + OVERSCAN)
+
+
+def test_visible_range_mid_list_includes_overscan():
+    first, last = visible_range(ROW_HEIGHT * 500 + 5, ROW_HEIGHT * 10, 10000)
+    assert first == 500 - OVERSCAN
+    assert last == 511 + OVERSCAN
+
+
+def test_visible_range_clamps_to_count():
+    assert visible_range(0, ROW_HEIGHT * 10, 3) == (0, 3)
+    assert visible_range(0, ROW_HEIGHT * 10, 0) == (0, 0)
+
+
+def test_pool_never_smaller_than_visible_range():
+    height = ROW_HEIGHT * 7.5
+    pool = pool_size_for(height)
+    for offset in range(0, ROW_HEIGHT * 40, 7):
+        first, last = visible_range(offset, height, 10000)
+        assert last - first <= pool
+
+
+def test_clamp_offset():
+    assert clamp_offset(-50, 300, 100) == 0
+    assert clamp_offset(10 ** 9, 300, 100) == 100 * ROW_HEIGHT - 300
+    assert clamp_offset(120, 300, 5) == 0  # list shorter than the viewport
+
+
+def test_check_state_reads_and_writes_the_view():
+    class View:
+        checked = set()
+
+        def set_checked(self, key, value):
+            (self.checked.add if value else self.checked.discard)(key)
+
+    view = View()
+    state = CheckState(view, "e1")
+    assert state.get() == 0
+    state.set(1)
+    assert state.get() == 1 and view.checked == {"e1"}
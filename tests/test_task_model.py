@@ -0,0 +1,65 @@
+import sys
+import os
+import dataclasses
+import pytest
+from datetime import datetime
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from task_model import Task
+
+
+EVENT = {
+    "id": "e1",
+    "etag": '"3"',
+    "summary": "Dentist",
+    "start": {"dateTime": "2025-04-20T10:00:00-04:00"},
+    "end": {"dateTime": "2025-04-20T11:30:00-04:00"},
+}
+
+
+def test_from_event_and_display_labels():
+    task = Task.from_event(EVENT)
+    assert task.title == "Dentist"
+    assert task.event_id == "e1"
+    assert task.duration_minutes == 90
+    assert task.version == '"3"'
+    assert task.date_label == "4/20/25"
+    assert task.time_label == "10:00 AM"
+    assert task.duration_label == "1.5 hours\t"
+    assert Task("One", task.start, duration_minutes=60).duration_label == "1 hour\t"
+    assert Task("None", task.start).duration_label is None
+
+
+def test_from_event_skips_untitled_and_all_day():
+    assert Task.from_event({"summary": "", "start": {"dateTime": "2025-04-20T10:00:00"}}) is None
+    assert Task.from_event({"summary": "Holiday", "start": {"date": "2025-04-20"}}) is None
+
+
+def test_event_body_round_trip():
+    task = Task("Run", datetime(2025, 4, 20, 7, 15), duration_minutes=45, event_id="abc")
+    body = task.to_event_body("America/New_York")
+    assert body == {
+        "id": "abc",
+        "summary": "Run",
+        "start": {"dateTime": "2025-04-20T07:15:00", "timeZone": "America/New_York"},
+        "end": {"dateTime": "2025-04-20T08:00:00", "timeZone": "America/New_York"},
+    }
+    assert Task.from_event(body) == task
+
+
+def test_frozen_hashable_and_version_sensitive():
+    task = Task.from_event(EVENT)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        task.title = "Changed"
+    assert not hasattr(task, "__dict__")  # slotted
+    assert Task.from_event(dict(EVENT)) == task
+    assert len({task, Task.from_event(EVENT)}) == 1
+    assert Task.from_event(dict(EVENT, etag='"4"')) != task
+
+
+def test_untimed_task_and_mixed_sorting():
+    local = Task("Local", datetime(2025, 4, 20, 0, 0), has_time=False)
+    synced = Task.from_event(EVENT)
+    assert local.time_label == ""
+    assert sorted([synced, local], key=lambda t: t.sort_key) == [local, synced]
@@ -1,12 +1,16 @@
 import sys
 import os
+import json
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
+from googleapiclient.errors import HttpError
 
 # Add project root to import app
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import task_scheduler_gui as gui
+from task_backup import TaskBackup
+from task_model import Task
 
 @pytest.fixture(autouse=True)
 def reset_state():
@@ -21,6 +25,8 @@ def reset_state():
     gui.minute_var.set("")
     gui.am_pm_var.set("AM")
     gui.duration_var.set("")
+    gui.tasks_by_id.clear()
+    gui.op_log.clear()
     yield
 
 def test_vcmd_type():
@@ -124,8 +130,8 @@ def test_submit_task_invalid_duration_type(mock_error):
     gui.submit_task()
     mock_error.assert_called_with("Invalid Duration", "Please enter a valid numeric duration.")
 
-@patch("task_scheduler_gui.backup_calendar_to_json")
-@patch("task_scheduler_gui.create_event")
+@patch("task_scheduler_gui.schedule_backup")
+@patch("op_log.create_event")
 @patch("task_scheduler_gui.get_calendar_service")
 @patch("task_scheduler_gui.messagebox.showinfo")
 def test_submit_task_success(mock_info, mock_service, mock_create, mock_backup):
@@ -140,12 +146,28 @@ def test_submit_task_success(mock_info, mock_service, mock_create, mock_backup):
     gui.am_pm_var.set("AM")
     gui.duration_var.set("1")
     gui.submit_task()
+    gui.io_worker.flush()
     mock_create.assert_called_once()
     mock_info.assert_called_once()
     mock_backup.assert_called_once()
+    # The id is generated locally and sent with the create
+    body = mock_create.call_args[0][1]
+    assert body["id"] in gui.tasks_by_id
+    assert len(gui.op_log) == 0
+
+def _fill_task_form(name):
+    gui.task_entry.delete("1.0", "end")
+    gui.task_entry.insert("1.0", name)
+    gui.month_var.set("4")
+    gui.day_var.set("20")
+    gui.year_entry.delete(0, "end")
+    gui.year_entry.insert(0, "2025")
+    gui.hour_var.set("10")
+    gui.minute_var.set("00")
+    gui.duration_var.set("1")
 
 @patch("task_scheduler_gui.messagebox.showerror")
-@patch("task_scheduler_gui.create_event", side_effect=Exception("fail"))
+@patch("op_log.create_event", side_effect=HttpError(MagicMock(status=400), b"fail"))
 @patch("task_scheduler_gui.get_calendar_service")
 def test_submit_task_event_creation_failure(mock_service, mock_create, mock_error):
     gui.task_entry.delete("1.0", "end")
@@ -158,22 +180,29 @@ def test_submit_task_event_creation_failure(mock_service, mock_create, mock_erro
     gui.minute_var.set("00")
     gui.duration_var.set("1")
     gui.submit_task()
+    gui.io_worker.flush()
     mock_error.assert_called()
     assert "fail" in mock_error.call_args[0][1]
+    # A rejected create is not retried and its task disappears
+    assert len(gui.op_log) == 0
+    assert not gui.tasks_by_id
 
-@patch("task_scheduler_gui.get_calendar_service", side_effect=Exception("fetch fail"))
-def test_fetch_calendar_tasks_fail(mock_service):
-    assert gui.fetch_calendar_tasks() == []
+@patch("task_scheduler_gui.messagebox.showerror")
+@patch("op_log.create_event", side_effect=OSError("network down"))
+@patch("task_scheduler_gui.get_calendar_service")
+def test_submit_task_offline_stays_queued(mock_service, mock_create, mock_error):
+    _fill_task_form("Offline task")
+    gui.submit_task()
+    gui.io_worker.flush()
+    mock_error.assert_not_called()
+    assert len(gui.op_log) == 1
+    [body] = gui.op_log.pending_creates()
+    assert gui.all_tasks == [gui.tasks_by_id[body["id"]]]
+    assert not gui.op_log.due()  # backing off
 
 def test_sort_tasks_duration():
     gui.all_tasks.clear()
-    gui.all_tasks.append({
-        "date": datetime(2025, 4, 20),
-        "time": None,
-        "duration": "1 hour",
-        "task_name": "Test Task",
-        "start_datetime": datetime(2025, 4, 20, 10, 0)
-    })
+    gui.all_tasks.append(Task("Test Task", datetime(2025, 4, 20, 10, 0), duration_minutes=60, has_time=False))
     gui.sort_tasks()
     assert gui.task_list_container.winfo_children()
 
@@ -189,14 +218,73 @@ def test_numeric_only_with_vcmd_call():
 
 @patch("task_scheduler_gui.messagebox.showinfo")
 @patch("task_scheduler_gui.get_calendar_service")
-@patch("task_scheduler_gui.delete_task")
-def test_clear_completed_tasks_triggers_info(mock_delete, mock_service, mock_info):
+@patch("task_scheduler_gui.schedule_backup")
+@patch("op_log.delete_tasks", return_value=[{"target": ("Test Clear", "2025-04-20T10:00"), "ok": True}])
+def test_clear_completed_tasks_triggers_info(mock_delete, mock_backup, mock_service, mock_info):
     var = MagicMock()
     var.get.return_value = 1
     frame = MagicMock()
-    gui.checkbox_refs.append(({
-        "task_name": "Test Clear",
-        "start_datetime": datetime(2025, 4, 20, 10, 0)
-    }, var, frame))
+    gui.checkbox_refs.append((Task("Test Clear", datetime(2025, 4, 20, 10, 0)), var, frame))
     gui.clear_completed_tasks()
+    gui.io_worker.flush()
     mock_info.assert_called_once_with("Tasks Cleared", "Completed tasks have been removed and deleted from Google Calendar.")
+    mock_delete.assert_called_once()
+    assert mock_delete.call_args[0][1] == [("Test Clear", "2025-04-20T10:00")]
+    mock_backup.assert_called_once()
+
+def test_write_backup_uses_local_tasks(tmp_path):
+    path = tmp_path / "task_data.json"
+    start = datetime(2025, 4, 20, 10, 0)
+    gui.tasks_by_id["a"] = _task("Local", start, "a")
+    # Offline: the loaded dates come from local state, the later ones from the (missing) file
+    with patch.object(gui.core, "task_backup", TaskBackup(str(path))), \
+            patch("task_scheduler_gui.get_calendar_service", side_effect=OSError("offline")):
+        gui.write_backup()
+        gui.io_worker.flush()
+    assert json.loads(path.read_text()) == {"2025-04-20": [{"task": "Local", "time": "10:00", "duration": "1 hour\t"}]}
+
+def _task(name, start, event_id=None):
+    return Task(name, start, duration_minutes=60, event_id=event_id)
+
+def test_sort_tasks_keeps_checkbox_state_across_refresh():
+    first = _task("First", datetime(2025, 4, 20, 9, 0), "e1")
+    second = _task("Second", datetime(2025, 4, 20, 10, 0), "e2")
+    gui.all_tasks.extend([first, second])
+    gui.sort_tasks()
+    gui.checkbox_refs[0][1].set(1)
+
+    # Rename the second task and add a third on a new day
+    gui.all_tasks[:] = [first, _task("Second (edited)", datetime(2025, 4, 20, 10, 0), "e2"),
+                        _task("Third", datetime(2025, 4, 21, 8, 0), "e3")]
+    gui.sort_tasks()
+
+    assert [t.event_id for t, _, _ in gui.checkbox_refs] == ["e1", "e2", "e3"]
+    assert [var.get() for _, var, _ in gui.checkbox_refs] == [1, 0, 0]
+
+def test_build_list_entries_groups_by_date():
+    a = _task("A", datetime(2025, 4, 21, 9, 0), "a")
+    b = _task("B", datetime(2025, 4, 20, 10, 0), "b")
+    entries = gui.build_list_entries([a, b])
+    assert [(kind, key) for kind, key, _ in entries] == [
+        ("header", ("header", "4/20/25")), ("task", "b"),
+        ("header", ("header", "4/21/25")), ("task", "a"),
+    ]
+
+def test_sort_tasks_identical_tasks_get_separate_rows():
+    start = datetime(2025, 4, 20, 9, 0)
+    gui.all_tasks.extend([_task("Same", start), _task("Same", start)])
+    gui.sort_tasks()
+    assert len(gui.checkbox_refs) == 2
+    gui.checkbox_refs[0][1].set(1)
+    assert gui.checkbox_refs[1][1].get() == 0
+
+def test_sort_tasks_widget_count_is_independent_of_task_count():
+    base = datetime(2025, 4, 20, 8, 0)
+    gui.all_tasks.extend(_task(f"T{i}", base + timedelta(minutes=i), f"id{i}") for i in range(50))
+    gui.sort_tasks()
+    small = gui.task_list_container.widget_count
+
+    gui.all_tasks.extend(_task(f"T{i}", base + timedelta(minutes=i), f"id{i}") for i in range(50, 10000))
+    gui.sort_tasks()
+    assert gui.task_list_container.widget_count == small
+    assert len(gui.checkbox_refs) == 10000
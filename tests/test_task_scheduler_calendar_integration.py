@@ -1,62 +1,163 @@
 import sys
 import os
+import threading
+import time
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
+from google.auth.exceptions import RefreshError
 
 # Add project root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import task_scheduler_gui as gui
+from io_worker import IOWorker
+from task_model import Task
 
 # 🔁 Fixture: resets GUI + state between test runs
 @pytest.fixture(autouse=True)
 def clear_gui_state():
     gui.all_tasks.clear()
     gui.checkbox_refs.clear()
+    gui.tasks_by_id.clear()
+    gui.core.calendar_sync.reset()
+    gui.op_log.clear()
+    gui.poll_scheduler.wake()
 
-@patch("task_scheduler_gui.get_calendar_service")
-@patch("task_scheduler_gui.list_all_events")
-def test_fetch_calendar_tasks_returns_formatted_list(mock_list, mock_service):
-    # Arrange mock event
-    mock_list.return_value = [{
-        "summary": "Test Event",
-        "start": {"dateTime": "2025-04-20T10:00:00"},
-        "end": {"dateTime": "2025-04-20T11:00:00"}
-    }]
-    
-    # Act
-    tasks = gui.fetch_calendar_tasks()
-    
-    # Assert
-    assert isinstance(tasks, list)
-    assert tasks[0]["task_name"] == "Test Event"
-    assert tasks[0]["duration"] == "1 hour\t"
-    assert tasks[0]["date"].isoformat().startswith("2025-04-20T10:00")
 
+@pytest.fixture
+def token_sync(monkeypatch):
+    """Sync whole calendars with sync tokens instead of the default date windows."""
+    from multi_calendar import MultiCalendarSync
+    sync = MultiCalendarSync(gui.CALENDAR_IDS)
+    monkeypatch.setattr(gui.core, "calendar_sync", sync)
+    yield sync
+    sync.shutdown()
 
 @patch("task_scheduler_gui.get_calendar_service")
-@patch("task_scheduler_gui.list_all_events")
-def test_fetch_calendar_tasks_with_missing_fields(mock_list, mock_service):
-    # Events with missing summary or dateTime should be skipped
-    mock_list.return_value = [
-        {"summary": "", "start": {"dateTime": "2025-04-20T10:00:00"}},
-        {"summary": "Missing start"},
-        {"start": {"dateTime": "2025-04-20T10:00:00"}}
-    ]
-    
-    tasks = gui.fetch_calendar_tasks()
-    assert tasks == []
+def test_sync_shows_formatted_tasks_and_skips_incomplete_events(mock_service, token_sync):
+    start = (datetime.now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+    events = mock_service.return_value.events.return_value
+    events.list.return_value.execute.return_value = {"items": [
+        {"id": "a", "summary": "Test Event", "start": {"dateTime": start.isoformat()},
+         "end": {"dateTime": (start + timedelta(hours=1)).isoformat()}},
+        {"id": "b", "summary": "", "start": {"dateTime": start.isoformat()}},
+        {"id": "c", "summary": "Missing start"},
+        {"id": "d", "start": {"dateTime": start.isoformat()}}
+    ], "nextSyncToken": "t1"}
+
+    gui.on_sync_done(gui.sync_calendar_tasks())
 
+    [task] = gui.all_tasks
+    assert task.title == "Test Event"
+    assert task.duration_label == "1 hour\t"
+    assert task.start == start
 
-@patch("task_scheduler_gui.fetch_calendar_tasks")
-def test_refresh_task_list_periodically_runs_without_crashing(mock_fetch):
-    mock_fetch.return_value = []
+
+@patch("task_scheduler_gui.io_worker")
+def test_refresh_task_list_periodically_runs_without_crashing(mock_worker):
+    gui._sync_in_flight = False
     gui.app.after(1, lambda: gui.app.quit())  # Quit quickly after run
     gui.refresh_task_list_periodically()
-    assert mock_fetch.called  # Ensure the fetch_calendar_tasks function was called
+    # The sync is handed to the background worker, not run on the Tk thread
+    mock_worker.submit.assert_called_once()
+    assert mock_worker.submit.call_args[0][0] is gui.sync_calendar_tasks
+
+    # A second tick while the first sync is still running doesn't stack another one
+    gui.refresh_task_list_periodically()
+    mock_worker.submit.assert_called_once()
+    gui._sync_in_flight = False
+
+
+@patch("task_scheduler_gui.sort_tasks")
+def test_on_sync_done_renders_only_on_change(mock_sort):
+    today = datetime.now().replace(hour=23, minute=0, second=0, microsecond=0)
+    gui._last_refresh_day = today.date()
+    gui.on_sync_done(None)
+    mock_sort.assert_not_called()
+
+    task = Task("New", today, event_id="x")
+    gui.on_sync_done({"added": {"x": task}, "modified": {}, "removed": []})
+    mock_sort.assert_called_once()
+    assert gui.all_tasks == [task]
+
+
+def test_on_sync_done_records_refresh_timings(monkeypatch):
+    monkeypatch.setattr(gui, "refresh_timings", gui.RefreshTimings())
+    monkeypatch.setattr(gui.core, "last_sync_timings", {"fetch": 0.2, "parse": 0.01})
+    gui.on_sync_done(None)
+    [cycle] = gui.refresh_timings.cycles
+    assert cycle["fetch"] == 0.2 and cycle["parse"] == 0.01 and cycle["total"] >= 0.21
+
+
+@patch("task_scheduler_gui.ctk.CTkLabel")
+def test_perf_overlay_toggles_and_stops_its_loops(mock_label):
+    gui.toggle_perf_overlay()
+    overlay = gui.perf_overlay
+    assert overlay is mock_label.return_value
+    assert "widgets:" in overlay.configure.call_args.kwargs["text"]
+    gui.toggle_perf_overlay()
+    assert gui.perf_overlay is None
+    overlay.destroy.assert_called_once()
+    overlay.configure.reset_mock()
+    gui.update_perf_overlay(overlay)  # a pending update for the old overlay does nothing
+    overlay.configure.assert_not_called()
+
+
+@patch("task_scheduler_gui.get_calendar_service")
+def test_sync_calendar_tasks_applies_only_deltas(mock_service, token_sync):
+    events = mock_service.return_value.events.return_value
+    events.list.return_value.execute.side_effect = [
+        {"items": [
+            {"id": "a", "updated": "1", "summary": "Keep", "start": {"dateTime": "2025-04-20T10:00:00"}},
+            {"id": "b", "updated": "1", "summary": "Drop", "start": {"dateTime": "2025-04-20T11:00:00"}},
+        ], "nextSyncToken": "t1"},
+        {"items": [{"id": "b", "status": "cancelled"}], "nextSyncToken": "t2"},
+    ]
+
+    assert gui.apply_task_changes(gui.sync_calendar_tasks()) is True
+    keep = gui.tasks_by_id["a"]
+    assert set(gui.tasks_by_id) == {"a", "b"}
+
+    assert gui.apply_task_changes(gui.sync_calendar_tasks()) is True
+    assert set(gui.tasks_by_id) == {"a"}
+    assert gui.tasks_by_id["a"] is keep  # untouched task was not re-parsed
+    assert events.list.call_args.kwargs["syncToken"] == "t1"
+
+
+def test_apply_task_changes_without_changes():
+    assert gui.apply_task_changes(None) is False
+    assert gui.apply_task_changes({"added": {}, "modified": {}, "removed": ["unknown"]}) is False
+
+
+def test_sync_calendar_tasks_short_circuits_when_nothing_changed(token_sync):
+    from fake_calendar import FakeCalendarService
+    service = FakeCalendarService()
+    service.add_event({"summary": "Only", "start": {"dateTime": "2025-04-20T10:00:00-04:00"}}, gui.core.calendar_sync.calendar_id)
+    with patch("task_scheduler_gui.get_calendar_service", return_value=service):
+        first = gui.sync_calendar_tasks()
+        assert list(first["added"]) == list(service.events_by_calendar[gui.core.calendar_sync.calendar_id])
+        with patch("scheduler_core.event_to_task") as mock_parse:
+            assert gui.sync_calendar_tasks() is None
+        mock_parse.assert_not_called()
+
+        service.add_event({"summary": "Second", "start": {"dateTime": "2025-04-21T10:00:00-04:00"}}, gui.core.calendar_sync.calendar_id)
+        changes = gui.sync_calendar_tasks()
+    assert [t.title for t in changes["added"].values()] == ["Second"]
+    assert changes["modified"] == {} and changes["removed"] == []
+
+
+@patch("task_scheduler_gui.invalidate_calendar_service")
+def test_on_sync_failed_clears_flag_and_invalidates_on_auth_error(mock_invalidate):
+    gui._sync_in_flight = True
+    gui.on_sync_failed(RefreshError("expired"))
+    assert gui._sync_in_flight is False
+    mock_invalidate.assert_called_once()
+
+    gui.on_sync_failed(Exception("offline"))
+    mock_invalidate.assert_called_once()
 
 from unittest.mock import patch, MagicMock
-from datetime import datetime
+from datetime import datetime, timedelta
 
 @patch("task_scheduler_gui.get_calendar_service", side_effect=Exception("Fail"))
 def test_clear_completed_tasks_no_service(mock_service):
@@ -67,15 +168,75 @@ def test_clear_completed_tasks_no_service(mock_service):
     frame_mock = MagicMock()
     gui.checkbox_refs.clear()
     gui.checkbox_refs.append((
-        {"task_name": "Fake", "start_datetime": datetime.now()},
+        Task("Fake", datetime.now()),
         checkbox_mock,
         frame_mock
     ))
 
     gui.clear_completed_tasks()
+    gui.io_worker.flush()
 
     # checkbox_refs should be cleared (because task was "checked")
     assert len(gui.checkbox_refs) == 0
 
     # all_tasks should also be cleared
     assert len(gui.all_tasks) == 0
+
+
+def test_load_local_store_renders_without_network(tmp_path, token_sync):
+    from event_store import EventStore
+    path = str(tmp_path / "events.db")
+    start = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    store = EventStore(path)
+    store.apply(upserts=[{"id": "cached", "summary": "From disk", "updated": "1",
+                          "start": {"dateTime": start.astimezone().isoformat()}}], sync_token="t9")
+    store.close()
+
+    with patch("task_scheduler_gui.get_calendar_service", side_effect=Exception("offline")) as mock_service:
+        gui.load_local_store(path)
+    mock_service.assert_not_called()
+
+    assert [t.title for t in gui.all_tasks] == ["From disk"]
+    primary = gui.core.calendar_sync.syncs[gui.core.calendar_sync.calendar_id]
+    assert primary.sync_token == "t9"
+    primary.store.close()
+    for sync in gui.core.calendar_sync.syncs.values():
+        sync.store = None
+
+
+def test_windowed_sync_loads_more_when_scrolled_to_the_end():
+    from fake_calendar import FakeCalendarService
+    service = FakeCalendarService()
+    soon = datetime.now().astimezone().replace(microsecond=0) + timedelta(days=1)
+    later = soon + timedelta(days=gui.SYNC_WINDOW_DAYS + 3)
+    for title, start in (("Soon", soon), ("Later", later)):
+        service.add_event({"summary": title, "start": {"dateTime": start.isoformat()},
+                           "end": {"dateTime": (start + timedelta(hours=1)).isoformat()}}, gui.core.calendar_sync.calendar_id)
+    with patch("task_scheduler_gui.get_calendar_service", return_value=service):
+        gui.apply_task_changes(gui.sync_calendar_tasks())
+        assert [t.title for t in gui.tasks_by_id.values()] == ["Soon"]
+
+        view = MagicMock()
+        view.rows_below.return_value = 20
+        gui.on_task_list_scroll(view)
+        assert gui.sync_calendar_tasks() is None
+
+        view.rows_below.return_value = 0
+        gui.on_task_list_scroll(view)
+        gui.apply_task_changes(gui.sync_calendar_tasks())
+    assert sorted(t.title for t in gui.tasks_by_id.values()) == ["Later", "Soon"]
+
+
+def test_on_close_does_not_wait_long_for_the_push_channel(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(gui, "io_worker", IOWorker())
+    monkeypatch.setattr(gui, "push_channel", {"id": "c", "resourceId": "r"})
+    monkeypatch.setattr(gui, "_backup_after_id", None)  # no backup left pending by other tests to write on exit
+    monkeypatch.setattr(gui, "PUSH_STOP_WAIT", 0.05)
+    monkeypatch.setattr(gui, "stop_channel", lambda service, channel: release.wait(5))
+    monkeypatch.setattr(gui, "get_calendar_service", MagicMock())
+    monkeypatch.setattr(gui.app, "destroy", lambda: None)
+    started = time.monotonic()
+    gui.on_close()
+    assert time.monotonic() - started < 1
+    release.set()